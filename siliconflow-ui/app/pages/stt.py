@@ -7,6 +7,7 @@ SiliconFlow语音工具集 - 语音识别页面
 """
 
 import os
+import asyncio
 import streamlit as st
 import tempfile
 import pandas as pd
@@ -20,7 +21,7 @@ from pathlib import Path
 # 确保可以导入项目模块
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from utils.state import StateManager
-from utils.api import SiliconFlowAPI
+from utils.api import SiliconFlowAPI, AsyncSiliconFlowAPI
 from components.file_uploader import audio_uploader, multi_audio_uploader
 from components.audio_player import enhanced_audio_player
 from components.progress import TranscriptionProgress
@@ -188,13 +189,26 @@ def process_batch_files():
                 # 获取API客户端
                 api = get_api_client()
                 
-                # 处理每个文件
-                for i, file_path in enumerate(file_paths):
+                # 并发转录所有文件，每完成一个文件就更新进度
+                def on_file_done(index, outcome):
+                    ok = not isinstance(outcome, Exception) and bool(outcome) and 'text' in outcome
+                    progress.file_complete(os.path.basename(file_paths[index]), ok)
+                
+                async def transcribe_all():
+                    async with AsyncSiliconFlowAPI(api) as async_api:
+                        return await async_api.transcribe_many(file_paths, on_complete=on_file_done)
+                
+                outcomes = asyncio.run(transcribe_all())
+                
+                # 整理每个文件的结果
+                for file_path, outcome in zip(file_paths, outcomes):
                     file_name = os.path.basename(file_path)
                     
                     try:
-                        # 调用API进行转录
-                        result = api.transcribe_audio(file_path)
+                        # 转录过程中的异常在这里统一处理
+                        if isinstance(outcome, Exception):
+                            raise outcome
+                        result = outcome
                         
                         if result and 'text' in result:
                             text = result['text']
@@ -212,27 +226,18 @@ def process_batch_files():
                                 output_path = os.path.join(temp_dir, output_file)
                                 with open(output_path, 'w', encoding='utf-8') as f:
                                     f.write(text)
-                            
-                            # 标记成功
-                            progress.file_complete(file_name, True)
                         else:
                             file_result = {
                                 "文件名": file_name,
                                 "转录文本": "",
                                 "状态": "失败"
                             }
-                            
-                            # 标记失败
-                            progress.file_complete(file_name, False)
                     except Exception as e:
                         file_result = {
                             "文件名": file_name,
                             "转录文本": "",
                             "状态": f"错误: {str(e)}"
                         }
-                        
-                        # 标记失败
-                        progress.file_complete(file_name, False)
                     
                     # 添加到结果列表
                     results.append(file_result)
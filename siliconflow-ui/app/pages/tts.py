@@ -175,6 +175,27 @@ def show_page():
             horizontal=True,
             help="mp3格式文件小，wav格式无损"
         )
+
+        # 长文本模式：按句子切分后并发合成，再按采样拼接
+        long_form = st.checkbox(
+            "长文本模式（分句并发合成）",
+            value=st.session_state.tts_state.get("long_form", False),
+            help="适合较长的文稿：按句子切分并同时合成多个分段，总耗时接近单段合成的耗时；输出mp3需要安装pydub"
+        )
+        crossfade_ms = 0
+        if long_form:
+            crossfade_ms = st.slider(
+                "分段接缝淡化 (毫秒)",
+                min_value=0,
+                max_value=100,
+                value=st.session_state.tts_state.get("crossfade_ms", 20),
+                step=10,
+                help="在分段接缝处做短交叉淡化，0表示直接拼接"
+            )
+
+        # 更新会话状态
+        st.session_state.tts_state["long_form"] = long_form
+        st.session_state.tts_state["crossfade_ms"] = crossfade_ms
     
     # 生成按钮区域
     st.markdown("---")
@@ -208,22 +229,51 @@ def show_page():
                 # 调用API生成语音
                 use_stream = len(text_input) > 500  # 长文本使用流式处理
                 
-                # 保存语音到文件
-                api.save_speech_to_file(
-                    text=text_input,
-                    voice_uri=selected_voice,
-                    output_path=str(output_path),
-                    speed=speed,
-                    gain=gain,
-                    sample_rate=sample_rate,
-                    stream=use_stream
-                )
+                # 流式模式下音频边到达边写入文件，实时显示接收进度
+                def on_chunk(received, metrics):
+                    progress.update(0.7, f"正在接收音频... 已接收 {received / 1024:.0f} KB，首字节耗时 {metrics['ttfb']:.2f} 秒")
+                
+                if long_form:
+                    # 长文本模式：每完成一个分段更新一次进度
+                    def on_segment(done, total):
+                        progress.update(0.5 + 0.45 * done / total, f"正在合成分段... {done}/{total}")
+                    
+                    api.save_long_speech_to_file(
+                        text=text_input,
+                        voice_uri=selected_voice,
+                        output_path=str(output_path),
+                        speed=speed,
+                        gain=gain,
+                        sample_rate=sample_rate,
+                        crossfade_ms=crossfade_ms,
+                        on_progress=on_segment
+                    )
+                else:
+                    # 保存语音到文件
+                    api.save_speech_to_file(
+                        text=text_input,
+                        voice_uri=selected_voice,
+                        output_path=str(output_path),
+                        speed=speed,
+                        gain=gain,
+                        sample_rate=sample_rate,
+                        stream=use_stream,
+                        on_chunk=on_chunk
+                    )
                 
                 # 更新进度
                 progress.update(1.0, "生成完成!")
                 
                 # 显示结果
                 st.success(f"语音生成成功: {output_filename}")
+                metrics = api.last_speech_metrics
+                if metrics:
+                    ttfb_text = f"首字节 {metrics['ttfb']:.2f} 秒，" if metrics.get("ttfb") is not None else ""
+                    if metrics.get("cached"):
+                        ttfb_text = "命中合成缓存，"
+                    if metrics.get("chunks"):
+                        ttfb_text = f"共 {metrics['chunks']} 个分段，"
+                    st.caption(f"{ttfb_text}总耗时 {metrics['elapsed']:.2f} 秒，{metrics['bytes'] / 1024:.0f} KB")
                 
                 # 保存到会话状态
                 st.session_state.tts_state["generated_audio"] = str(output_path)
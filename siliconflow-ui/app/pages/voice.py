@@ -29,7 +29,11 @@ from pathlib import Path
 
 # 确保可以导入项目模块
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from config import  AUDIO_DIR
+from config import  AUDIO_DIR, SILICONFLOW_DIR
+from common.journal import journal_path_for, load_results
+
+# stt_to_tts.py 批量处理结果目录
+BATCH_RESULTS_DIR = SILICONFLOW_DIR / "TTS" / "raw_text_files"
 
 # 缓存API客户端
 @st.cache_resource
@@ -51,7 +55,7 @@ def show_page():
     """)
     
     # 创建选项卡
-    tab1, tab2 = st.tabs(["创建自定义语音", "管理我的语音"])
+    tab1, tab2, tab3 = st.tabs(["创建自定义语音", "管理我的语音", "批量处理结果"])
     
     # 创建自定义语音选项卡
     with tab1:
@@ -60,6 +64,10 @@ def show_page():
     # 管理我的语音选项卡
     with tab2:
         manage_custom_voices()
+    
+    # 命令行批量处理结果选项卡
+    with tab3:
+        show_batch_results()
 
 def create_custom_voice():
     """创建自定义语音功能"""
@@ -400,6 +408,17 @@ def manage_custom_voices():
         use_container_width=True
     )
     
+    # 批量删除
+    with st.expander("批量删除语音"):
+        uris_to_delete = st.multiselect(
+            "选择要删除的语音",
+            options=[v["ID"] for v in voice_data],
+            format_func=lambda x: next((v["名称"] for v in voice_data if v["ID"] == x), x)
+        )
+        confirm_delete = st.checkbox("我确认要删除选中的语音，此操作不可恢复")
+        if st.button("删除选中的语音", type="secondary", disabled=not (uris_to_delete and confirm_delete)):
+            delete_selected_voices(api, uris_to_delete)
+    
     # 选择要管理的语音
     selected_voice_id = st.selectbox(
         "选择要管理的语音",
@@ -441,9 +460,11 @@ def manage_custom_voices():
                     st.rerun()
             
             with col2:
-                # 删除语音按钮 (当前版本的API可能不支持删除操作)
-                if st.button("删除此语音", type="secondary", disabled=True):
-                    st.warning("当前版本不支持删除语音操作")
+                # 按语音区分确认状态，切换语音后需要重新确认
+                confirm_single = st.checkbox("我确认要删除此语音，此操作不可恢复",
+                                             key=f"confirm_delete_{selected_voice_id}")
+                if st.button("删除此语音", type="secondary", disabled=not confirm_single):
+                    delete_selected_voices(api, [selected_voice_id])
             
             # 测试语音
             st.subheader("测试语音")
@@ -484,3 +505,78 @@ def manage_custom_voices():
                         st.error(f"生成音频时出错: {str(e)}")
                 else:
                     st.warning("请输入测试文本")
+
+def delete_selected_voices(api, voice_uris):
+    """并发删除选中的语音，显示进度和结果，完成后刷新语音列表"""
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    
+    def on_progress(done, total, result):
+        progress_bar.progress(done / total)
+        status_text.text(f"正在删除语音: {done}/{total}")
+    
+    try:
+        results = api.delete_voices(voice_uris, on_progress=on_progress)
+    except Exception as e:
+        st.error(f"删除语音失败: {str(e)}")
+        return
+    
+    failed = [r for r in results if not r["ok"]]
+    if failed:
+        st.error(f"删除完成：成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+        for r in failed:
+            st.write(f"- {r['uri']}: {r['error']}")
+    else:
+        st.success(f"已删除 {len(results)} 个语音")
+    
+    # 删除后重新获取语音列表
+    try:
+        StateManager.update_voices_list(api.get_voices())
+    except Exception as e:
+        st.warning(f"刷新语音列表失败: {str(e)}")
+    if not failed:
+        st.rerun()
+
+def show_batch_results():
+    """查看 stt_to_tts.py 目录批量处理的结果，处理进行中时同时读取结果日志"""
+    st.subheader("批量处理结果")
+    
+    if not BATCH_RESULTS_DIR.exists():
+        st.info("还没有批量处理结果，请先使用 stt_to_tts.py 处理音频目录")
+        return
+    
+    # <目录名>.json 为已整理的结果，<目录名>.jsonl 为正在追加的结果日志
+    names = sorted({p.stem for p in BATCH_RESULTS_DIR.iterdir() if p.suffix in (".json", ".jsonl")})
+    if not names:
+        st.info("还没有批量处理结果，请先使用 stt_to_tts.py 处理音频目录")
+        return
+    
+    selected_name = st.selectbox("选择批量处理目录", options=names)
+    if st.button("刷新结果"):
+        st.rerun()
+    
+    json_path = str(BATCH_RESULTS_DIR / f"{selected_name}.json")
+    try:
+        results = load_results(json_path)
+    except Exception as e:
+        st.error(f"读取批量处理结果失败: {str(e)}")
+        return
+    
+    if Path(journal_path_for(json_path)).exists():
+        st.caption("⏳ 批量处理尚未结束，以下包含结果日志中的最新记录")
+    
+    if not results:
+        st.info("该目录暂无处理成功的音频")
+        return
+    
+    df = pd.DataFrame([
+        {
+            "原始名称": info.get("audio_name_raw", name),
+            "语音名称": info.get("audio_name", ""),
+            "转录文本": info.get("text", ""),
+            "URI": info.get("uri", "")
+        }
+        for name, info in results.items()
+    ])
+    st.write(f"共 {len(df)} 个音色")
+    st.dataframe(df, hide_index=True, use_container_width=True)
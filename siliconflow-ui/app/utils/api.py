@@ -7,9 +7,13 @@ SiliconFlow语音工具集 - API调用封装模块
 """
 
 import os
-import base64
 import json
-import requests
+import time
+import asyncio
+import threading
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 导入配置
@@ -18,7 +22,16 @@ from pathlib import Path
 
 # 确保可以导入项目模块
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from config import get_api_key
+from config import get_api_key, get_api_url
+# config会将siliconflow目录加入系统路径，从而可以使用共享的HTTP传输层
+from common.http_client import get_transport, normalize_api_url
+from common.upload_stream import post_voice_upload
+from common.speech_stream import SpeechStream, DEFAULT_CHUNK_SIZE
+from common.transcription_cache import TranscriptionCache, DEFAULT_TRANSCRIPTION_MODEL
+from common.synthesis_cache import get_synthesis_cache
+from common.longform import synthesize_long_text, DEFAULT_MAX_CHARS, DEFAULT_JOBS
+from common.voice_registry import get_voice_registry
+from common import bulk_ops
 
 class SiliconFlowAPI:
     """SiliconFlow API封装类，提供与API交互的所有方法"""
@@ -29,8 +42,23 @@ class SiliconFlowAPI:
         if not self.api_key:
             raise ValueError("未找到SiliconFlow API密钥，请在.env文件中设置SILICONFLOW_API_KEY")
         
-        # API基础URL
-        self.base_url = "https://api.siliconflow.cn/v1"
+        # API基础URL，SILICONFLOW_API_URL 可指向本地模拟服务(见 siliconflow/mock_api_server.py)
+        self.base_url = normalize_api_url(get_api_url())
+        
+        # 共享的连接池传输对象
+        self.transport = get_transport()
+        
+        # 按音频内容哈希的转录缓存，与命令行脚本共用
+        self.transcription_cache = TranscriptionCache()
+        
+        # 按合成参数寻址的音频缓存，相同请求不再重复合成
+        self.synthesis_cache = get_synthesis_cache()
+        
+        # 本地音色注册表，与命令行脚本共用
+        self.voice_registry = get_voice_registry()
+        
+        # 线程本地状态，客户端会在多个会话/线程间共享
+        self._local = threading.local()
         
         # 基础请求头
         self.headers = {
@@ -38,6 +66,15 @@ class SiliconFlowAPI:
             "Content-Type": "application/json"
         }
     
+    @property
+    def last_speech_metrics(self):
+        """当前线程最近一次语音合成的传输指标(首字节时间、耗时、字节数)"""
+        return getattr(self._local, "speech_metrics", None)
+    
+    @last_speech_metrics.setter
+    def last_speech_metrics(self, metrics):
+        self._local.speech_metrics = metrics
+    
     def test_connection(self):
         """测试API连接是否正常"""
         try:
@@ -47,11 +84,12 @@ class SiliconFlowAPI:
         except Exception as e:
             return False, f"API连接失败: {str(e)}"
     
-    def transcribe_audio(self, audio_path):
+    def transcribe_audio(self, audio_path, use_cache=True):
         """
         转录音频文件
         参数:
             audio_path: 音频文件路径
+            use_cache: 是否使用转录缓存，内容相同的音频不再重复请求API
         返回:
             转录结果字典
         """
@@ -59,6 +97,12 @@ class SiliconFlowAPI:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音频文件不存在: {audio_path}")
         
+        model = DEFAULT_TRANSCRIPTION_MODEL
+        if use_cache:
+            cached = self.transcription_cache.get(audio_path, model)
+            if cached is not None:
+                return cached
+        
         # 构建请求数据
         url = f"{self.base_url}/audio/transcriptions"
         
@@ -68,17 +112,20 @@ class SiliconFlowAPI:
         }
         
         data = {
-            "model": "FunAudioLLM/SenseVoiceSmall"
+            "model": model
         }
         
         try:
             # 发送请求，使用files和data参数
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            response = requests.post(url, headers=headers, files=files, data=data)
+            response = self.transport.post(url, headers=headers, files=files, data=data)
             
             # 检查响应
             if response.status_code == 200:
-                return response.json()
+                result = response.json()
+                if use_cache:
+                    self.transcription_cache.put(audio_path, model, result)
+                return result
             else:
                 error_message = f"转录失败: {response.status_code} - {response.text}"
                 raise Exception(error_message)
@@ -93,13 +140,16 @@ class SiliconFlowAPI:
             语音列表
         """
         url = f"{self.base_url}/audio/voice/list"
-        response = requests.get(url, headers=self.headers)
+        # 请求前的时间戳，请求期间新上传的音色不会在同步时被移除
+        requested_at = time.time()
+        response = self.transport.get(url, headers=self.headers)
         
         if response.status_code == 200:
             # 解析返回的JSON数据
             data = response.json()
             # API返回的数据结构包含一个"result"字段，里面才是语音列表
             if "result" in data and isinstance(data["result"], list):
+                self.voice_registry.sync_from(data, requested_at)
                 return data
             else:
                 print(f"返回的数据结构不符合预期: {data}")
@@ -122,52 +172,62 @@ class SiliconFlowAPI:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音频文件不存在: {audio_path}")
         
-        # 读取音频文件并转为base64
-        with open(audio_path, "rb") as audio_file:
-            audio_content = audio_file.read()
-            audio_base64 = base64.b64encode(audio_content).decode("utf-8")
-        
-        # 构建请求数据
-        url = f"{self.base_url}/uploads/audio/voice"
-        data = {
-            "customName": voice_name,
-            "audio": f'data:audio/mpeg;base64,{audio_base64}',
-            "model": "FunAudioLLM/CosyVoice2-0.5B"
-        }
-        
-        # 如果提供了文本，添加到请求中
-        if text:
-            data["text"] = text
-        
-        # 发送请求
-        response = requests.post(url, headers=self.headers, json=data)
+        # 边读取边编码，以流式请求体上传，内存占用不随文件大小增长
+        response = post_voice_upload(self.transport, self.api_key, audio_path, voice_name, text)
         
         # 检查响应
         if response.status_code == 200:
-            return response.json()
+            result = response.json()
+            uri = result.get("result", {}).get("uri") if isinstance(result.get("result"), dict) else None
+            if uri:
+                self.voice_registry.add(
+                    uri, voice_name, text=text,
+                    content_digest=self.transcription_cache.content_digest(audio_path)
+                )
+            return result
         else:
             error_message = f"上传语音失败: {response.status_code} - {response.text}"
             raise Exception(error_message)
     
-    def create_speech(self, text, voice, speed=1.0, sample_rate=44100, gain=0, output_format="mp3", stream=False, model="FunAudioLLM/CosyVoice2-0.5B"):
+    def delete_voice(self, voice_uri):
         """
-        生成语音
+        删除自定义语音
         参数:
-            text: 要转换为语音的文本
-            voice: 语音URI或名称
-            speed: 语音速度，默认1.0
-            sample_rate: 采样率，默认44100
-            output_format: 输出格式，默认mp3
-            stream: 是否使用流式模式，适合长文本
-            model: 语音模型，默认为 CosyVoice2-0.5B
-            gain: 增益，默认0, 范围-10 到 10
+            voice_uri: 要删除的语音URI
+        返回:
+            删除结果字典
+        """
+        url = f"{self.base_url}/audio/voice/deletions"
+        response = self.transport.post(url, headers=self.headers, json={"uri": voice_uri})
+        
+        if response.status_code == 200:
+            self.voice_registry.remove(voice_uri)
+            try:
+                return response.json()
+            except ValueError:
+                return {}
+        else:
+            error_message = f"删除语音失败: {response.status_code} - {response.text}"
+            raise Exception(error_message)
+    
+    def delete_voices(self, voice_uris, jobs=bulk_ops.DEFAULT_JOBS, on_progress=None):
+        """
+        并发删除多个自定义语音，删除成功的语音在一个事务中从本地音色注册表移除
+        参数:
+            voice_uris: 要删除的语音URI列表
+            jobs: 同时进行中的删除请求数
+            on_progress: 每完成一个后的回调 (已完成数, 总数, 该语音的结果)，在调用线程中执行
         返回:
-            二进制音频数据
+            与voice_uris顺序一致的结果列表，每项包含uri、ok、status_code、attempts、error
         """
-        # 构建请求URL和数据
+        return bulk_ops.delete_voices(
+            voice_uris, self.api_key, jobs=jobs, on_progress=on_progress,
+            registry=self.voice_registry, transport=self.transport
+        )
+    
+    def _post_speech(self, text, voice, speed, sample_rate, gain, output_format, stream, model):
+        """发送语音合成请求，返回状态正常的响应对象"""
         url = f"{self.base_url}/audio/speech"
-        if stream:
-            url += "/stream"
         
         # 使用input字段而不是text字段，符合最新API格式
         data = {
@@ -181,17 +241,64 @@ class SiliconFlowAPI:
             "stream": stream  # 添加stream参数
         }
         
-        # 发送请求
-        response = requests.post(url, headers=self.headers, json=data, stream=stream)
+        # 发送请求，流式模式下不读取响应体
+        response = self.transport.post(url, headers=self.headers, json=data, stream=stream)
         
         # 检查响应
-        if response.status_code == 200:
-            return response.content
-        else:
+        if response.status_code != 200:
             error_message = f"生成语音失败: {response.status_code} - {response.text}"
+            response.close()
             raise Exception(error_message)
+        return response
+    
+    def stream_speech(self, text, voice, speed=1.0, sample_rate=44100, gain=0, output_format="mp3", model="FunAudioLLM/CosyVoice2-0.5B", chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        以流式模式生成语音
+        参数同 create_speech
+        返回:
+            SpeechStream，迭代时逐块产出音频数据，并记录首字节时间等指标
+        """
+        started_at = time.perf_counter()
+        response = self._post_speech(text, voice, speed, sample_rate, gain, output_format, True, model)
+        return SpeechStream(response, started_at=started_at, chunk_size=chunk_size)
+    
+    def create_speech(self, text, voice, speed=1.0, sample_rate=44100, gain=0, output_format="mp3", stream=False, model="FunAudioLLM/CosyVoice2-0.5B", use_cache=True):
+        """
+        生成语音
+        参数:
+            text: 要转换为语音的文本
+            voice: 语音URI或名称
+            speed: 语音速度，默认1.0
+            sample_rate: 采样率，默认44100
+            output_format: 输出格式，默认mp3
+            stream: 是否使用流式模式，适合长文本
+            model: 语音模型，默认为 CosyVoice2-0.5B
+            gain: 增益，默认0, 范围-10 到 10
+            use_cache: 是否使用合成缓存，参数完全相同的请求直接返回缓存的音频
+        返回:
+            二进制音频数据(需要逐块处理时请使用 stream_speech)
+        """
+        cache_key = None
+        if use_cache:
+            cache_key = self.synthesis_cache.make_key(text, voice, model, speed, gain, sample_rate, output_format)
+            cached = self.synthesis_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        if stream:
+            audio_data = b"".join(self.stream_speech(
+                text, voice, speed=speed, sample_rate=sample_rate, gain=gain,
+                output_format=output_format, model=model
+            ))
+        else:
+            response = self._post_speech(text, voice, speed, sample_rate, gain, output_format, False, model)
+            audio_data = response.content
+        
+        if cache_key:
+            self.synthesis_cache.put(cache_key, audio_data, output_format)
+        return audio_data
     
-    def save_speech_to_file(self, text, voice_uri, output_path, speed=1.0, gain=0, sample_rate=44100, stream=False, model="FunAudioLLM/CosyVoice2-0.5B"):
+    def save_speech_to_file(self, text, voice_uri, output_path, speed=1.0, gain=0, sample_rate=44100, stream=False, model="FunAudioLLM/CosyVoice2-0.5B", on_chunk=None, use_cache=True):
         """
         生成语音并保存到文件
         参数:
@@ -201,10 +308,12 @@ class SiliconFlowAPI:
             speed: 语音速度，默认1.0
             gain: 增益，默认0, 范围-10 到 10
             sample_rate: 采样率，默认44100
-            stream: 是否使用流式模式，适合长文本
+            stream: 是否使用流式模式，适合长文本；音频数据到达后即写入文件
             model: 语音模型，默认为 CosyVoice2-0.5B
+            on_chunk: 流式模式下每写入一块后的回调 (已接收字节数, 指标字典)
+            use_cache: 是否使用合成缓存
         返回:
-            输出文件路径
+            输出文件路径；本次传输指标保存在 last_speech_metrics 中
         """
         # 确定输出格式
         output_format = os.path.splitext(output_path)[1].lstrip(".")
@@ -212,6 +321,40 @@ class SiliconFlowAPI:
             output_format = "mp3"
             output_path += ".mp3"
         
+        started_at = time.perf_counter()
+        cache_key = None
+        if use_cache:
+            # 命中缓存时直接写出文件，不再发起请求
+            cache_key = self.synthesis_cache.make_key(text, voice_uri, model, speed, gain, sample_rate, output_format)
+            if self.synthesis_cache.restore(cache_key, output_path):
+                elapsed = time.perf_counter() - started_at
+                size = os.path.getsize(output_path)
+                self.last_speech_metrics = {
+                    "ttfb": elapsed,
+                    "elapsed": elapsed,
+                    "bytes": size,
+                    "bytes_per_sec": size / elapsed if elapsed > 0 else 0.0,
+                    "cached": True,
+                }
+                if on_chunk:
+                    on_chunk(size, self.last_speech_metrics)
+                return output_path
+        
+        if stream:
+            # 边接收边写入文件
+            speech_stream = self.stream_speech(
+                text, voice_uri, speed=speed, sample_rate=sample_rate, gain=gain,
+                output_format=output_format, model=model
+            )
+            self.last_speech_metrics = speech_stream.save(output_path, on_chunk=on_chunk)
+            if cache_key:
+                try:
+                    self.synthesis_cache.put_file(cache_key, output_path, output_format)
+                except Exception as e:
+                    # 写入缓存失败不影响已保存的音频
+                    print(f"写入合成缓存失败: {str(e)}")
+            return output_path
+        
         # 生成语音
         audio_data = self.create_speech(
             text=text,
@@ -220,12 +363,195 @@ class SiliconFlowAPI:
             gain=gain,
             sample_rate=sample_rate,
             output_format=output_format,
-            stream=stream,
-            model=model
+            stream=False,
+            model=model,
+            use_cache=False
         )
         
         # 保存到文件
+        with open(output_path, "wb") as f:
+            f.write(audio_data)
+        if cache_key:
+            self.synthesis_cache.put(cache_key, audio_data, output_format)
+        
+        elapsed = time.perf_counter() - started_at
+        self.last_speech_metrics = {
+            "ttfb": None,
+            "elapsed": elapsed,
+            "bytes": len(audio_data),
+            "bytes_per_sec": len(audio_data) / elapsed if elapsed > 0 else 0.0,
+        }
+        return output_path
+    
+    def create_long_speech(self, text, voice, speed=1.0, sample_rate=44100, gain=0, output_format="wav", model="FunAudioLLM/CosyVoice2-0.5B", max_chars=DEFAULT_MAX_CHARS, jobs=DEFAULT_JOBS, crossfade_ms=0, on_progress=None):
+        """
+        长文本语音合成：按句子切分后并发合成各分段，再按采样拼接
+        参数:
+            text: 要转换为语音的文本
+            voice: 语音URI或名称
+            speed/sample_rate/gain/model: 同 create_speech，所有分段使用相同的参数
+            output_format: 输出格式，非wav格式需要安装pydub
+            max_chars: 每个分段的最大字符数
+            jobs: 并发合成的分段数
+            crossfade_ms: 接缝处交叉淡化的时长(毫秒)，0表示直接拼接
+            on_progress: 每完成一段后的回调 (已完成段数, 总段数)
+        返回:
+            (二进制音频数据, 分段数)
+        """
+        def synthesize(chunk):
+            # 分段以WAV格式合成，每段都会经过合成缓存
+            return self.create_speech(
+                chunk, voice, speed=speed, sample_rate=sample_rate, gain=gain,
+                output_format="wav", model=model
+            )
+        
+        return synthesize_long_text(
+            synthesize, text, output_format=output_format, max_chars=max_chars,
+            jobs=jobs, crossfade_ms=crossfade_ms, on_progress=on_progress
+        )
+    
+    def save_long_speech_to_file(self, text, voice_uri, output_path, speed=1.0, gain=0, sample_rate=44100, model="FunAudioLLM/CosyVoice2-0.5B", max_chars=DEFAULT_MAX_CHARS, jobs=DEFAULT_JOBS, crossfade_ms=0, on_progress=None):
+        """
+        长文本语音合成并保存到文件，参数同 create_long_speech，输出格式由文件扩展名决定
+        返回:
+            输出文件路径；本次合成的耗时、字节数和分段数保存在 last_speech_metrics 中
+        """
+        output_format = os.path.splitext(output_path)[1].lstrip(".")
+        if not output_format:
+            output_format = "wav"
+            output_path += ".wav"
+        
+        started_at = time.perf_counter()
+        audio_data, chunk_count = self.create_long_speech(
+            text, voice_uri, speed=speed, sample_rate=sample_rate, gain=gain,
+            output_format=output_format, model=model, max_chars=max_chars,
+            jobs=jobs, crossfade_ms=crossfade_ms, on_progress=on_progress
+        )
         with open(output_path, "wb") as f:
             f.write(audio_data)
         
+        elapsed = time.perf_counter() - started_at
+        self.last_speech_metrics = {
+            "ttfb": None,
+            "elapsed": elapsed,
+            "bytes": len(audio_data),
+            "bytes_per_sec": len(audio_data) / elapsed if elapsed > 0 else 0.0,
+            "chunks": chunk_count,
+        }
         return output_path
+
+
+class AsyncSiliconFlowAPI:
+    """
+    SiliconFlowAPI的异步版本
+    
+    每个接口都以协程形式提供，底层在线程池中复用同一个连接池发起请求。
+    每类接口(转录、合成、上传、列表、删除)都有独立的并发上限，
+    这样一个进程内可以同时保持几十个请求在途，而不会压垮某一个接口。
+    注意：同时在途的请求数超过连接池大小时，可调大 SILICONFLOW_POOL_SIZE。
+    """
+    
+    # 各接口默认的并发上限
+    DEFAULT_LIMITS = {
+        "transcribe": 8,
+        "speech": 8,
+        "upload": 4,
+        "voices": 2,
+        "delete": 8,
+    }
+    
+    def __init__(self, api=None, limits=None, max_workers=None):
+        """
+        初始化异步客户端
+        参数:
+            api: 复用的SiliconFlowAPI实例，默认新建
+            limits: 各接口的并发上限，如 {"transcribe": 16}
+            max_workers: 线程池大小，默认为各接口并发上限之和
+        """
+        self.api = api or SiliconFlowAPI()
+        self.limits = dict(self.DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or sum(self.limits.values()),
+            thread_name_prefix="siliconflow-api"
+        )
+        # 信号量与事件循环绑定，每个事件循环单独创建一组
+        self._semaphores = weakref.WeakKeyDictionary()
+    
+    def _semaphore(self, endpoint):
+        """获取当前事件循环中指定接口的信号量"""
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        if endpoint not in semaphores:
+            semaphores[endpoint] = asyncio.Semaphore(self.limits.get(endpoint, 1))
+        return semaphores[endpoint]
+    
+    async def _call(self, endpoint, func, *args, **kwargs):
+        """在接口并发上限内，于线程池中执行同步调用"""
+        async with self._semaphore(endpoint):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+    
+    async def transcribe_audio(self, audio_path, **kwargs):
+        """异步转录音频文件，参数同 SiliconFlowAPI.transcribe_audio"""
+        return await self._call("transcribe", self.api.transcribe_audio, audio_path, **kwargs)
+    
+    async def create_speech(self, text, voice, **kwargs):
+        """异步生成语音，参数同 SiliconFlowAPI.create_speech"""
+        return await self._call("speech", self.api.create_speech, text, voice, **kwargs)
+    
+    async def save_speech_to_file(self, text, voice_uri, output_path, **kwargs):
+        """异步生成语音并保存到文件，参数同 SiliconFlowAPI.save_speech_to_file"""
+        return await self._call("speech", self.api.save_speech_to_file, text, voice_uri, output_path, **kwargs)
+    
+    async def upload_voice(self, audio_path, voice_name, text=None):
+        """异步上传自定义语音，参数同 SiliconFlowAPI.upload_voice"""
+        return await self._call("upload", self.api.upload_voice, audio_path, voice_name, text)
+    
+    async def get_voices(self):
+        """异步获取语音列表"""
+        return await self._call("voices", self.api.get_voices)
+    
+    async def delete_voice(self, voice_uri):
+        """异步删除自定义语音"""
+        return await self._call("delete", self.api.delete_voice, voice_uri)
+    
+    async def map(self, method, items, on_complete=None):
+        """
+        对一组参数并发调用同一个接口
+        参数:
+            method: 本类的协程方法，如 self.transcribe_audio
+            items: 参数列表，元素为单个参数或参数元组
+            on_complete: 每完成一项时的回调 (index, result)，在事件循环线程中执行
+        返回:
+            与items顺序一致的结果列表，失败项为对应的异常对象
+        """
+        async def run(index, item):
+            args = item if isinstance(item, tuple) else (item,)
+            try:
+                result = await method(*args)
+            except Exception as e:
+                result = e
+            if on_complete:
+                on_complete(index, result)
+            return result
+        
+        return await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+    
+    async def transcribe_many(self, audio_paths, on_complete=None):
+        """并发转录多个音频文件，返回与输入顺序一致的结果(失败项为异常对象)"""
+        return await self.map(self.transcribe_audio, audio_paths, on_complete)
+    
+    def close(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -11,10 +11,8 @@ import streamlit as st
 import tempfile
 import time
 import sys
-import base64
 import re
 import json
-import requests
 import wave
 import math
 import shutil
@@ -39,6 +37,8 @@ from app.config import get_api_key
 from app.components.file_uploader import audio_uploader
 from app.components.audio_player import enhanced_audio_player
 from app.components.progress import MultiStageProgress
+from common.http_client import get_transport
+from common.upload_stream import post_voice_upload
 
 # 加载自定义CSS样式
 def load_css_file(css_file_path):
@@ -206,25 +206,9 @@ def transcribe_audio_chunk(api, chunk_path):
         return ""
 
 # 上传自定义语音样本
-def upload_custom_voice(api_key, audio_data, custom_name, text):
-    """上传自定义语音样本到SiliconFlow API"""
-    url = "https://api.siliconflow.cn/v1/uploads/audio/voice"
-    headers = {"Authorization": f"Bearer {api_key}"}
-    
-    # 将音频转换为Base64编码
-    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-    audio_data_uri = f'data:audio/mpeg;base64,{audio_base64}'
-    
-    # 准备请求数据
-    data = {
-        'audio': audio_data_uri,
-        'customName': custom_name,
-        'text': text,
-        'model': 'FunAudioLLM/CosyVoice2-0.5B'
-    }
-    
-    # 发送请求
-    response = requests.post(url, headers=headers, json=data)
+def upload_custom_voice(api_key, audio_path, custom_name, text):
+    """上传自定义语音样本到SiliconFlow API，音频以流式Base64请求体发送"""
+    response = post_voice_upload(get_transport(), api_key, audio_path, custom_name, text)
     
     if response.status_code == 200:
         try:
@@ -499,9 +483,9 @@ if processing_stage == "create" and create_button:
         progress.update_stage(0, 0.5)
         
         try:
-            # 读取选中的音频片段数据
-            with open(selected_audio_path, "rb") as audio_file:
-                audio_data = audio_file.read()
+            # 确认选中的音频片段存在，上传时再流式读取
+            if not os.path.exists(selected_audio_path):
+                raise FileNotFoundError(f"音频片段不存在: {selected_audio_path}")
             
             st.info("音频片段处理完成")
             progress.update_stage(0, 1.0)
@@ -516,7 +500,7 @@ if processing_stage == "create" and create_button:
                 st.error("缺少API密钥。请在.env文件中设置SILICONFLOW_API_KEY环境变量。")
             else:
                 # 上传自定义语音
-                upload_result = upload_custom_voice(api_key, audio_data, sanitized_name, reading_text)
+                upload_result = upload_custom_voice(api_key, selected_audio_path, sanitized_name, reading_text)
                 
                 # 检查是否有错误
                 if "error" in upload_result:
@@ -7,18 +7,41 @@
 这个脚本可以将音频文件转换为文本，使用 SiliconFlow API 实现语音识别功能。
 使用方法：
     python audio_transcription.py <音频文件路径>
-    python audio_transcription.py --dir <目录路径>
+    python audio_transcription.py --dir <目录路径> [--jobs 8] [--output-dir <输出目录>] [--recursive]
 
 注意：需要在.env文件中配置SILICONFLOW_API_KEY
 """
 
 import os
 import sys
-import requests
 import json
+import logging
+import time
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.http_client import get_transport
+from common.fs import atomic_write_text
+from common.file_scan import iter_files, AUDIO_EXTENSIONS
+from common.pipeline import Pipeline, Stage
+from common.transcription_cache import TranscriptionCache, DEFAULT_TRANSCRIPTION_MODEL
+
+logger = logging.getLogger(__name__)
+
+# 按音频内容哈希缓存转录结果，与Web界面共用
+_transcription_cache = None
+
+
+def get_transcription_cache():
+    """获取共享的转录缓存"""
+    global _transcription_cache
+    if _transcription_cache is None:
+        _transcription_cache = TranscriptionCache()
+    return _transcription_cache
+
 
 # 加载.env文件中的环境变量
 def load_api_key():
@@ -41,30 +64,22 @@ def load_api_key():
     return api_key
 
 
-def transcribe_audio(audio_file_path, token=None):
+def _post_transcription(file_name, file_content, token, model, verbose=True):
     """
-    将音频文件转换为文本
+    发送转录请求
     
     参数:
-        audio_file_path (str): 音频文件的路径
-        token (str, 可选): API令牌，如果不提供，将从.env文件获取
+        file_name (str): 上传时使用的文件名
+        file_content: 文件对象或二进制数据
+        token (str): API令牌
+        model (str): 转录模型
+        verbose (bool): 是否在标准输出打印处理进度，为False时进度和错误写入日志
         
     返回:
-        dict: API 返回的结果
+        dict: API 返回的结果，失败时返回None
     """
-    # 检查文件是否存在
-    if not os.path.exists(audio_file_path):
-        print(f"错误: 文件 '{audio_file_path}' 不存在")
-        return None
-    
-    # 获取 API 令牌
-    if token is None:
-        token = load_api_key()
-        if token is None:
-            return None
-    
     # API 端点
-    url = "https://api.siliconflow.cn/v1/audio/transcriptions"
+    url = "/audio/transcriptions"
     
     # 设置请求头
     headers = {
@@ -73,85 +88,231 @@ def transcribe_audio(audio_file_path, token=None):
     
     # 准备文件和模型数据
     files = {
-        "file": (os.path.basename(audio_file_path), open(audio_file_path, "rb"))
+        "file": (file_name, file_content)
     }
     data = {
-        "model": "FunAudioLLM/SenseVoiceSmall"
+        "model": model
     }
     
-    print(f"正在处理音频文件: {os.path.basename(audio_file_path)}")
+    report = print if verbose else logger.info
+    warn = print if verbose else logger.warning
+    report(f"正在处理音频文件: {file_name}")
     
     try:
-        # 发送 POST 请求
-        response = requests.post(url, headers=headers, files=files, data=data)
+        # 发送 POST 请求（复用共享连接池）
+        response = get_transport().post(url, headers=headers, files=files, data=data)
         
         # 检查响应状态
         if response.status_code == 200:
             result = response.json()
-            print("转换成功!")
+            report("转换成功!")
             return result
         else:
-            print(f"错误: API 请求失败，状态码: {response.status_code}")
-            print(f"响应内容: {response.text}")
+            warn(f"错误: API 请求失败，状态码: {response.status_code}")
+            warn(f"响应内容: {response.text}")
             return None
     
     except Exception as e:
-        print(f"错误: {str(e)}")
+        warn(f"错误: {str(e)}")
+        return None
+
+
+def transcribe_audio(audio_file_path, token=None, use_cache=True, verbose=True):
+    """
+    将音频文件转换为文本
+    
+    参数:
+        audio_file_path (str): 音频文件的路径
+        token (str, 可选): API令牌，如果不提供，将从.env文件获取
+        use_cache (bool, 可选): 是否使用转录缓存，内容相同的音频不再重复请求API
+        verbose (bool, 可选): 是否在标准输出打印处理进度；为False时写入日志(INFO)，
+                              供并发调用的场景使用，避免多个文件的输出交错
+        
+    返回:
+        dict: API 返回的结果
+    """
+    report = print if verbose else logger.info
+    # 检查文件是否存在
+    if not os.path.exists(audio_file_path):
+        report(f"错误: 文件 '{audio_file_path}' 不存在")
         return None
-    finally:
-        # 确保文件被关闭
-        files["file"][1].close()
+    
+    model = DEFAULT_TRANSCRIPTION_MODEL
+    if use_cache:
+        cached = get_transcription_cache().get(audio_file_path, model)
+        if cached is not None:
+            report(f"使用缓存的转录结果: {os.path.basename(audio_file_path)}")
+            return cached
+    
+    # 获取 API 令牌
+    if token is None:
+        token = load_api_key()
+        if token is None:
+            return None
+    
+    # 确保文件被关闭
+    with open(audio_file_path, "rb") as audio_file:
+        result = _post_transcription(os.path.basename(audio_file_path), audio_file, token, model, verbose)
+    if result and use_cache:
+        get_transcription_cache().put(audio_file_path, model, result)
+    return result
 
 
-def process_directory(directory_path, token=None, output_dir=None):
+def transcribe_audio_bytes(audio_data, file_name, token=None, use_cache=True, verbose=True):
+    """
+    将内存中的音频数据转换为文本，用于截取后不落盘的音频
+    
+    参数:
+        audio_data (bytes): 音频二进制数据
+        file_name (str): 上传时使用的文件名，服务端据此判断格式
+        token (str, 可选): API令牌，如果不提供，将从.env文件获取
+        use_cache (bool, 可选): 是否使用转录缓存
+        verbose (bool, 可选): 是否在标准输出打印处理进度，为False时写入日志(INFO)
+        
+    返回:
+        dict: API 返回的结果
+    """
+    report = print if verbose else logger.info
+    model = DEFAULT_TRANSCRIPTION_MODEL
+    if use_cache:
+        cached = get_transcription_cache().get_bytes(audio_data, model)
+        if cached is not None:
+            report(f"使用缓存的转录结果: {file_name}")
+            return cached
+    
+    # 获取 API 令牌
+    if token is None:
+        token = load_api_key()
+        if token is None:
+            return None
+    
+    result = _post_transcription(file_name, audio_data, token, model, verbose)
+    if result and use_cache:
+        get_transcription_cache().put_bytes(audio_data, model, result)
+    return result
+
+
+def transcribe_to_file(audio_file_path, output_file_path, token=None):
+    """
+    转录单个音频文件并原子地写入文本文件
+    
+    参数:
+        audio_file_path (str): 音频文件路径
+        output_file_path (str): 输出文本文件路径
+        token (str, 可选): API令牌
+        
+    返回:
+        dict: 包含 file、latency(秒)、ok、error 的处理结果
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        result = transcribe_audio(audio_file_path, token)
+        if result:
+            # 先写入临时文件再替换，中断时不会留下写了一半的文本
+            atomic_write_text(output_file_path, result.get('text', ''))
+            print(f"已保存转录结果到: {output_file_path}")
+        else:
+            error = "转录失败"
+    except Exception as e:
+        error = str(e)
+    
+    return {
+        "file": audio_file_path,
+        "latency": time.perf_counter() - started,
+        "ok": error is None,
+        "error": error
+    }
+
+
+def print_summary(results, wall_time):
+    """
+    打印批量转录汇总：每个文件的耗时与状态、失败列表和整体吞吐
+    
+    参数:
+        results (list): transcribe_to_file 返回的结果列表(按输入顺序)
+        wall_time (float): 总耗时(秒)
+    """
+    print("\n======= 转录汇总 =======")
+    for r in results:
+        status = "成功" if r["ok"] else f"失败: {r['error']}"
+        print(f"{r['latency']:8.2f}s  {os.path.basename(r['file'])}  {status}")
+    
+    failed = [r for r in results if not r["ok"]]
+    latencies = sorted(r["latency"] for r in results)
+    print(f"总文件数: {len(results)}，成功: {len(results) - len(failed)}，失败: {len(failed)}")
+    if latencies:
+        median = latencies[len(latencies) // 2]
+        print(f"单文件耗时: 中位数 {median:.2f}s，最长 {latencies[-1]:.2f}s")
+    if wall_time > 0:
+        print(f"总耗时: {wall_time:.2f}s，吞吐: {len(results) / wall_time:.2f} 文件/秒")
+    if failed:
+        print("失败的文件:")
+        for r in failed:
+            print(f"- {r['file']}: {r['error']}")
+
+
+def process_directory(directory_path, token=None, output_dir=None, jobs=1,
+                      recursive=False, include=None, exclude=None):
     """
     处理目录中的所有音频文件
     
     参数:
         directory_path (str): 音频文件目录的路径
         token (str, 可选): API令牌
-        output_dir (str, 可选): 输出目录，默认与输入目录相同
+        output_dir (str, 可选): 输出目录，默认与音频文件所在目录相同；递归时保留子目录结构
+        jobs (int, 可选): 并发转录的文件数，默认1（逐个处理）
+        recursive (bool, 可选): 是否递归处理子目录
+        include (list, 可选): 文件名或相对路径需要匹配的通配符
+        exclude (list, 可选): 要跳过的文件或目录的通配符
+        
+    返回:
+        list: 每个文件的处理结果(按发现顺序)
     """
-    # 如果没有指定输出目录，使用输入目录
-    if output_dir is None:
-        output_dir = directory_path
+    def output_path_for(audio_path):
+        # 创建输出文件名（使用与音频文件相同的名称，但扩展名为.txt）
+        relative_path = os.path.relpath(os.path.splitext(audio_path)[0] + '.txt', directory_path)
+        return os.path.join(output_dir or directory_path, relative_path)
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    def transcribe(audio_path):
+        # 原子写入时会自动创建输出子目录
+        return transcribe_to_file(audio_path, output_path_for(audio_path), token)
     
-    # 遍历目录中的所有文件
-    audio_extensions = ['.wav', '.mp3', '.ogg', '.flac', '.m4a']
-    for file_name in os.listdir(directory_path):
-        file_path = os.path.join(directory_path, file_name)
-        
-        # 检查文件是否是音频文件
-        file_ext = os.path.splitext(file_name)[1].lower()
-        if os.path.isfile(file_path) and file_ext in audio_extensions:
-            # 处理音频文件
-            result = transcribe_audio(file_path, token)
-            
-            if result:
-                # 获取转录文本
-                transcription = result.get('text', '')
-                
-                # 创建输出文件名（使用与音频文件相同的名称，但扩展名为.txt）
-                output_file_name = os.path.splitext(file_name)[0] + '.txt'
-                output_file_path = os.path.join(output_dir, output_file_name)
-                
-                # 保存转录文本到文件
-                with open(output_file_path, 'w', encoding='utf-8') as f:
-                    f.write(transcription)
-                
-                print(f"已保存转录结果到: {output_file_path}")
+    print(f"开始转录目录: {directory_path}，并发数: {jobs}" + ("，递归子目录" if recursive else ""))
+    started = time.perf_counter()
+    
+    # 边遍历目录边转录，结果按发现顺序返回
+    audio_files = iter_files(directory_path, AUDIO_EXTENSIONS, include=include,
+                             exclude=exclude, recursive=recursive)
+    pipeline = Pipeline([Stage("transcribe", transcribe, workers=jobs)])
+    results = [r["value"] for r in pipeline.run(audio_files)]
+    
+    if not results:
+        print(f"目录中没有找到音频文件: {directory_path}")
+        return []
+    
+    print_summary(results, time.perf_counter() - started)
+    return results
 
 
 def main():
     """主函数"""
-    # 检查参数
-    if len(sys.argv) < 2:
-        print("用法:")
-        print("  处理单个文件: python audio_transcription.py <音频文件路径>")
-        print("  处理整个目录: python audio_transcription.py --dir <目录路径>")
+    parser = argparse.ArgumentParser(description="语音转文本工具")
+    parser.add_argument("file", nargs="?", help="要转录的音频文件路径")
+    parser.add_argument("-d", "--dir", help="批量转录的音频目录路径")
+    parser.add_argument("-o", "--output-dir", help="转录文本的输出目录 (默认: 与音频目录相同)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="目录模式下并发转录的文件数 (默认: 1)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="目录模式下递归处理子目录")
+    parser.add_argument("--include", action="append", metavar="PATTERN",
+                        help="只转录文件名或相对路径匹配该通配符的文件，可多次指定")
+    parser.add_argument("--exclude", action="append", metavar="PATTERN",
+                        help="跳过文件名或相对路径匹配该通配符的文件和目录，可多次指定")
+    args = parser.parse_args()
+    
+    if not args.file and not args.dir:
+        parser.print_help()
         return
     
     # 预先加载API密钥
@@ -160,16 +321,13 @@ def main():
         return
     
     # 处理命令行参数
-    if sys.argv[1] == "--dir":
-        if len(sys.argv) < 3:
-            print("错误: 使用 --dir 选项时必须提供目录路径")
-            return
-        
-        directory_path = sys.argv[2]
-        process_directory(directory_path, token)
+    if args.dir:
+        results = process_directory(args.dir, token, output_dir=args.output_dir, jobs=args.jobs,
+                                    recursive=args.recursive, include=args.include, exclude=args.exclude)
+        if any(not r["ok"] for r in results):
+            sys.exit(1)
     else:
-        audio_file_path = sys.argv[1]
-        result = transcribe_audio(audio_file_path, token)
+        result = transcribe_audio(args.file, token)
         if result:
             print("转录结果:")
             print(result.get('text', ''))
@@ -4,110 +4,411 @@
 """
 批量生成语音样本工具
 使用指定的音色列表文件，为每个音色生成统一文本的语音样本
+
+使用 --jobs 并发生成多个音色的样本，单个音色失败时按指数退避重试
+
+增量模式：输出目录旁的 <输出目录>.manifest.json 按输出文件记录合成参数的哈希
+(音色URI、文本、模型、采样率、语速、增益、格式)，重新运行时只生成新增或参数有变化的样本，
+并删除已从音色列表中移除的音色的样本
+
+矩阵模式：--spec 指定任务描述文件(JSON/YAML，格式见 common/sample_plan.py)，
+一次生成 文本模板 × 音色 × 语速/增益/采样率 的全部组合；参数相同的单元只合成一次，
+已在合成缓存中的单元直接写出，其余单元并发生成并显示进度和预计剩余时间
 """
 
 import os
 import sys
 import json
+import time
 import argparse
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
 # 导入语音生成模块
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from voice_create import generate_speech
+from common.events import percentile
+from common.fs import atomic_write_bytes, atomic_write_text
+from common.journal import ResultJournal, journal_path_for, load_results
+from common.pipeline import Pipeline, Stage
+from common.sample_plan import (load_spec, load_spec_voices, expand_spec, dedupe_jobs, make_job,
+                                safe_path_component)
+from common.speech_stream import summarize_metrics, format_metrics_summary
+from common.synthesis_cache import get_synthesis_cache
+
+# 默认并发数和单个音色的重试次数
+DEFAULT_JOBS = 4
+DEFAULT_RETRIES = 2
+
+
+def build_jobs(voices_data, text_template, output_dir, model, response_format, sample_rate, speed, gain):
+    """
+    根据音色列表生成样本任务
+
+    参数:
+        voices_data (dict): 音色列表
+        text_template (str): 文本模板，{audio_name_raw} 会被替换为音色名称
+        output_dir (str): 输出目录
+        model/response_format/sample_rate/speed/gain: 合成参数
+
+    返回:
+        tuple: (任务列表, 信息不完整或名称无效而跳过的音色名称列表)
+    """
+    jobs = []
+    skipped = []
+    for name, voice_info in voices_data.items():
+        audio_name_raw = voice_info.get("audio_name_raw")
+        uri = voice_info.get("uri")
+
+        if not audio_name_raw or not uri:
+            skipped.append(name)
+            continue
+
+        # 替换模板中的变量
+        text = text_template.replace("{audio_name_raw}", audio_name_raw)
+        try:
+            file_name = f"{safe_path_component(audio_name_raw)}.{response_format}"
+        except ValueError:
+            skipped.append(name)
+            continue
+        jobs.append(make_job(audio_name_raw, uri, text, output_dir, file_name,
+                             model, response_format, sample_rate, speed, gain))
+    return jobs, skipped
+
+
+def sample_manifest_path(output_dir):
+    """输出目录对应的增量清单路径：<输出目录>.manifest.json"""
+    return os.path.normpath(os.path.abspath(output_dir)) + ".manifest.json"
+
+
+def plan_incremental(jobs, manifest):
+    """
+    对比增量清单，找出需要生成的任务和需要删除的旧样本
+
+    参数:
+        jobs (list): 任务列表
+        manifest (dict): 输出文件(相对输出目录) -> 清单记录
+
+    返回:
+        tuple: (需要生成的任务, 参数未变化的任务, 已移除音色的输出文件名列表)
+    """
+    pending = []
+    unchanged = []
+    current = set()
+    for job in jobs:
+        current.add(job["file"])
+        entry = manifest.get(job["file"])
+        if entry and entry.get("params_hash") == job["params_hash"] and os.path.exists(job["output_file"]):
+            unchanged.append(job)
+        else:
+            pending.append(job)
+    # 只删除清单中记录过的文件，输出目录中手动放入的文件不受影响
+    stale = sorted(file_name for file_name in manifest if file_name not in current)
+    return pending, unchanged, stale
+
+
+def prune_samples(stale, output_dir):
+    """删除已移除音色的样本文件，返回实际删除的文件数"""
+    removed = 0
+    root = os.path.realpath(output_dir)
+    for file_name in stale:
+        path = os.path.join(output_dir, file_name)
+        # 清单可能被手动修改，只删除输出目录内的文件
+        if not os.path.realpath(path).startswith(root + os.sep):
+            print(f"⚠️ 跳过输出目录之外的文件: {path}")
+            continue
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+            print(f"🗑️ 删除已移除音色的样本: {path}")
+    return removed
+
+
+def save_sample_manifest(manifest_path, stale):
+    """把本次生成的记录合并进增量清单，并去掉已删除样本的记录"""
+    manifest = load_results(manifest_path, key="file")
+    for file_name in stale:
+        manifest.pop(file_name, None)
+    atomic_write_text(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=4))
+    journal_path = journal_path_for(manifest_path)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+
+def copy_sample(source, target):
+    """把已生成的样本原子地复制到参数相同的其他单元"""
+    with open(source, "rb") as f:
+        atomic_write_bytes(target, f.read())
+
+
+def format_eta(seconds):
+    """把剩余秒数格式化为 时:分:秒"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def synthesize_sample(job, retries=DEFAULT_RETRIES, backoff=1.0, use_cache=True):
+    """
+    生成单个样本，失败时按指数退避重试
+
+    参数:
+        job (dict): make_job 生成的任务
+        retries (int): 失败后的重试次数
+        backoff (float): 第一次重试前的等待秒数，之后每次翻倍
+        use_cache (bool): 是否使用合成缓存
+
+    返回:
+        dict: attempts(尝试次数)、elapsed(最后一次尝试的耗时，秒)、metrics(generate_speech 返回的传输指标)
+    """
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        # generate_speech 流式写入临时文件后原子替换，失败或中断时不会留下半截音频
+        metrics = generate_speech(text=job["text"], voice_uri=job["uri"], output_file=job["output_file"],
+                                  use_cache=use_cache, **job["options"])
+        if metrics:
+            return {"attempts": attempt + 1, "elapsed": time.perf_counter() - started, "metrics": metrics}
+        if attempt < retries:
+            delay = backoff * (2 ** attempt)
+            print(f"⚠️ 音色 {job['name']} 生成失败，{delay:.1f} 秒后重试 ({attempt + 1}/{retries})")
+            time.sleep(delay)
+    raise RuntimeError(f"重试 {retries} 次后仍然失败")
+
+
+def print_summary(results, skipped, wall_time, output_dir, use_cache=True, unchanged=0, pruned=0,
+                  cached=0, copied=0):
+    """打印处理结果、失败列表和吞吐统计"""
+    succeeded = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    total_voices = len(results) + len(skipped) + unchanged + cached + copied
+    latencies = sorted(r["value"]["elapsed"] for r in succeeded)
+    retried = sum(r["value"]["attempts"] - 1 for r in succeeded)
+
+    print("\n===== 处理完成 =====")
+    print(f"总计样本: {total_voices}")
+    if unchanged:
+        print(f"参数未变化而跳过: {unchanged}")
+    if cached:
+        print(f"从合成缓存写出: {cached}")
+    if copied:
+        print(f"与其他单元参数相同而复制: {copied}")
+    if pruned:
+        print(f"删除已移除音色的样本: {pruned}")
+    print(f"成功: {len(succeeded)}")
+    print(f"失败: {len(failed) + len(skipped)}")
+    if total_voices:
+        print(f"成功率: {(len(succeeded) + unchanged + cached + copied)/total_voices*100:.2f}%")
+    print(f"总耗时: {wall_time:.2f} 秒，吞吐: {len(succeeded) / wall_time if wall_time else 0:.2f} 个/秒")
+    if latencies:
+        print(f"单个样本耗时: p50 {percentile(latencies, 0.50):.2f} 秒，"
+              f"p95 {percentile(latencies, 0.95):.2f} 秒，最长 {latencies[-1]:.2f} 秒")
+    if retried:
+        print(f"重试后成功的额外尝试次数: {retried}")
+    transfers = [r["value"]["metrics"] for r in succeeded if isinstance(r["value"].get("metrics"), dict)]
+    if transfers:
+        print(f"传输: {format_metrics_summary(summarize_metrics(transfers))}")
+    if use_cache:
+        cache_stats = get_synthesis_cache().stats()
+        print(f"合成缓存: 命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}，命中率 {cache_stats['hit_rate']*100:.1f}%")
+    if skipped:
+        print("音色信息不完整而跳过:")
+        for name in skipped:
+            print(f"- {name}")
+    if failed:
+        print("生成失败的样本:")
+        for r in failed:
+            print(f"- {r['item']['file']}: {r['error']}")
+    print(f"所有生成的音频文件已保存到: {output_dir}")
+
+
+def run_jobs(jobs, skipped, output_dir, jobs_count=DEFAULT_JOBS, retries=DEFAULT_RETRIES,
+             use_cache=True, full=False, prune=True):
+    """
+    增量、去重后并发生成样本
+
+    参数:
+        jobs (list): make_job 生成的任务列表
+        skipped (list): 信息不完整而跳过的音色名称
+        output_dir (str): 输出目录
+        jobs_count (int): 同时进行中的请求数
+        retries (int): 单个样本失败后的重试次数
+        use_cache (bool): 是否使用合成缓存
+        full (bool): 是否忽略增量清单
+        prune (bool): 是否删除已移除音色的样本
+
+    返回:
+        bool: 是否全部成功
+    """
+    # 确保输出目录存在
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest_path = sample_manifest_path(output_dir)
+    manifest = {} if full else load_results(manifest_path, key="file")
+    pending, unchanged, stale = plan_incremental(jobs, manifest)
+    if not prune:
+        stale = []
+    pruned = prune_samples(stale, output_dir)
+
+    # 参数相同的单元只合成一次；已在合成缓存中的单元直接写出，不占用并发名额
+    unique, duplicates = dedupe_jobs(pending)
+    cache = get_synthesis_cache() if use_cache else None
+    scheduled = []
+    from_cache = []
+    for job in unique:
+        (from_cache if cache and cache.contains(job["params_hash"]) else scheduled).append(job)
+    copies = sum(len(group) for group in duplicates.values())
+
+    print(f"共 {len(jobs)} 个样本：参数未变化而跳过 {len(unchanged)} 个，从合成缓存写出 {len(from_cache)} 个，"
+          f"与其他单元参数相同 {copies} 个，需要请求API {len(scheduled)} 个，并发数: {jobs_count}")
+
+    # 生成成功的样本逐条追加到清单日志，中断后重新运行不会重复生成
+    manifest_journal = ResultJournal(journal_path_for(manifest_path))
+
+    copy_failed = []
+
+    def record(job):
+        """记录生成成功的样本，并复制给参数相同的其他单元，返回复制成功的数量"""
+        copied = 0
+        for target in [job] + duplicates.get(job["params_hash"], []):
+            if target is not job:
+                try:
+                    copy_sample(job["output_file"], target["output_file"])
+                except OSError as e:
+                    copy_failed.append(f"{target['file']}: {e}")
+                    continue
+                copied += 1
+            manifest_journal.append({
+                "file": target["file"],
+                "name": target["name"],
+                "uri": target["uri"],
+                "params_hash": target["params_hash"],
+            })
+        return copied
+
+    # 完成计数在多个工作线程中更新
+    progress = {"done": 0, "copied": 0}
+    progress_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def on_item_done(result):
+        job = result["item"]
+        copied = record(job) if result["ok"] else 0
+        with progress_lock:
+            progress["copied"] += copied
+            progress["done"] += 1
+            done = progress["done"]
+        elapsed = time.perf_counter() - started
+        eta = format_eta(elapsed / done * (len(scheduled) - done))
+        if result["ok"]:
+            print(f"[{done}/{len(scheduled)}，预计剩余 {eta}] ✅ 成功生成: {job['output_file']}")
+        else:
+            print(f"[{done}/{len(scheduled)}，预计剩余 {eta}] ❌ 生成失败: {job['file']} ({result['error']})")
+
+    # 单阶段流水线：工作线程数即同时进行中的请求数，有界队列限制待处理的任务数
+    pipeline = Pipeline(
+        [Stage("synthesize", lambda job: synthesize_sample(job, retries=retries, use_cache=use_cache),
+               workers=jobs_count)],
+        on_item_done=on_item_done
+    )
+    cached = 0
+    try:
+        for job in from_cache:
+            try:
+                restored = cache.restore(job["params_hash"], job["output_file"])
+            except OSError as e:
+                copy_failed.append(f"{job['file']}: {e}")
+                continue
+            if not restored:
+                # 检查之后已被淘汰，改为请求API
+                scheduled.append(job)
+                continue
+            cached += 1
+            progress["copied"] += record(job)
+        results = pipeline.run(scheduled)
+    finally:
+        manifest_journal.close()
+        save_sample_manifest(manifest_path, stale)
+
+    for message in copy_failed:
+        print(f"❌ 写出样本失败: {message}")
+
+    # 输出处理结果
+    print_summary(results, skipped, time.perf_counter() - started, output_dir, use_cache=use_cache,
+                  unchanged=len(unchanged), pruned=pruned, cached=cached, copied=progress["copied"])
+    return all(r["ok"] for r in results) and not copy_failed
+
 
 def main():
     """主函数"""
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="批量生成语音样本")
     parser.add_argument("-i", "--input", default="/Users/pis/workspace/AI/ai-scripts/siliconflow/TTS/raw_text_files/CN.json",
-                        help="音色列表JSON文件路径")
+                        help="音色列表JSON文件路径 (批量处理进行中时会同时读取对应的.jsonl结果日志)")
     parser.add_argument("-o", "--output_dir", default="/Users/pis/workspace/AI/ai-scripts/siliconflow/TTS/audio_sample/CN-2",
-                        help="输出目录路径")
-    parser.add_argument("-f", "--format", default="wav", choices=["mp3", "wav"], 
+                        help="输出目录路径 (矩阵模式下任务描述中的 output_dir 优先)")
+    parser.add_argument("--spec", help="矩阵模式：任务描述文件路径(JSON，或安装PyYAML后使用YAML)")
+    parser.add_argument("-f", "--format", default="wav", choices=["mp3", "wav"],
                         help="输出音频格式 (默认: wav)")
     parser.add_argument("--model", default="FunAudioLLM/CosyVoice2-0.5B",
                         help="使用的语音模型")
-    parser.add_argument("-r", "--rate", type=int, default=44100, 
+    parser.add_argument("-r", "--rate", type=int, default=44100,
                         help="采样率 (默认: 44100)")
-    parser.add_argument("-s", "--speed", type=float, default=1.0, 
+    parser.add_argument("-s", "--speed", type=float, default=1.0,
                         help="语速 (默认: 1.0)")
     parser.add_argument("-g", "--gain", type=int, default=-2,  # 降低爆音，默认-2
                         help="增益 (默认: -2)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不使用合成缓存，总是重新请求API")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"同时进行中的合成请求数 (默认: {DEFAULT_JOBS})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"单个样本生成失败后的重试次数 (默认: {DEFAULT_RETRIES})")
+    parser.add_argument("--full", action="store_true",
+                        help="忽略增量清单，重新生成全部样本")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="不删除已从音色列表中移除的音色的样本")
     args = parser.parse_args()
 
-    # 检查输入文件是否存在
-    if not os.path.exists(args.input):
-        print(f"错误: 音色列表文件不存在: {args.input}")
-        return False
+    if args.spec:
+        # 矩阵模式：模板、音色、参数组合都来自任务描述文件
+        try:
+            spec = load_spec(args.spec)
+            spec_dir = os.path.dirname(os.path.abspath(args.spec))
+            voices, skipped = load_spec_voices(spec, spec_dir)
+            output_dir = os.path.join(spec_dir, spec["output_dir"]) if spec.get("output_dir") else args.output_dir
+            jobs = expand_spec(spec, voices, output_dir)
+        except Exception as e:
+            print(f"错误: 读取任务描述失败: {str(e)}")
+            return False
+        print(f"矩阵模式: {len(voices)} 个音色，展开为 {len(jobs)} 个样本")
+    else:
+        # 检查输入文件是否存在(批量处理尚未结束时可能只有.jsonl结果日志)
+        if not os.path.exists(args.input) and not os.path.exists(journal_path_for(args.input)):
+            print(f"错误: 音色列表文件不存在: {args.input}")
+            return False
 
-    # 确保输出目录存在
-    os.makedirs(args.output_dir, exist_ok=True)
-
-    # 加载音色列表
-    try:
-        with open(args.input, 'r', encoding='utf-8') as f:
-            voices_data = json.load(f)
-    except Exception as e:
-        print(f"错误: 读取音色列表文件失败: {str(e)}")
-        return False
+        # 加载音色列表，合并尚未整理进JSON的结果日志
+        try:
+            voices_data = load_results(args.input)
+        except Exception as e:
+            print(f"错误: 读取音色列表文件失败: {str(e)}")
+            return False
 
-    # 统一的文本模板
-    text_template = "hello~hello~[breath]听得到吗？[breath]きこえていますか？初次见面，请多关照呀！这里是<strong>{audio_name_raw}</strong>,是你们最甜甜甜的小草莓"
-    # text_template = "英语<|endofprompt|>Hey everyone~ Hey![breath]Can you hear me clearly?[breath]Lovely to meet you all! I'm your<strong>Strawberry-chan</strong>,favorite bilingual sweetheart ever!"
+        # 统一的文本模板
+        text_template = "hello~hello~[breath]听得到吗？[breath]きこえていますか？初次见面，请多关照呀！这里是<strong>{audio_name_raw}</strong>,是你们最甜甜甜的小草莓"
+        # text_template = "英语<|endofprompt|>Hey everyone~ Hey![breath]Can you hear me clearly?[breath]Lovely to meet you all! I'm your<strong>Strawberry-chan</strong>,favorite bilingual sweetheart ever!"
 
-    # 计数器
-    total_voices = len(voices_data)
-    success_count = 0
-    failed_count = 0
+        output_dir = args.output_dir
+        jobs, skipped = build_jobs(voices_data, text_template, output_dir, args.model, args.format,
+                                   args.rate, args.speed, args.gain)
+        print(f"开始处理总计 {len(voices_data)} 个音色...")
 
-    print(f"开始处理总计 {total_voices} 个音色...")
+    for name in skipped:
+        print(f"警告: 音色信息不完整，跳过: {name}")
 
-    # 遍历音色列表，生成语音样本
-    for name, voice_info in voices_data.items():
-        audio_name_raw = voice_info.get("audio_name_raw")
-        uri = voice_info.get("uri")
-        
-        if not audio_name_raw or not uri:
-            print(f"警告: 音色信息不完整，跳过: {name}")
-            failed_count += 1
-            continue
-        
-        # 替换模板中的变量
-        text = text_template.replace("{audio_name_raw}", audio_name_raw)
-        
-        # 设置输出文件路径
-        output_file = os.path.join(args.output_dir, f"{audio_name_raw}.{args.format}")
-        
-        print(f"\n[{success_count + failed_count + 1}/{total_voices}] 正在处理音色: {audio_name_raw}")
-        
-        # 生成语音文件
-        success = generate_speech(
-            text=text,
-            voice_uri=uri,
-            output_file=output_file,
-            model=args.model,
-            response_format=args.format,
-            sample_rate=args.rate,
-            speed=args.speed,
-            gain=args.gain
-        )
-        
-        if success:
-            success_count += 1
-            print(f"✅ 成功生成: {output_file}")
-        else:
-            failed_count += 1
-            print(f"❌ 生成失败: {audio_name_raw}")
-    
-    # 输出处理结果
-    print("\n===== 处理完成 =====")
-    print(f"总计音色: {total_voices}")
-    print(f"成功: {success_count}")
-    print(f"失败: {failed_count}")
-    print(f"成功率: {success_count/total_voices*100:.2f}%")
-    print(f"所有生成的音频文件已保存到: {args.output_dir}")
+    return run_jobs(jobs, skipped, output_dir, jobs_count=args.jobs, retries=args.retries,
+                    use_cache=not args.no_cache, full=args.full, prune=not args.no_prune)
 
 if __name__ == "__main__":
-    main()
+    # 有样本失败时以非零状态退出，便于脚本和CI判断
+    sys.exit(0 if main() else 1)
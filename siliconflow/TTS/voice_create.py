@@ -4,19 +4,32 @@
 """
 SiliconFlow TTS 语音生成工具
 使用SiliconFlow API将文本转换为语音并保存为音频文件
+
+响应以数据块流式写入同目录的临时文件，完成后原子地替换输出文件，
+并输出首字节时间(TTFB)、总耗时和下载速度
 """
 
 import os
 import sys
 import json
+import time
+import tempfile
 import argparse
-import requests
-from pathlib import Path
 from dotenv import load_dotenv
 
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.fs import atomic_write_bytes
+from common.http_client import get_transport
+from common.speech_stream import SpeechStream, summarize_metrics, format_metrics_summary
+from common.synthesis_cache import get_synthesis_cache
+from common.voice_registry import get_voice_registry
+from common.longform import (split_text, synthesize_chunks, join_wav, encode_audio,
+                             DEFAULT_MAX_CHARS, DEFAULT_JOBS)
+
 
 def generate_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-0.5B", 
-                    response_format="mp3", sample_rate=32000, speed=1.0, gain=-2):
+                    response_format="mp3", sample_rate=32000, speed=1.0, gain=-2, use_cache=True):
     """
     使用SiliconFlow API生成语音并保存到文件
     
@@ -29,10 +42,26 @@ def generate_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-
         sample_rate (int): 采样率，默认为32000
         speed (float): 语速，默认为1.0
         gain (int): 增益，默认为-2 , 范围-10 到 10
+        use_cache (bool): 是否使用合成缓存，参数完全相同的请求直接复用缓存的音频
     
     返回:
-        bool: 成功返回True，失败返回False
+        dict|bool: 成功时返回传输指标(非空字典，可直接作为真值判断)：
+                   ttfb(首字节时间，秒)、elapsed(总耗时，秒)、bytes(字节数)、bytes_per_sec、cached(是否来自缓存)；
+                   失败返回False
     """
+    # 相同参数的合成结果直接从缓存写出，不需要API密钥和网络请求
+    cache_key = None
+    if use_cache:
+        started = time.perf_counter()
+        cache = get_synthesis_cache()
+        cache_key = cache.make_key(text, voice_uri, model, speed, gain, sample_rate, response_format)
+        if cache.restore(cache_key, output_file):
+            print(f"使用缓存的语音，已保存到: {output_file}")
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(output_file)
+            return {"ttfb": None, "elapsed": elapsed, "bytes": size,
+                    "bytes_per_sec": size / elapsed if elapsed > 0 else 0.0, "cached": True}
+    
     # 加载API密钥
     load_dotenv()
     api_key = os.getenv("SILICONFLOW_API_KEY")
@@ -41,7 +70,7 @@ def generate_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-
         return False
     
     # 准备请求数据
-    url = "https://api.siliconflow.cn/v1/audio/speech"
+    url = "/audio/speech"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -65,16 +94,24 @@ def generate_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-
     print(f"使用语音: {voice_uri}")
     
     try:
-        # 发送请求
-        response = requests.post(url, headers=headers, json=payload)
+        # 发送请求，响应体按数据块读取，不在内存中缓冲整个音频
+        started = time.perf_counter()
+        response = get_transport().post(url, headers=headers, json=payload, stream=True)
         
         # 检查响应状态
         if response.status_code == 200:
-            # 保存音频文件
-            with open(output_file, "wb") as f:
-                f.write(response.content)
+            # 先写入临时文件，接收完整后原子地替换，并发生成或中断时不会留下半截音频
+            metrics = SpeechStream(response, started_at=started).save(output_file, atomic=True)
+            if cache_key:
+                try:
+                    get_synthesis_cache().put_file(cache_key, output_file, response_format)
+                except Exception as e:
+                    # 写入缓存失败不影响已保存的音频
+                    print(f"警告: 写入合成缓存失败: {str(e)}")
             print(f"语音生成成功，已保存到: {output_file}")
-            return True
+            print(f"首字节 {metrics['ttfb'] or 0:.2f} 秒，总耗时 {metrics['elapsed']:.2f} 秒，"
+                  f"{metrics['bytes'] / 1024:.1f} KB，{metrics['bytes_per_sec'] / 1024:.1f} KB/秒")
+            return dict(metrics, cached=False)
         else:
             try:
                 error_details = response.json()
@@ -83,6 +120,8 @@ def generate_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-
             except:
                 print(f"错误: API请求失败 (状态码: {response.status_code})")
                 print(f"响应内容: {response.text}")
+            finally:
+                response.close()
             return False
             
     except Exception as e:
@@ -90,30 +129,86 @@ def generate_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-
         return False
 
 
-def list_voices():
-    """获取并显示可用的语音列表"""
-    voices_file = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / "voices.json"
+def generate_long_speech(text, voice_uri, output_file, model="FunAudioLLM/CosyVoice2-0.5B",
+                         response_format="mp3", sample_rate=32000, speed=1.0, gain=-2,
+                         max_chars=DEFAULT_MAX_CHARS, jobs=DEFAULT_JOBS, crossfade_ms=0, use_cache=True):
+    """
+    长文本模式：按句子切分后并发合成各分段，再按采样拼接为一个文件
     
-    if not voices_file.exists():
-        print(f"错误: 未找到语音列表文件 {voices_file}")
-        print("请先运行 voice_fetch.py 获取语音列表")
-        return []
+    参数:
+        text/voice_uri/output_file/model/sample_rate/speed/gain/use_cache: 同 generate_speech
+        response_format (str): 输出音频格式，分段统一以wav合成，mp3输出需要安装pydub
+        max_chars (int): 每个分段的最大字符数
+        jobs (int): 并发合成的分段数
+        crossfade_ms (int): 接缝处交叉淡化的时长(毫秒)，0表示直接拼接
     
-    try:
-        with open(voices_file, "r", encoding="utf-8") as f:
-            voices = json.load(f)
+    返回:
+        bool: 成功返回True，失败返回False
+    """
+    chunks = split_text(text, max_chars)
+    if not chunks:
+        print("错误: 文本为空")
+        return False
+    
+    print(f"长文本模式: 共 {len(chunks)} 个分段，并发数: {jobs}")
+    started = time.perf_counter()
+    
+    # 各分段的传输指标，结束时汇总
+    chunk_metrics = []
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def synthesize(indexed_chunk):
+            index, chunk = indexed_chunk
+            chunk_file = os.path.join(temp_dir, f"{index:04d}.wav")
+            metrics = generate_speech(chunk, voice_uri, chunk_file, model=model, response_format="wav",
+                                      sample_rate=sample_rate, speed=speed, gain=gain, use_cache=use_cache)
+            if not metrics:
+                raise RuntimeError(f"第 {index + 1} 个分段合成失败")
+            chunk_metrics.append(metrics)
+            with open(chunk_file, "rb") as f:
+                return f.read()
         
-        print("可用语音列表:")
-        for i, voice in enumerate(voices, 1):
-            print(f"{i}. 名称: {voice.get('name', '未知')}")
-            print(f"   URI: {voice.get('uri', '未知')}")
-            print(f"   描述: {voice.get('description', '无描述')}")
-            print()
+        def on_progress(done, total):
+            print(f"分段进度: {done}/{total}")
         
-        return voices
-    except Exception as e:
-        print(f"错误: 读取语音列表文件时发生异常: {str(e)}")
+        try:
+            wav_chunks = synthesize_chunks(synthesize, list(enumerate(chunks)), jobs=jobs, on_progress=on_progress)
+            audio_data = encode_audio(join_wav(wav_chunks, crossfade_ms), response_format)
+        except Exception as e:
+            print(f"错误: 长文本合成失败: {str(e)}")
+            return False
+    
+    atomic_write_bytes(output_file, audio_data)
+    print(f"长文本语音生成成功，已保存到: {output_file} (耗时 {time.perf_counter() - started:.2f} 秒)")
+    print(f"分段传输: {format_metrics_summary(summarize_metrics(chunk_metrics))}")
+    return True
+
+
+def list_voices():
+    """获取并显示可用的语音列表(本地音色注册表，超过同步间隔时先与远程列表同步)"""
+    registry = get_voice_registry()
+    load_dotenv()
+    api_key = os.getenv("SILICONFLOW_API_KEY")
+    if api_key:
+        try:
+            registry.sync(api_key)
+        except Exception as e:
+            print(f"警告: 同步音色列表失败，使用本地记录: {str(e)}")
+    
+    voices = registry.all()
+    if not voices:
+        print("错误: 本地音色注册表为空")
+        print("请先运行 voice_fetch.py 获取语音列表")
         return []
+    
+    print("可用语音列表:")
+    for i, voice in enumerate(voices, 1):
+        print(f"{i}. 名称: {voice.get('custom_name') or '未知'}")
+        print(f"   URI: {voice.get('uri')}")
+        print(f"   模型: {voice.get('model') or '未知'}")
+        print()
+    
+    return voices
 
 
 def main():
@@ -135,6 +230,16 @@ def main():
                         help="增益 (默认: 0)")
     parser.add_argument("-l", "--list", action="store_true", 
                         help="列出可用的语音")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不使用合成缓存，总是重新请求API")
+    parser.add_argument("--long", action="store_true",
+                        help="长文本模式：按句子切分后并发合成，再拼接为一个文件")
+    parser.add_argument("--max-chars", type=int, default=DEFAULT_MAX_CHARS,
+                        help=f"长文本模式下每个分段的最大字符数 (默认: {DEFAULT_MAX_CHARS})")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"长文本模式下并发合成的分段数 (默认: {DEFAULT_JOBS})")
+    parser.add_argument("--crossfade", type=int, default=0,
+                        help="长文本模式下分段接缝的交叉淡化时长，单位毫秒 (默认: 0)")
     
     args = parser.parse_args()
     
@@ -157,22 +262,39 @@ def main():
     # 设置默认输出文件
     output_file = args.output if args.output else f"output.{args.format}"
     
-    # 如果提供的不是URI而是语音名称，尝试从voices.json查找
+    # 如果提供的不是URI而是语音名称，从本地音色注册表查找，未找到时同步一次远程列表
     voice_uri = args.voice
     if not voice_uri.startswith("speech:"):
-        voices = list_voices()
-        found = False
-        for voice in voices:
-            if voice.get("name") == args.voice:
-                voice_uri = voice.get("uri")
-                found = True
-                break
+        load_dotenv()
+        try:
+            voice_uri = get_voice_registry().resolve_name(args.voice, os.getenv("SILICONFLOW_API_KEY"))
+        except Exception as e:
+            print(f"警告: 同步音色列表失败: {str(e)}")
+            voice_uri = None
         
-        if not found:
+        if not voice_uri:
             print(f"错误: 未找到名为 '{args.voice}' 的语音")
             print("请使用 -l 或 --list 选项查看可用的语音")
             return
     
+    # 长文本模式
+    if args.long:
+        generate_long_speech(
+            args.text,
+            voice_uri,
+            output_file,
+            model=args.model,
+            response_format=args.format,
+            sample_rate=args.rate,
+            speed=args.speed,
+            gain=args.gain,
+            max_chars=args.max_chars,
+            jobs=args.jobs,
+            crossfade_ms=args.crossfade,
+            use_cache=not args.no_cache
+        )
+        return
+    
     # 生成语音
     generate_speech(
         args.text, 
@@ -182,7 +304,8 @@ def main():
         response_format=args.format,
         sample_rate=args.rate,
         speed=args.speed,
-        gain=args.gain
+        gain=args.gain,
+        use_cache=not args.no_cache
     )
 
 
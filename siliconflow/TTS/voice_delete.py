@@ -1,8 +1,13 @@
-import requests
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.http_client import get_transport
+from common.voice_registry import get_voice_registry
+
 # 加载.env文件中的环境变量
 dotenv_path = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).joinpath('.env')
 load_dotenv(dotenv_path=dotenv_path)
@@ -17,7 +22,7 @@ voice_uri = input("请输入要删除的音色URI (格式: speech:your-voice-nam
 if not voice_uri or not voice_uri.startswith("speech:"):
     raise ValueError("音色URI格式不正确，应为: speech:your-voice-name:xxx:xxxx")
 
-url = "https://api.siliconflow.cn/v1/audio/voice/deletions"
+url = "/audio/voice/deletions"
 headers = {
     "Authorization": f"Bearer {api_key}",
     "Content-Type": "application/json"
@@ -27,11 +32,13 @@ data = {
 }
 
 # 发送删除请求
-response = requests.post(url, json=data, headers=headers)
+response = get_transport().post(url, json=data, headers=headers)
 
 # 检查响应状态
 if response.status_code == 200:
     print(f"音色删除成功: {voice_uri}")
+    # 同步移除本地音色注册表中的记录，之后的批量处理不会再复用这个URI
+    get_voice_registry().remove(voice_uri)
     print(f"响应内容: {response.json()}")
 else:
     print(f"删除失败，状态码: {response.status_code}")
@@ -1,10 +1,24 @@
-import requests
+import argparse
 import json
 import os
+import sys
 import time
 from pathlib import Path
 from dotenv import load_dotenv
 
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.bulk_ops import delete_voices, DEFAULT_JOBS, DEFAULT_RETRIES
+from common.voice_registry import get_voice_registry
+
+parser = argparse.ArgumentParser(description="删除全部自定义音色")
+parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                    help=f"同时进行中的删除请求数 (默认: {DEFAULT_JOBS})")
+parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                    help=f"单个音色遇到暂时性错误时的重试次数 (默认: {DEFAULT_RETRIES})")
+parser.add_argument("-y", "--yes", action="store_true", help="不询问确认，直接删除")
+args = parser.parse_args()
+
 # 加载.env文件中的环境变量
 dotenv_path = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).joinpath('.env')
 load_dotenv(dotenv_path=dotenv_path)
@@ -14,29 +28,18 @@ api_key = os.getenv("SILICONFLOW_API_KEY")
 if not api_key:
     raise ValueError("SILICONFLOW_API_KEY环境变量未设置，请在.env文件中配置")
 
-# 获取voices.json文件路径
+# 获取voices.json文件路径(音色列表导出文件，全部删除后清空)
 siliconflow_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 voices_json_path = os.path.join(siliconflow_dir, "voices.json")
 
-# 检查文件是否存在
-if not os.path.exists(voices_json_path):
-    raise FileNotFoundError(f"找不到音色列表文件: {voices_json_path}")
-
-# 读取voices.json文件
+# 删除前先与远程音色列表同步本地音色注册表，同步失败时使用本地记录
+registry = get_voice_registry()
 try:
-    with open(voices_json_path, "r", encoding="utf-8") as f:
-        voices_data = json.load(f)
-except json.JSONDecodeError:
-    raise ValueError(f"无法解析 {voices_json_path}，文件格式不正确")
-
-# 检查JSON格式是否符合预期
-if not isinstance(voices_data, dict) or "result" not in voices_data:
-    print(f"警告：{voices_json_path} 格式可能不正确，尝试继续处理...")
-    # 如果格式不正确，尝试直接使用整个JSON作为列表
-    voice_list = voices_data if isinstance(voices_data, list) else []
-else:
-    # 正常情况下从"result"字段获取音色列表
-    voice_list = voices_data["result"]
+    sync_stats = registry.sync(api_key, force=True)
+    print(f"已同步音色列表：新增 {sync_stats['added']}，更新 {sync_stats['updated']}，移除 {sync_stats['removed']}")
+except Exception as e:
+    print(f"警告：同步音色列表失败，使用本地音色注册表: {e}")
+voice_list = registry.all()
 
 # 检查列表是否为空
 if not voice_list:
@@ -47,67 +50,38 @@ print(f"共找到 {len(voice_list)} 个音色需要删除")
 print("=" * 50)
 
 # 询问用户确认
-confirm = input(f"确认要删除所有 {len(voice_list)} 个音色吗？(y/n): ").strip().lower()
-if confirm != 'y':
-    print("操作已取消")
-    exit(0)
+if not args.yes:
+    confirm = input(f"确认要删除所有 {len(voice_list)} 个音色吗？(y/n): ").strip().lower()
+    if confirm != 'y':
+        print("操作已取消")
+        exit(0)
 
-# 删除音色的URL和请求头
-url = "https://api.siliconflow.cn/v1/audio/voice/deletions"
-headers = {
-    "Authorization": f"Bearer {api_key}",
-    "Content-Type": "application/json"
-}
-
-# 记录成功和失败的删除
-successful = 0
-failed = 0
-failed_voices = []
-
-# 循环删除每个音色
-for i, voice in enumerate(voice_list, 1):
-    # 检查voice是否有uri字段
-    if "uri" not in voice:
-        print(f"[{i}/{len(voice_list)}] 跳过：缺少URI字段")
-        failed += 1
-        continue
-    
-    voice_uri = voice["uri"]
-    voice_name = voice.get("customName", "未命名")
-    
-    print(f"[{i}/{len(voice_list)}] 正在删除音色: {voice_name} (URI: {voice_uri})")
-    
-    # 准备请求数据
-    data = {
-        "uri": voice_uri
-    }
-    
-    try:
-        # 发送删除请求
-        response = requests.post(url, json=data, headers=headers)
-        
-        # 检查响应状态
-        if response.status_code == 200:
-            print(f"  ✅ 删除成功: {voice_name}")
-            successful += 1
-        else:
-            print(f"  ❌ 删除失败，状态码: {response.status_code}")
-            print(f"  错误信息: {response.text}")
-            failed += 1
-            failed_voices.append(voice_name)
-        
-        # 短暂暂停，避免API限流
-        time.sleep(0.5)
-        
-    except Exception as e:
-        print(f"  ❌ 删除时发生错误: {e}")
-        failed += 1
-        failed_voices.append(voice_name)
-        # 错误后暂停时间稍长
-        time.sleep(1)
+voice_names = {voice["uri"]: voice.get("custom_name") or "未命名" for voice in voice_list}
+
+
+def on_progress(done, total, result):
+    voice_name = voice_names.get(result["uri"], "未命名")
+    if result["ok"]:
+        print(f"[{done}/{total}] ✅ 删除成功: {voice_name} (URI: {result['uri']})")
+    else:
+        print(f"[{done}/{total}] ❌ 删除失败: {voice_name} (URI: {result['uri']})，错误信息: {result['error']}")
+
+
+# 并发删除，请求受共享传输层的限流器约束；删除成功的音色在一个事务中从注册表移除
+started = time.perf_counter()
+results = delete_voices(list(voice_names), api_key, jobs=args.jobs, retries=args.retries,
+                        on_progress=on_progress, registry=registry)
+elapsed = time.perf_counter() - started
+
+successful = sum(1 for r in results if r["ok"])
+failed_voices = [voice_names[r["uri"]] for r in results if not r["ok"]]
+failed = len(failed_voices)
+retried = sum(r["attempts"] - 1 for r in results)
 
 print("=" * 50)
-print(f"删除完成：成功 {successful} 个，失败 {failed} 个")
+print(f"删除完成：成功 {successful} 个，失败 {failed} 个，耗时 {elapsed:.2f} 秒")
+if retried:
+    print(f"暂时性错误重试次数: {retried}")
 
 # 如果有失败的音色，显示详情
 if failed > 0:
@@ -116,7 +90,7 @@ if failed > 0:
         print(f"- {voice_name}")
 
 # 如果全部删除成功，且数量大于0，则删除voices.json文件
-if successful > 0 and failed == 0:
+if successful > 0 and failed == 0 and os.path.exists(voices_json_path):
     try:
         # 先备份原文件
         backup_path = voices_json_path + ".bak"
@@ -1,31 +1,83 @@
-import requests
 import json
 import os
+import sys
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
-# 加载.env文件中的环境变量
-dotenv_path = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).joinpath('.env')
-load_dotenv(dotenv_path=dotenv_path)
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.voice_registry import fetch_remote_voices, get_voice_registry
 
-# 从环境变量获取API密钥
-api_key = os.getenv("SILICONFLOW_API_KEY")
-if not api_key:
-    raise ValueError("SILICONFLOW_API_KEY环境变量未设置，请在.env文件中配置")
+# 获取siliconflow目录路径
+siliconflow_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-url = "https://api.siliconflow.cn/v1/audio/voice/list"
+# 音色列表保存路径
+VOICES_JSON_PATH = os.path.join(siliconflow_dir, "voices.json")
 
-headers = {"Authorization": f"Bearer {api_key}"}
 
-response = requests.request("GET", url, headers=headers)
+def load_api_key():
+    """从.env文件加载API密钥，未配置时抛出ValueError"""
+    dotenv_path = Path(siliconflow_dir).joinpath('.env')
+    load_dotenv(dotenv_path=dotenv_path)
 
-# 获取siliconflow目录路径
-siliconflow_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # 从环境变量获取API密钥
+    api_key = os.getenv("SILICONFLOW_API_KEY")
+    if not api_key:
+        raise ValueError("SILICONFLOW_API_KEY环境变量未设置，请在.env文件中配置")
+    return api_key
+
+
+def fetch_voices(api_key=None, save_path=VOICES_JSON_PATH):
+    """
+    获取自定义音色列表，同步到本地音色注册表，并保存到voices.json
+
+    参数:
+        api_key (str, 可选): API密钥，不提供时从.env文件获取
+        save_path (str, 可选): 保存路径，为None时不保存
+
+    返回:
+        dict: 接口返回的音色列表，形如 {"result": [...]}
+    """
+    if api_key is None:
+        api_key = load_api_key()
+
+    started = time.time()
+    voices_data = fetch_remote_voices(api_key)
+    get_voice_registry().sync_from(voices_data, started)
+
+    # 保存json到siliconflow目录
+    if save_path:
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(voices_data, f, indent=2, ensure_ascii=False)
+    return voices_data
+
+
+def find_voice_uri(custom_name, voices_data=None, api_key=None):
+    """
+    按自定义名称查找音色URI，优先查本地音色注册表，未找到时同步远程列表后再查
+
+    参数:
+        custom_name (str): 自定义语音名称
+        voices_data (dict, 可选): 已获取的音色列表，提供时先用它同步注册表
+        api_key (str, 可选): API密钥
+
+    返回:
+        str: 音色URI，未找到时返回None
+    """
+    registry = get_voice_registry()
+    if voices_data is not None:
+        registry.sync_from(voices_data)
+        voice = registry.find_by_name(custom_name)
+        return voice["uri"] if voice else None
+    return registry.resolve_name(custom_name, api_key or load_api_key())
+
+
+def main():
+    fetch_voices()
+    # 获取音色列表成功
+    print(f"获取音色列表成功, 保存到 {VOICES_JSON_PATH}")
 
-# 保存json到siliconflow目录
-voices_json_path = os.path.join(siliconflow_dir, "voices.json")
-with open(voices_json_path, "w", encoding="utf-8") as f:
-    json.dump(response.json(), f, indent=2, ensure_ascii=False)
 
-# 获取音色列表成功
-print(f"获取音色列表成功, 保存到 {voices_json_path}")
+if __name__ == "__main__":
+    main()
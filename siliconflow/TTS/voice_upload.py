@@ -9,175 +9,250 @@
 import os
 import sys
 import json
+import logging
 import re
-import requests
+import subprocess
 import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
-# 导入音频处理库
-try:
-    from pydub import AudioSegment
-except ImportError:
-    print("正在安装音频处理库pydub...")
-    import subprocess
-    subprocess.run([sys.executable, "-m", "pip", "install", "pydub"])
-    from pydub import AudioSegment
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio_probe import read_wav_head
+from common.fs import atomic_write_bytes
+from common.http_client import get_transport
+from common.upload_stream import post_voice_upload
+from common.cache_store import get_cache_store
+from common.voice_registry import get_voice_registry
 
-def main():
-    # 加载.env文件中的环境变量
-    dotenv_path = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).joinpath('.env')
-    load_dotenv(dotenv_path=dotenv_path)
+logger = logging.getLogger(__name__)
 
-    # 从环境变量获取API密钥
-    api_key = os.getenv("SILICONFLOW_API_KEY")
-    if not api_key:
-        print("错误: SILICONFLOW_API_KEY环境变量未设置，请在.env文件中配置")
-        sys.exit(1)
+# 上传时未提供朗读文本时使用的默认文本
+DEFAULT_UPLOAD_TEXT = "在一无所知中, 梦里的一天结束了，一个新的轮回便会开始"
+
+# 获取siliconflow目录路径
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    # 检查命令行参数
-    if len(sys.argv) < 3:
-        print(f"用法: {sys.argv[0]} <音频文件路径> <自定义语音名称> [<朗读文本>]")
-        sys.exit(1)
 
-    audio_file_path = sys.argv[1]
-    # 获取并处理自定义名称，确保符合API要求
-    custom_name_raw = sys.argv[2]
-    # 处理自定义名称，只保留字母、数字、下划线和连字符
-    import re
-    custom_name = re.sub(r'[^a-zA-Z0-9_-]', '_', custom_name_raw)
-    # 确保名称不超过64个字符
-    custom_name = custom_name[:64]
+def load_api_key():
+    """
+    从.env文件加载API密钥
     
-    if custom_name != custom_name_raw:
-        print(f"注意: 原始名称 '{custom_name_raw}' 已经转换为合法格式: '{custom_name}'")
+    返回:
+        str: API密钥，未配置时返回None
+    """
+    dotenv_path = Path(SILICONFLOW_DIR).joinpath('.env')
+    load_dotenv(dotenv_path=dotenv_path)
+    return os.getenv("SILICONFLOW_API_KEY")
+
+
+def sanitize_voice_name(name):
+    """
+    处理自定义名称，只保留字母、数字、下划线和连字符，且不超过64个字符
     
-    # 朗读文本是可选的
-    text = ""
-    if len(sys.argv) >= 4:
-        text = sys.argv[3]
-    else:
-        text = "在一无所知中, 梦里的一天结束了，一个新的轮回便会开始"
+    参数:
+        name (str): 原始名称
+        
+    返回:
+        str: 符合API要求的名称
+    """
+    return re.sub(r'[^a-zA-Z0-9_-]', '_', name)[:64]
 
-    # 检查文件是否存在
-    if not os.path.isfile(audio_file_path):
-        print(f"错误: 文件 '{audio_file_path}' 不存在")
-        sys.exit(1)
 
-    # 获取siliconflow目录路径
-    siliconflow_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+def prepare_upload_audio(audio_file_path, max_duration_ms=10000, report=print):
+    """
+    截取音频前10秒写入临时文件，不把整个音频解码到内存中：
+    WAV直接按文件头切取前10秒的PCM数据；其他格式由ffmpeg截取并转为128k的MP3
     
-    # 打印上传信息
-    print(f"正在上传音频文件: {audio_file_path}")
-    print(f"自定义语音名称: {custom_name}")
-    print(f"朗读文本: {text}")
-
-    # 准备上传数据
-    url = "https://api.siliconflow.cn/v1/uploads/audio/voice"
-    headers = {
-        "Authorization": f"Bearer {api_key}"
-    }
+    参数:
+        audio_file_path (str): 音频文件路径
+        max_duration_ms (int): 最长保留时长(毫秒)
+        report (callable): 输出处理进度的函数
+        
+    返回:
+        tuple: (临时文件路径, MIME类型)，临时文件由调用方负责删除
+    """
+    report(f"正在处理音频文件: {audio_file_path}")
+    seconds = max_duration_ms / 1000
     
-    # 准备表单数据
-    # 处理音频文件，截取前10秒
-    print(f"正在处理音频文件: {audio_file_path}")
+    # WAV只读取前10秒的数据(音频小于10秒时使用原始长度)
+    wav_data = read_wav_head(audio_file_path, seconds)
+    if wav_data is not None:
+        fd, temp_audio_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        atomic_write_bytes(temp_audio_path, wav_data)
+        report(f"已截取音频前{seconds:g}秒，保存为临时文件")
+        return temp_audio_path, "audio/wav"
     
-    # 加载音频文件
-    audio = AudioSegment.from_file(audio_file_path)
+    # 压缩格式交给ffmpeg边解码边截取，只处理前10秒
+    fd, temp_audio_path = tempfile.mkstemp(suffix='.mp3')
+    os.close(fd)
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-t", str(seconds),
+        "-i", audio_file_path,
+        "-vn", "-b:a", "128k",
+        temp_audio_path
+    ]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        os.unlink(temp_audio_path)
+        raise RuntimeError("未找到ffmpeg，非WAV格式的音频需要ffmpeg进行截取和转换")
+    except subprocess.CalledProcessError as e:
+        os.unlink(temp_audio_path)
+        raise RuntimeError(f"音频截取失败: {e.stderr.decode('utf-8', 'replace').strip()}")
+    report(f"已截取音频前{seconds:g}秒并转为MP3，保存为临时文件")
+    return temp_audio_path, "audio/mpeg"
+
+
+def parse_upload_response(response, report=print):
+    """
+    从上传接口的响应中解析语音URI
     
-    # 截取前10秒
-    duration_ms = min(10000, len(audio))  # 如果音频小于10秒，使用原始长度
-    audio_trimmed = audio[:duration_ms]
+    参数:
+        response: requests.Response
+        report (callable): 输出响应内容的函数
+        
+    返回:
+        tuple: (URI或None, 解析后的JSON或None)
+    """
+    try:
+        response_json = response.json()
+        # 打印完整响应
+        report("API响应:")
+        report(json.dumps(response_json, indent=2, ensure_ascii=False))
+    except json.JSONDecodeError as e:
+        report(f"JSON解析错误: {str(e)}")
+        report(f"原始响应内容: {response.text}")
+        # 尝试解决常见的JSON解析问题
+        try:
+            # 尝试移除可能的BOM标记或特殊字符
+            cleaned_text = response.text.strip().lstrip('\ufeff')
+            response_json = json.loads(cleaned_text)
+            report("修复后成功解析JSON")
+        except Exception:
+            # 如果仍然失败，尝试按照URI模式提取
+            uri_match = re.search(r'"uri"\s*:\s*"([^"]+)"', response.text)
+            return (uri_match.group(1) if uri_match else None), None
     
-    # 创建临时文件保存截取后的音频
-    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-        temp_audio_path = temp_file.name
+    result = response_json.get('result') if isinstance(response_json, dict) else None
+    if isinstance(result, dict) and 'uri' in result:
+        return result['uri'], response_json
+    return None, response_json
+
+
+def save_voice_uri(custom_name, uri, report=print):
+    """将自定义语音名称和URI追加到my_voices.txt"""
+    my_voices_path = os.path.join(SILICONFLOW_DIR, "my_voices.txt")
+    with open(my_voices_path, "a", encoding="utf-8") as f:
+        f.write(f"{custom_name}: {uri}\n")
+    report(f"URI已保存到 {my_voices_path} 文件")
+
+
+def upload_voice(audio_file_path, custom_name, text=None, api_key=None, register=True, verbose=True):
+    """
+    截取音频并上传，创建自定义语音
     
-    # 调整比特率并导出为高质量MP3
-    audio_trimmed.export(temp_audio_path, format="mp3", bitrate="128k")
-    print(f"已截取音频到{duration_ms/1000}秒，保存为临时文件")
+    参数:
+        audio_file_path (str): 音频文件路径
+        custom_name (str): 自定义语音名称，会被转换为合法格式
+        text (str, 可选): 音频中的朗读文本，默认使用 DEFAULT_UPLOAD_TEXT
+        api_key (str, 可选): API密钥，不提供时从.env文件获取
+        register (bool, 可选): 上传成功后是否写入本地音色注册表
+        verbose (bool, 可选): 是否在标准输出打印上传过程；为False时写入日志(INFO)，
+                              供批量处理等并发调用的场景使用，避免多个文件的输出交错
+        
+    返回:
+        dict: ok(是否成功)、uri(语音URI，可能为None)、custom_name(实际使用的名称)、
+              status_code(HTTP状态码)、response(解析后的JSON)、error(错误信息)
+    """
+    report = print if verbose else logger.info
+    result = {
+        "ok": False,
+        "uri": None,
+        "custom_name": sanitize_voice_name(custom_name),
+        "status_code": None,
+        "response": None,
+        "error": None
+    }
     
-    # 读取处理后的音频文件
-    with open(temp_audio_path, 'rb') as f:
-        audio_data = f.read()
+    if api_key is None:
+        api_key = load_api_key()
+    if not api_key:
+        result["error"] = "SILICONFLOW_API_KEY环境变量未设置，请在.env文件中配置"
+        report(f"错误: {result['error']}")
+        return result
     
-    # 清理临时文件
-    os.unlink(temp_audio_path)
+    if result["custom_name"] != custom_name:
+        report(f"注意: 原始名称 '{custom_name}' 已经转换为合法格式: '{result['custom_name']}'")
     
-    # 将音频数据转换为Base64编码，与Shell脚本一致
-    import base64
-    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-    audio_data_uri = f'data:audio/mpeg;base64,{audio_base64}'
+    # 朗读文本是可选的
+    text = text or DEFAULT_UPLOAD_TEXT
     
-    # 与Shell脚本保持一致，使用form提交表单数据
-    data = {
-        'audio': audio_data_uri,
-        'customName': custom_name,
-        'text': text,
-        'model': 'FunAudioLLM/CosyVoice2-0.5B'
-    }
+    # 检查文件是否存在
+    if not os.path.isfile(audio_file_path):
+        result["error"] = f"文件 '{audio_file_path}' 不存在"
+        report(f"错误: {result['error']}")
+        return result
+    
+    # 打印上传信息
+    report(f"正在上传音频文件: {audio_file_path}")
+    report(f"自定义语音名称: {result['custom_name']}")
+    report(f"朗读文本: {text}")
     
-
-
     try:
-        # 注意：不再使用files参数，因为我们已经将音频数据包含在data中
-        response = requests.post(url, headers=headers, data=data)
+        temp_audio_path, mime_type = prepare_upload_audio(audio_file_path, report=report)
+        # 直接从临时文件边读取边进行Base64编码，以流式请求体上传
+        try:
+            response = post_voice_upload(get_transport(), api_key, temp_audio_path, result["custom_name"], text,
+                                         mime_type=mime_type)
+        finally:
+            # 清理临时文件
+            os.unlink(temp_audio_path)
+        
+        result["status_code"] = response.status_code
         
         # 检查响应状态码
         if response.status_code != 200:
-            print(f"请求失败，状态码: {response.status_code}")
-            print(f"响应内容: {response.text}")
-            return False
-        
-        # 尝试解析JSON响应
-        try:
-            response_json = response.json()
-            # 打印完整响应
-            print("API响应:")
-            print(json.dumps(response_json, indent=2, ensure_ascii=False))
-        except json.JSONDecodeError as e:
-            print(f"JSON解析错误: {str(e)}")
-            print(f"原始响应内容: {response.text}")
-            # 尝试解决常见的JSON解析问题
-            try:
-                # 尝试移除可能的BOM标记或特殊字符
-                cleaned_text = response.text.strip().lstrip('\ufeff')
-                response_json = json.loads(cleaned_text)
-                print("修复后成功解析JSON")
-            except Exception:
-                # 如果仍然失败，尝试按照URI模式提取
-                import re
-                uri_match = re.search(r'"uri"\s*:\s*"([^"]+)"', response.text)
-                if uri_match:
-                    uri = uri_match.group(1)
-                    print(f"自定义语音上传成功! URI: {uri}")
-                    return True
-                else:
-                    print(f"无法解析响应中的URI")
-                    return False
+            result["error"] = f"请求失败，状态码: {response.status_code}"
+            report(result["error"])
+            report(f"响应内容: {response.text}")
+            return result
         
-        # 检查是否成功
-        if response.status_code == 200 and 'result' in response_json and 'uri' in response_json['result']:
-            uri = response_json['result']['uri']
-            print(f"上传成功! 语音URI: {uri}")
-            
+        uri, result["response"] = parse_upload_response(response, report)
+        if uri:
+            result["ok"] = True
+            result["uri"] = uri
+            report(f"上传成功! 语音URI: {uri}")
             # 将URI保存到文件
-            my_voices_path = os.path.join(siliconflow_dir, "my_voices.txt")
-            with open(my_voices_path, "a", encoding="utf-8") as f:
-                f.write(f"{custom_name}: {uri}\n")
-            print(f"URI已保存到 {my_voices_path} 文件")
-            
-            return True
+            save_voice_uri(result["custom_name"], uri, report)
+            # 写入本地音色注册表，之后按名称或音频内容查找无需请求音色列表
+            if register:
+                get_voice_registry().add(
+                    uri, result["custom_name"], text=text,
+                    content_digest=get_cache_store().content_digest(audio_file_path)
+                )
         else:
-            print("上传失败，请检查错误信息")
-            return False
-            
+            result["error"] = "无法解析响应中的URI"
+            report("未能从响应中解析语音URI，请检查错误信息")
     except Exception as e:
-        print(f"发生错误: {str(e)}")
-        return False
-    finally:
-        # 使用with语句后不需要手动关闭文件
-        pass
+        result["error"] = str(e)
+        report(f"发生错误: {str(e)}")
+    
+    return result
+
+
+def main():
+    # 检查命令行参数
+    if len(sys.argv) < 3:
+        print(f"用法: {sys.argv[0]} <音频文件路径> <自定义语音名称> [<朗读文本>]")
+        sys.exit(1)
+    
+    text = sys.argv[3] if len(sys.argv) >= 4 else None
+    result = upload_voice(sys.argv[1], sys.argv[2], text)
+    if not result["ok"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 公共模块包
+命令行脚本与Streamlit界面共享的底层工具
+"""
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 音频文件头解析
+
+不启动ffprobe/ffmpeg子进程，直接读取文件头：
+- WAV：解析RIFF分块，由fmt块的字节率和data块的大小计算时长
+- FLAC：解析STREAMINFO元数据块中的采样率和总采样数
+- WAV截取：按帧对齐切取data块的前N秒，连同原fmt块组成新的WAV数据，全程在内存中完成
+无法解析的格式(mp3、m4a等压缩格式)返回None，由调用方回退到ffmpeg。
+"""
+
+import struct
+
+# 读取文件头时最多扫描的字节数，超过仍未找到data块时放弃
+_MAX_HEADER_SCAN = 1024 * 1024
+
+
+def _read_wav_layout(f):
+    """
+    解析WAV文件的分块结构
+    返回:
+        (fmt块原始字节, 字节率, 块对齐, data块偏移, data块大小)，不是可解析的WAV时返回None
+    """
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(12)
+
+    fmt_chunk = None
+    while f.tell() < min(file_size, _MAX_HEADER_SCAN):
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt_chunk = f.read(chunk_size)
+            if len(fmt_chunk) < 16:
+                return None
+            if chunk_size & 1:
+                f.seek(1, 1)
+        elif chunk_id == b"data":
+            if fmt_chunk is None:
+                return None
+            data_offset = f.tell()
+            # 边录边写的文件data大小可能是0或0xFFFFFFFF，以实际文件大小为准
+            data_size = min(chunk_size, file_size - data_offset) if chunk_size else file_size - data_offset
+            byte_rate, block_align = struct.unpack("<IH", fmt_chunk[8:14])
+            if not byte_rate or not block_align:
+                return None
+            return fmt_chunk, byte_rate, block_align, data_offset, data_size
+        else:
+            # 分块按2字节对齐
+            f.seek(chunk_size + (chunk_size & 1), 1)
+    return None
+
+
+def _flac_duration(f):
+    """从FLAC的STREAMINFO块计算时长，总采样数未知时返回None"""
+    header = f.read(10)
+    offset = 0
+    if header[:3] == b"ID3":
+        # 跳过文件开头的ID3v2标签(标签大小为syncsafe整数)
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        offset = 10 + size
+    f.seek(offset)
+    if f.read(4) != b"fLaC":
+        return None
+
+    block_header = f.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        return None
+    streaminfo = f.read(34)
+    if len(streaminfo) < 18:
+        return None
+    # 采样率(20位) | 声道数-1(3位) | 位深-1(5位) | 总采样数(36位)
+    packed = int.from_bytes(streaminfo[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & ((1 << 36) - 1)
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def probe_duration(path):
+    """
+    读取文件头获取音频时长
+    参数:
+        path: 音频文件路径
+    返回:
+        时长(秒)；不是WAV/FLAC或文件头无法解析时返回None
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+        f.seek(0)
+        if magic == b"RIFF":
+            layout = _read_wav_layout(f)
+            if layout is None:
+                return None
+            _, byte_rate, _, _, data_size = layout
+            return data_size / byte_rate
+        if magic == b"fLaC" or magic[:3] == b"ID3":
+            return _flac_duration(f)
+    return None
+
+
+def read_wav_head(path, seconds):
+    """
+    在内存中截取WAV文件的前N秒
+    参数:
+        path: WAV文件路径
+        seconds: 截取的时长(秒)
+    返回:
+        截取后的完整WAV二进制数据；不是可解析的WAV时返回None
+    """
+    with open(path, "rb") as f:
+        layout = _read_wav_layout(f)
+        if layout is None:
+            return None
+        fmt_chunk, byte_rate, block_align, data_offset, data_size = layout
+        # 按帧对齐，避免切断采样
+        size = min(data_size, int(byte_rate * seconds) // block_align * block_align)
+        f.seek(data_offset)
+        pcm = f.read(size)
+
+    fmt_padding = b"\x00" if len(fmt_chunk) & 1 else b""
+    data_padding = b"\x00" if len(pcm) & 1 else b""
+    body = (
+        b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt_chunk)) + fmt_chunk + fmt_padding
+        + b"data" + struct.pack("<I", len(pcm)) + pcm + data_padding
+    )
+    return b"RIFF" + struct.pack("<I", len(body)) + body
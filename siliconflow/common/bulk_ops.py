@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 批量音色操作
+
+并发删除一组音色，命令行脚本(voice_delete_all.py)与Web界面共用：
+- 请求经过共享HTTP传输层，受同一个自适应限流器约束，429先由传输层重试
+- 传输层重试用尽后仍失败(连接错误、429、5xx)的音色按带抖动的指数退避再重试，
+  其他4xx视为不可重试的失败；404表示音色已不存在，按删除成功处理
+- 全部结束(或中断)后，在一个事务中从本地音色注册表移除删除成功的音色
+- 进度回调在调用方线程中执行，Streamlit页面可以直接在回调中更新进度条
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from common.http_client import get_transport
+from common.rate_limit import backoff_delay
+from common.voice_registry import get_voice_registry
+
+# 默认并发数和单个音色的重试次数
+DEFAULT_JOBS = 8
+DEFAULT_RETRIES = 3
+
+# 可以重试的HTTP状态码(传输层重试用尽后)
+_TRANSIENT_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def delete_voice(uri, api_key, retries=DEFAULT_RETRIES, transport=None):
+    """
+    删除单个音色，遇到暂时性错误时退避重试
+    参数:
+        uri: 音色URI
+        api_key: API密钥
+        retries: 暂时性错误的重试次数
+        transport: HTTP传输层，默认使用共享的传输层
+    返回:
+        dict: uri、ok(是否成功)、status_code(最后一次的HTTP状态码)、attempts(尝试次数)、error(错误信息)
+    """
+    transport = transport or get_transport()
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    result = {"uri": uri, "ok": False, "status_code": None, "attempts": 0, "error": None}
+    for attempt in range(retries + 1):
+        result["attempts"] = attempt + 1
+        try:
+            response = transport.post("/audio/voice/deletions", headers=headers, json={"uri": uri})
+        except Exception as e:
+            result["error"] = str(e) or type(e).__name__
+        else:
+            result["status_code"] = response.status_code
+            if response.status_code in (200, 404):
+                result.update(ok=True, error=None)
+                return result
+            result["error"] = f"{response.status_code} - {response.text}"
+            if response.status_code not in _TRANSIENT_STATUS:
+                return result
+        if attempt < retries:
+            time.sleep(backoff_delay(attempt))
+    return result
+
+
+def delete_voices(uris, api_key, jobs=DEFAULT_JOBS, retries=DEFAULT_RETRIES,
+                  on_progress=None, registry=None, transport=None):
+    """
+    并发删除一组音色，并更新本地音色注册表
+    参数:
+        uris: 音色URI列表
+        api_key: API密钥
+        jobs: 同时进行中的删除请求数
+        retries: 单个音色暂时性错误的重试次数
+        on_progress: 每删除完一个音色后的回调 (已完成数, 总数, 该音色的结果)，在调用方线程中执行
+        registry: 音色注册表，默认使用进程内共享的注册表
+        transport: HTTP传输层，默认使用共享的传输层
+    返回:
+        与uris顺序一致的结果列表，每项格式同 delete_voice 的返回值
+    """
+    uris = list(dict.fromkeys(uris))
+    results = [None] * len(uris)
+    if not uris:
+        return results
+
+    registry = registry or get_voice_registry()
+    deleted = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(uris)))) as executor:
+            futures = {
+                executor.submit(delete_voice, uri, api_key, retries, transport): index
+                for index, uri in enumerate(uris)
+            }
+            done = 0
+            for future in as_completed(futures):
+                index = futures[future]
+                result = future.result()
+                results[index] = result
+                if result["ok"]:
+                    deleted.append(result["uri"])
+                done += 1
+                if on_progress:
+                    on_progress(done, len(uris), result)
+    finally:
+        # 中断时也要移除已经删除成功的音色，注册表在一个事务中更新
+        if deleted:
+            registry.remove(deleted)
+    return results
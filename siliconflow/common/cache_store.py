@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 本地缓存存储
+
+以内嵌SQLite数据库(WAL模式)作为缓存索引，命令行脚本和多个Streamlit会话可以同时读写：
+- 按 (命名空间, 键) 主键查找，不再需要每次读写整个JSON索引
+- 较小的JSON值直接存放在数据库中，音频等二进制内容存放在 blobs/ 目录下
+- 通过触发器维护缓存总字节数，超过配额时按最近访问时间(LRU)淘汰
+- 记录 路径 -> (文件大小, 修改时间, 内容哈希)，文件未变化时无需重新计算哈希；
+  临时目录下的文件不记录；记录数超过上限时删除最早写入的记录，清理过期条目时分批删除文件已不存在的记录
+
+缓存目录默认为 siliconflow/.cache，可通过环境变量 SILICONFLOW_CACHE_DIR 修改；
+容量配额(MB)通过 SILICONFLOW_CACHE_MAX_MB 设置，默认500。
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from common.fs import atomic_open, atomic_write_bytes
+from common.hashing import file_digest
+
+# 默认缓存根目录
+DEFAULT_CACHE_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+# 默认缓存容量上限(MB)
+DEFAULT_CACHE_MAX_MB = 500
+
+# 内容哈希记录的条数上限，超出时删除最早写入的记录
+MAX_DIGEST_ROWS = 200000
+
+# 每次清理时最多检查的内容哈希记录数
+DIGEST_PRUNE_BATCH = 5000
+
+# 临时目录下的文件(如Web界面上传的音频)每次路径都不同，不记录其内容哈希
+_TEMP_DIR = os.path.realpath(tempfile.gettempdir())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    file TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, bytes) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE usage SET bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE usage SET bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE usage SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+END;
+CREATE TABLE IF NOT EXISTS digests (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO entries (namespace, key, value, file, size, created, accessed)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (namespace, key) DO UPDATE SET
+    value = excluded.value, file = excluded.file, size = excluded.size,
+    created = excluded.created, accessed = excluded.accessed
+"""
+
+
+def get_cache_root():
+    """获取缓存根目录"""
+    return os.getenv("SILICONFLOW_CACHE_DIR") or DEFAULT_CACHE_ROOT
+
+
+class CacheStore:
+    """SQLite索引的键值缓存，支持LRU淘汰和容量配额，可多进程同时使用"""
+
+    def __init__(self, root=None, max_bytes=None):
+        """
+        参数:
+            root: 缓存目录，默认为 get_cache_root()
+            max_bytes: 容量上限(字节)，默认读取 SILICONFLOW_CACHE_MAX_MB
+        """
+        self.root = root or get_cache_root()
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.db_path = os.path.join(self.root, "cache.db")
+        if max_bytes is None:
+            try:
+                max_mb = float(os.getenv("SILICONFLOW_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB))
+            except ValueError:
+                max_mb = DEFAULT_CACHE_MAX_MB
+            max_bytes = int(max_mb * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        # 每个线程(以及fork出的子进程)使用独立的数据库连接
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # 自动提交模式，写操作显式使用 BEGIN IMMEDIATE 事务
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """写事务：开始时即获取写锁，多个进程同时写入时按顺序等待"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _blob_path(self, relative_path):
+        return os.path.join(self.blob_dir, relative_path)
+
+    def _remove_blobs(self, files):
+        """删除已从索引中移除的文件"""
+        for relative_path in files:
+            if relative_path:
+                try:
+                    os.unlink(self._blob_path(relative_path))
+                except OSError:
+                    pass
+
+    def _lookup(self, namespace, key, max_age):
+        """查找条目并更新访问时间，过期时返回None"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, file, created FROM entries WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if max_age is not None and now - row[2] > max_age:
+            return None
+        conn.execute(
+            "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key)
+        )
+        return row
+
+    def _store(self, namespace, key, value, relative_path, size):
+        """写入条目，并在超出配额时淘汰最久未访问的条目"""
+        now = time.time()
+        with self._transaction() as conn:
+            old = conn.execute(
+                "SELECT file FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            conn.execute(_UPSERT, (namespace, key, value, relative_path, size, now, now))
+            evicted = self._evict(conn, keep=(namespace, key))
+        stale = [old[0]] if old and old[0] and old[0] != relative_path else []
+        self._remove_blobs(stale + evicted)
+
+    def _evict(self, conn, keep=None):
+        """
+        按LRU淘汰条目直到总大小不超过配额
+        返回:
+            需要删除的文件列表(提交事务后再删除)
+        """
+        used = conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0]
+        over = used - self.max_bytes
+        if over <= 0:
+            return []
+        victims = []
+        for namespace, key, relative_path, size in conn.execute(
+            "SELECT namespace, key, file, size FROM entries ORDER BY accessed"
+        ):
+            if over <= 0:
+                break
+            if (namespace, key) == keep:
+                continue
+            victims.append((namespace, key, relative_path))
+            over -= size
+        conn.executemany(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?",
+            [(namespace, key) for namespace, key, _ in victims]
+        )
+        return [relative_path for _, _, relative_path in victims]
+
+    def prune_digests(self, limit=DIGEST_PRUNE_BATCH):
+        """
+        删除文件已不存在的内容哈希记录，每次从上次检查到的位置继续，最多检查limit条；
+        检查文件是否存在时不持有写锁
+        返回:
+            删除的记录数
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'digest_prune_rowid'").fetchone()
+        start = int(row[0]) if row else 0
+        rows = conn.execute(
+            "SELECT rowid, path FROM digests WHERE rowid > ? ORDER BY rowid LIMIT ?", (start, limit)
+        ).fetchall()
+        missing = [(path,) for _, path in rows if not os.path.exists(path)]
+        # 检查到末尾后下次从头开始
+        position = rows[-1][0] if len(rows) == limit else 0
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM digests WHERE path = ?", missing)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('digest_prune_rowid', ?)", (str(position),)
+            )
+        return len(missing)
+
+    def get_value(self, namespace, key, max_age=None):
+        """
+        读取JSON值
+        参数:
+            namespace: 命名空间
+            key: 键
+            max_age: 最长有效时间(秒)，None表示不过期
+        返回:
+            缓存的值，未命中时返回None
+        """
+        row = self._lookup(namespace, key, max_age)
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def put_value(self, namespace, key, value):
+        """写入可JSON序列化的值"""
+        text = json.dumps(value, ensure_ascii=False)
+        self._store(namespace, key, text, None, len(text.encode("utf-8")))
+
+    def get_file(self, namespace, key, max_age=None):
+        """
+        获取缓存文件的路径
+        返回:
+            文件路径，未命中或文件已被删除时返回None
+        """
+        row = self._lookup(namespace, key, max_age)
+        if row is None or row[1] is None:
+            return None
+        path = self._blob_path(row[1])
+        if not os.path.exists(path):
+            self.delete(namespace, key)
+            return None
+        return path
+
+    def put_file(self, namespace, key, data, suffix=""):
+        """
+        写入二进制内容，存放在 blobs/<命名空间>/<键前两位>/ 下
+        返回:
+            缓存文件路径
+        """
+        relative_path = os.path.join(namespace, key[:2], f"{key}{suffix}")
+        atomic_write_bytes(self._blob_path(relative_path), data)
+        self._store(namespace, key, None, relative_path, len(data))
+        return self._blob_path(relative_path)
+
+    def put_path(self, namespace, key, source_path, suffix=""):
+        """
+        把已写入磁盘的文件复制到缓存，按块复制，不把整个文件读入内存
+        参数:
+            source_path: 源文件路径
+        返回:
+            缓存文件路径
+        """
+        relative_path = os.path.join(namespace, key[:2], f"{key}{suffix}")
+        with open(source_path, "rb") as src, atomic_open(self._blob_path(relative_path)) as dst:
+            shutil.copyfileobj(src, dst)
+        self._store(namespace, key, None, relative_path, os.path.getsize(self._blob_path(relative_path)))
+        return self._blob_path(relative_path)
+
+    def delete(self, namespace, key):
+        """删除条目"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT file FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        if row:
+            self._remove_blobs([row[0]])
+
+    def clear_expired(self, max_age_seconds, namespace=None):
+        """
+        删除创建时间超过指定时长的条目
+        参数:
+            max_age_seconds: 最长保留时间(秒)
+            namespace: 只清理指定命名空间，None表示全部
+        返回:
+            删除的条目数
+        """
+        cutoff = time.time() - max_age_seconds
+        query = "SELECT namespace, key, file FROM entries WHERE created < ?"
+        params = [cutoff]
+        if namespace is not None:
+            query += " AND namespace = ?"
+            params.append(namespace)
+        with self._transaction() as conn:
+            rows = conn.execute(query, params).fetchall()
+            conn.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                [(ns, key) for ns, key, _ in rows]
+            )
+        self._remove_blobs([row[2] for row in rows])
+        self.prune_digests()
+        return len(rows)
+
+    def stats(self):
+        """
+        缓存使用情况
+        返回:
+            dict: entries(条目数)、bytes(已用字节)、max_bytes(配额)
+        """
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        used = conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0]
+        return {"entries": count, "bytes": used, "max_bytes": self.max_bytes}
+
+    def content_digest(self, path):
+        """
+        获取文件的内容哈希，文件大小和修改时间未变时直接使用记录的值
+        参数:
+            path: 文件路径
+        返回:
+            内容哈希字符串
+        """
+        real_path = os.path.realpath(path)
+        if real_path.startswith(_TEMP_DIR + os.sep):
+            return file_digest(real_path)
+        stat = os.stat(real_path)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT size, mtime_ns, digest FROM digests WHERE path = ?", (real_path,)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = file_digest(real_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (real_path, stat.st_size, stat.st_mtime_ns, digest)
+        )
+        # 重新写入的记录获得新的rowid，按rowid删除最早写入的记录(主键范围删除，代价很小)
+        conn.execute(
+            "DELETE FROM digests WHERE rowid <= (SELECT MAX(rowid) FROM digests) - ?", (MAX_DIGEST_ROWS,)
+        )
+        return digest
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_cache_store():
+    """
+    获取进程内共享的缓存存储
+    返回:
+        CacheStore
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CacheStore()
+    return _store
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 分阶段耗时事件
+
+批量处理时为每个文件的每个阶段记录一条结构化事件，写入JSONL文件，便于事后分析耗时分布：
+    {"ts": ..., "file": "...", "stage": "stt", "duration": 1.234, "status": "ok",
+     "requests": 1, "http_status": 200, "retries": 0, "bytes_sent": 320456, "bytes_received": 87}
+阶段内通过共享HTTP传输层发出的请求会自动汇总到事件中(见 HTTPTransport.track)。
+同时在内存中按阶段保留耗时，结束时输出 p50/p95/p99 汇总。
+"""
+
+import contextlib
+import math
+import threading
+import time
+from collections import defaultdict
+
+from common.http_client import get_transport
+from common.journal import ResultJournal
+
+
+def percentile(sorted_values, fraction):
+    """
+    最近秩法百分位数
+    参数:
+        sorted_values: 已排序的数值列表
+        fraction: 0~1 之间的百分位，如 0.95
+    返回:
+        百分位数，列表为空时返回None
+    """
+    if not sorted_values:
+        return None
+    rank = min(max(1, math.ceil(fraction * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+class EventLog:
+    """分阶段耗时事件记录器，可在多个线程中共用"""
+
+    def __init__(self, path=None):
+        """
+        参数:
+            path: 事件文件路径(.jsonl)，为None时只在内存中统计
+        """
+        self.path = path
+        self._journal = ResultJournal(path) if path else None
+        self._lock = threading.Lock()
+        self._durations = defaultdict(list)
+        self._errors = defaultdict(int)
+
+    def emit(self, file, stage, duration, status="ok", **fields):
+        """
+        记录一条事件
+        参数:
+            file: 输入文件路径
+            stage: 阶段名称
+            duration: 耗时(秒)
+            status: ok 或 error
+            fields: 其他字段，如 bytes_sent、http_status、error；值为None的字段不写入
+        """
+        record = {"ts": round(time.time(), 3), "file": file, "stage": stage,
+                  "duration": round(duration, 6), "status": status}
+        record.update((key, value) for key, value in fields.items() if value is not None)
+        with self._lock:
+            self._durations[stage].append(duration)
+            if status != "ok":
+                self._errors[stage] += 1
+        if self._journal:
+            self._journal.append(record)
+
+    @contextlib.contextmanager
+    def stage(self, file, stage, **fields):
+        """
+        计时一个阶段，with 块结束时记录事件
+        参数:
+            file: 输入文件路径
+            stage: 阶段名称
+            fields: 初始的事件字段
+        返回:
+            字段字典，可在 with 块中补充字段(如 bytes、method)
+        """
+        info = dict(fields)
+        status = "ok"
+        started = time.perf_counter()
+        with get_transport().track() as requests_made:
+            try:
+                yield info
+            except BaseException as e:
+                status = "error"
+                info.setdefault("error", str(e) or type(e).__name__)
+                raise
+            finally:
+                # requests 为0表示该阶段没有发出请求(如命中缓存)
+                info["requests"] = len(requests_made)
+                if requests_made:
+                    info["http_status"] = requests_made[-1]["status"]
+                    info["retries"] = sum(r["retries"] for r in requests_made)
+                    info["bytes_sent"] = sum(r["bytes_sent"] for r in requests_made)
+                    info["bytes_received"] = sum(r["bytes_received"] for r in requests_made)
+                self.emit(file, stage, time.perf_counter() - started, status, **info)
+
+    def summary(self):
+        """
+        按阶段汇总耗时
+        返回:
+            dict: 阶段名 -> count、errors、p50、p95、p99、total(秒)，按首次出现的顺序排列
+        """
+        with self._lock:
+            durations = {stage: sorted(values) for stage, values in self._durations.items()}
+            errors = dict(self._errors)
+        return {
+            stage: {
+                "count": len(values),
+                "errors": errors.get(stage, 0),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "total": sum(values),
+            }
+            for stage, values in durations.items()
+        }
+
+    def close(self):
+        """落盘并关闭事件文件"""
+        if self._journal:
+            self._journal.close()
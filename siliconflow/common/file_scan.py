@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 输入文件发现
+
+基于 os.scandir 的生成器，边遍历目录边产出文件，批量命令可以在找到第一个文件时就开始处理，
+不需要先列出整棵目录树：
+- 扩展名不区分大小写(.WAV 与 .wav 等同)
+- include/exclude 为 fnmatch 通配符，同时匹配文件名和相对路径；排除的目录整棵跳过
+- 默认跳过以 . 开头的隐藏文件和目录(如 macOS 的 ._xxx.wav)
+- 每个目录内按名称排序，产出顺序稳定
+- 记录已遍历目录的 (设备号, inode)，指向上级目录的符号链接不会造成重复遍历
+"""
+
+import fnmatch
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# 默认处理的音频扩展名
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a", ".ogg")
+
+
+def _matches(patterns, name, relative_path):
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+        for pattern in patterns
+    )
+
+
+def iter_files(root, extensions=AUDIO_EXTENSIONS, include=None, exclude=None,
+               recursive=False, include_hidden=False):
+    """
+    遍历目录，逐个产出符合条件的文件路径
+    参数:
+        root: 起始目录
+        extensions: 扩展名列表(不区分大小写)，为None时不按扩展名过滤
+        include: 通配符列表，提供时文件名或相对路径至少匹配其中一个
+        exclude: 通配符列表，匹配的文件和目录被跳过
+        recursive: 是否递归子目录
+        include_hidden: 是否包含以 . 开头的文件和目录
+    返回:
+        生成器，产出文件路径(以root开头)
+    """
+    suffixes = tuple(ext.lower() for ext in extensions) if extensions else None
+    include = list(include or [])
+    exclude = list(exclude or [])
+
+    # 待遍历的目录栈：(目录路径, 相对root的路径)
+    pending = [(root, "")]
+    # 已遍历目录的 (设备号, inode)，符号链接指回已遍历的目录时跳过
+    visited = set()
+    while pending:
+        directory, relative_dir = pending.pop()
+        try:
+            stat = os.stat(directory)
+        except OSError as e:
+            logger.warning("无法读取目录 %s: %s", directory, e)
+            continue
+        if (stat.st_dev, stat.st_ino) in visited:
+            logger.debug("跳过重复的目录(符号链接循环): %s", directory)
+            continue
+        visited.add((stat.st_dev, stat.st_ino))
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning("无法读取目录 %s: %s", directory, e)
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if not include_hidden and entry.name.startswith("."):
+                continue
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            if exclude and _matches(exclude, entry.name, relative_path):
+                continue
+            try:
+                if entry.is_dir():
+                    if recursive:
+                        subdirectories.append((entry.path, relative_path))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if suffixes and not entry.name.lower().endswith(suffixes):
+                continue
+            if include and not _matches(include, entry.name, relative_path):
+                continue
+            yield entry.path
+
+        # 逆序入栈，子目录按名称顺序遍历
+        pending.extend(reversed(subdirectories))
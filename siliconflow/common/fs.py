@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 文件写入工具
+
+原子写入：先写入同目录下的临时文件，再用 os.replace 一次性替换目标文件，
+程序中途退出或多个进程同时写入时，目标文件要么是旧内容，要么是完整的新内容。
+"""
+
+import contextlib
+import os
+import tempfile
+import threading
+
+_umask = None
+_umask_lock = threading.Lock()
+
+
+def _read_umask():
+    """
+    读取进程的文件创建掩码
+    Linux上从 /proc/self/status 读取，不改变进程状态；其他平台只能通过 os.umask 设置后再恢复
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def _get_umask():
+    """首次使用时读取文件创建掩码并缓存"""
+    global _umask
+    if _umask is None:
+        with _umask_lock:
+            if _umask is None:
+                _umask = _read_umask()
+    return _umask
+
+
+def _target_mode(path):
+    """
+    替换后文件应有的权限：目标已存在时沿用其权限，否则为按umask创建普通文件时的权限
+    """
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_get_umask()
+
+
+@contextlib.contextmanager
+def atomic_open(path):
+    """
+    以原子方式写入文件：在同目录的临时文件上写入，正常退出时落盘并替换目标文件，
+    出错时删除临时文件，目标文件保持不变
+    参数:
+        path: 目标文件路径
+    返回:
+        可写入二进制内容的文件对象
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件权限为0600，替换前改为目标文件应有的权限
+        os.chmod(temp_path, _target_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def atomic_write_bytes(path, data):
+    """
+    原子地写入二进制内容
+    参数:
+        path: 目标文件路径
+        data: 二进制内容
+    """
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def atomic_write_text(path, text, encoding="utf-8"):
+    """
+    原子地写入文本内容
+    参数:
+        path: 目标文件路径
+        text: 文本内容
+        encoding: 文本编码
+    """
+    atomic_write_bytes(path, text.encode(encoding))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 内容哈希工具
+按块流式计算文件和数据的哈希值，不会一次性把文件读入内存
+"""
+
+import hashlib
+
+# 每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path, algorithm="sha256", chunk_size=HASH_CHUNK_SIZE):
+    """
+    流式计算文件内容的哈希值
+    参数:
+        path: 文件路径
+        algorithm: 哈希算法
+        chunk_size: 每次读取的字节数
+    返回:
+        十六进制哈希字符串
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bytes_digest(data, algorithm="sha256"):
+    """计算二进制数据的哈希值"""
+    return hashlib.new(algorithm, data).hexdigest()
+
+
+def text_digest(text, algorithm="sha1"):
+    """计算文本的哈希值，用于生成文件名等短键"""
+    return hashlib.new(algorithm, text.encode("utf-8")).hexdigest()
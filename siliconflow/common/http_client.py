@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 共享HTTP传输层
+
+所有对SiliconFlow API的请求都应通过这里的传输对象发出：
+- 基于 requests.Session 的持久连接池，避免每次调用都重新进行TCP+TLS握手
+- 可配置的连接池大小、连接/读取超时
+- 对连接错误自动重试，幂等请求(GET等)在读取超时和临时性服务端错误(5xx)时也自动重试
+- 通过自适应令牌桶限流，收到429时遵循 Retry-After 并以带抖动的指数退避重试
+
+可通过以下环境变量调整默认配置：
+    SILICONFLOW_API_URL            API地址，如本地模拟服务 http://127.0.0.1:8765 (默认: https://api.siliconflow.cn)
+    SILICONFLOW_POOL_SIZE          连接池大小 (默认: 10)
+    SILICONFLOW_CONNECT_TIMEOUT    连接超时秒数 (默认: 10)
+    SILICONFLOW_READ_TIMEOUT       读取超时秒数 (默认: 120)
+    SILICONFLOW_MAX_RETRIES        连接错误(及幂等请求的5xx)的最大重试次数 (默认: 3)
+    SILICONFLOW_THROTTLE_RETRIES   收到429后的最大重试次数 (默认: 6)
+限流相关的配置见 common/rate_limit.py
+"""
+
+import contextlib
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from common.rate_limit import AdaptiveRateLimiter, backoff_delay, parse_retry_after
+
+# 默认API地址；API_BASE_URL 为默认地址加上版本前缀
+DEFAULT_API_URL = "https://api.siliconflow.cn"
+API_VERSION_PATH = "/v1"
+API_BASE_URL = DEFAULT_API_URL + API_VERSION_PATH
+
+# 默认配置
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_THROTTLE_RETRIES = 6
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# 由连接池自动重试的HTTP状态码；429由限流器单独处理
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# 读取超时和5xx时由连接池自动重试的请求方法
+IDEMPOTENT_METHODS = frozenset({"HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"})
+THROTTLE_STATUS_CODE = 429
+
+
+def _env_number(name, default, cast=float):
+    """从环境变量读取数值配置，无效时返回默认值"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        return default
+
+
+def normalize_api_url(url):
+    """
+    规范化API地址：去掉末尾的斜杠，没有版本前缀时补上 /v1
+
+    参数:
+        url: API地址，如 https://api.siliconflow.cn 或 http://127.0.0.1:8765/v1
+    返回:
+        带版本前缀的API基础URL
+    """
+    url = (url or DEFAULT_API_URL).strip().rstrip("/")
+    if not url.endswith(API_VERSION_PATH):
+        url += API_VERSION_PATH
+    return url
+
+
+def get_api_base_url():
+    """
+    当前使用的API基础URL：每次调用时读取 SILICONFLOW_API_URL，
+    因此在发出请求前通过 .env 加载的地址同样生效
+    """
+    return normalize_api_url(os.getenv("SILICONFLOW_API_URL"))
+
+
+def api_url(path):
+    """
+    拼接完整的API地址
+
+    参数:
+        path: 接口路径，如 "/audio/transcriptions"；已经是完整URL时原样返回
+    返回:
+        完整的请求URL
+    """
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+    return f"{get_api_base_url()}/{path.lstrip('/')}"
+
+
+class _Retry(Retry):
+    """连接池重试策略：429只由传输层的限流器处理，带 Retry-After 的429不在连接池内重试"""
+
+    RETRY_AFTER_STATUS_CODES = frozenset({413, 503})
+
+
+def _build_retry(max_retries, backoff_factor):
+    """构建urllib3重试策略，兼容新旧两种参数名"""
+    options = dict(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    # 连接错误时请求尚未发出，任何方法都可以重试；读取超时和5xx只对幂等方法重试，
+    # POST(如上传音色)可能已在服务端生效，是否重发由调用方决定，避免重复创建音色
+    try:
+        return _Retry(allowed_methods=IDEMPOTENT_METHODS, **options)
+    except TypeError:
+        return _Retry(method_whitelist=IDEMPOTENT_METHODS, **options)
+
+
+def _rewind_body(kwargs):
+    """
+    将请求体中的文件对象重置到开头，以便重发请求
+    返回:
+        请求体可以重发时返回True
+    """
+    bodies = []
+    files = kwargs.get("files")
+    if files:
+        for value in (files.values() if isinstance(files, dict) else (v for _, v in files)):
+            bodies.append(value[1] if isinstance(value, (tuple, list)) else value)
+    if kwargs.get("data") is not None and not isinstance(kwargs["data"], (str, bytes, dict, list, tuple)):
+        bodies.append(kwargs["data"])
+    
+    for body in bodies:
+        if hasattr(body, "seek"):
+            body.seek(0)
+        elif not isinstance(body, (str, bytes)):
+            # 生成器等一次性的请求体无法重发
+            return False
+    return True
+
+
+class HTTPTransport:
+    """带连接池、超时和自动重试的HTTP传输对象，可在多线程间共享"""
+
+    def __init__(self, pool_size=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 throttle_retries=None, limiter=None):
+        """
+        初始化传输对象
+        参数:
+            pool_size: 连接池大小
+            connect_timeout: 连接超时(秒)
+            read_timeout: 读取超时(秒)
+            max_retries: 连接错误(及幂等请求的读取超时和5xx)的最大重试次数
+            backoff_factor: 重试退避系数
+            throttle_retries: 收到429后的最大重试次数
+            limiter: 自定义限流器，默认新建AdaptiveRateLimiter
+        """
+        self.pool_size = pool_size or _env_number("SILICONFLOW_POOL_SIZE", DEFAULT_POOL_SIZE, int)
+        self.connect_timeout = connect_timeout or _env_number("SILICONFLOW_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+        self.read_timeout = read_timeout or _env_number("SILICONFLOW_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+        if max_retries is None:
+            max_retries = _env_number("SILICONFLOW_MAX_RETRIES", DEFAULT_MAX_RETRIES, int)
+        self.max_retries = max_retries
+        if throttle_retries is None:
+            throttle_retries = _env_number("SILICONFLOW_THROTTLE_RETRIES", DEFAULT_THROTTLE_RETRIES, int)
+        self.throttle_retries = throttle_retries
+        self.limiter = limiter or AdaptiveRateLimiter()
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=_build_retry(self.max_retries, backoff_factor),
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # 各线程正在进行的请求统计(见 track)
+        self._local = threading.local()
+
+    @property
+    def timeout(self):
+        """默认的 (连接超时, 读取超时)"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def request(self, method, url, **kwargs):
+        """
+        发送请求，受限流器控制，收到429时自动等待并重试
+        参数:
+            method: HTTP方法
+            url: 接口路径或完整URL
+            **kwargs: 透传给 requests 的参数(headers, json, data, files, stream...)
+        返回:
+            requests.Response，其 retries 属性记录了因429重试的次数
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        url = api_url(url)
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            self.limiter.acquire()
+            response = self.session.request(method, url, **kwargs)
+            if response.status_code != THROTTLE_STATUS_CODE:
+                self.limiter.on_success()
+                break
+
+            # 被限流：降低速率，等待服务端要求的时间或指数退避时间后重试
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.limiter.on_throttle(retry_after)
+            if attempt >= self.throttle_retries or not _rewind_body(kwargs):
+                break
+            response.close()
+            time.sleep(max(retry_after or 0, backoff_delay(attempt)))
+            attempt += 1
+        
+        response.retries = attempt
+        self._record(method, url, response, attempt, started, kwargs.get("stream", False))
+        return response
+
+    def _record(self, method, url, response, throttle_retries, started, stream):
+        """把请求统计交给当前线程中正在进行的 track"""
+        trackers = getattr(self._local, "trackers", None)
+        if not trackers:
+            return
+        # 连接池对5xx和连接错误的自动重试记录在 urllib3 的重试历史中
+        pool_retries = getattr(getattr(response.raw, "retries", None), "history", None) or ()
+        sent = response.request.headers.get("Content-Length") if response.request is not None else None
+        if stream:
+            received = response.headers.get("Content-Length")
+        else:
+            received = len(response.content)
+        stats = {
+            "method": method,
+            "url": url,
+            "status": response.status_code,
+            "retries": throttle_retries + len(pool_retries),
+            "bytes_sent": int(sent) if sent else 0,
+            "bytes_received": int(received) if received else 0,
+            "elapsed": time.perf_counter() - started,
+        }
+        for tracker in trackers:
+            tracker.append(stats)
+
+    @contextlib.contextmanager
+    def track(self):
+        """
+        收集当前线程在 with 块中发出的请求
+        返回:
+            列表，每个请求一项：method、url、status、retries(含429与5xx重试)、
+            bytes_sent、bytes_received、elapsed(秒)；流式响应的接收字节数取自Content-Length
+        """
+        if not hasattr(self._local, "trackers"):
+            self._local.trackers = []
+        requests_made = []
+        self._local.trackers.append(requests_made)
+        try:
+            yield requests_made
+        finally:
+            self._local.trackers.pop()
+
+    def get(self, url, **kwargs):
+        """发送GET请求"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """发送POST请求"""
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+# 进程内共享的传输对象
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    获取进程内共享的传输对象(首次调用时创建)
+    返回:
+        HTTPTransport实例
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 追加写入的结果日志
+
+批量处理时每完成一个文件，只向 <名称>.jsonl 追加一行JSON，而不是重写整个结果文件：
+- 每次写入的开销与已处理的文件数无关
+- 按条数或时间间隔批量调用fsync，兼顾性能与断电安全
+- 中途中断时最多丢失最后一行不完整的记录，读取时会自动跳过
+处理结束后再把日志合并进原有的字典格式JSON(原子替换)，
+处理过程中也可以随时用 load_results 读取"JSON + 日志"合并后的最新结果。
+"""
+
+import json
+import os
+import threading
+import time
+
+from common.fs import atomic_write_text
+
+
+def journal_path_for(json_path):
+    """结果JSON对应的日志文件路径：<名称>.json -> <名称>.jsonl"""
+    return os.path.splitext(json_path)[0] + ".jsonl"
+
+
+class ResultJournal:
+    """追加写入的JSONL结果日志，可在多个线程中共用"""
+
+    def __init__(self, path, fsync_every=16, fsync_interval=1.0):
+        """
+        参数:
+            path: 日志文件路径
+            fsync_every: 每写入多少条记录调用一次fsync
+            fsync_interval: 距上次fsync超过多少秒时调用fsync
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, record):
+        """
+        追加一条记录
+        参数:
+            record: 可JSON序列化的字典
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            # 每条记录都写入操作系统缓冲区，其他进程可以立即读到
+            self._file.flush()
+            self._pending += 1
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """把尚未落盘的记录写入磁盘"""
+        with self._lock:
+            if self._pending:
+                self._sync()
+
+    def close(self):
+        """落盘并关闭日志文件"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_journal(path):
+    """
+    读取日志中的所有记录
+    参数:
+        path: 日志文件路径
+    返回:
+        记录列表；不存在时返回空列表，不完整或损坏的行会被跳过
+    """
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # 中断时最后一行可能只写了一半
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def load_results(json_path, key="audio_name_raw"):
+    """
+    读取字典格式的结果JSON，并合并尚未整理的日志记录
+    参数:
+        json_path: 结果JSON路径(也可以直接传入.jsonl日志路径)
+        key: 日志记录中作为字典键的字段
+    返回:
+        dict: 合并后的结果，日志中较新的记录覆盖旧值
+    """
+    if json_path.endswith(".jsonl"):
+        json_path = os.path.splitext(json_path)[0] + ".json"
+
+    data = {}
+    if os.path.exists(json_path):
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            print(f"警告: {json_path} 格式错误，仅读取日志中的记录")
+            data = {}
+
+    for record in read_journal(journal_path_for(json_path)):
+        if key in record:
+            data[record[key]] = record
+    return data
+
+
+def compact_journal(json_path, key="audio_name_raw", indent=4):
+    """
+    把日志合并进结果JSON：原子地写入新的JSON后删除日志
+    参数:
+        json_path: 结果JSON路径
+        key: 日志记录中作为字典键的字段
+        indent: JSON缩进
+    返回:
+        dict: 合并后的结果
+    """
+    journal_path = journal_path_for(json_path)
+    data = load_results(json_path, key)
+    if os.path.exists(journal_path):
+        atomic_write_text(json_path, json.dumps(data, ensure_ascii=False, indent=indent))
+        os.remove(journal_path)
+    return data
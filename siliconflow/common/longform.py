@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 长文本语音合成
+
+长文本一次性合成时，一个请求要等很久，并且任何一处失败都要整段重来。这里的做法是：
+1. 按中文和英文的句子边界把文本切成不超过指定长度的分段
+2. 用相同的语音参数并发合成各分段(以WAV格式请求，便于按采样拼接)
+3. 按采样精确拼接各段PCM数据，可选在接缝处做短交叉淡化
+总耗时取决于单段合成的延迟，而不是文本总长度。
+"""
+
+import io
+import sys
+import wave
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 每个分段的默认最大字符数
+DEFAULT_MAX_CHARS = 300
+
+# 默认并发合成的分段数
+DEFAULT_JOBS = 4
+
+# 中文及全角句末标点，遇到即断句
+_TERMINATORS = "。！？；…!?"
+# 英文句末标点，后面跟空白或文本结束时才断句(避免拆开 3.14、e.g 等)
+_LATIN_TERMINATORS = ".;"
+# 句末标点后面可能紧跟的引号和括号，归入前一句
+_CLOSERS = "”’」』）)]\"'"
+# 超长句子的次级切分点
+_SOFT_BREAKS = "，,、：:"
+
+
+def split_sentences(text):
+    """
+    按句子边界切分文本
+    参数:
+        text: 原始文本
+    返回:
+        句子列表(已去除首尾空白)
+    """
+    sentences = []
+    buffer = []
+    length = len(text)
+    i = 0
+    while i < length:
+        ch = text[i]
+        buffer.append(ch)
+        i += 1
+
+        if ch == "\n" or ch in _TERMINATORS:
+            end = True
+        elif ch in _LATIN_TERMINATORS:
+            j = i
+            while j < length and text[j] in _CLOSERS:
+                j += 1
+            end = j == length or text[j].isspace()
+        else:
+            end = False
+
+        if end:
+            # 连续的句末标点和收尾引号归入当前句
+            while i < length and (text[i] in _CLOSERS or text[i] in _TERMINATORS):
+                buffer.append(text[i])
+                i += 1
+            sentence = "".join(buffer).strip()
+            if sentence:
+                sentences.append(sentence)
+            buffer = []
+
+    sentence = "".join(buffer).strip()
+    if sentence:
+        sentences.append(sentence)
+    return sentences
+
+
+def _split_long_sentence(sentence, max_chars):
+    """把超过长度上限的句子在逗号等位置切开，仍然过长时按长度硬切"""
+    pieces = []
+    start = 0
+    while len(sentence) - start > max_chars:
+        window = sentence[start:start + max_chars]
+        cut = max(window.rfind(ch) for ch in _SOFT_BREAKS)
+        end = start + cut + 1 if cut > 0 else start + max_chars
+        pieces.append(sentence[start:end].strip())
+        start = end
+    pieces.append(sentence[start:].strip())
+    return [piece for piece in pieces if piece]
+
+
+def _join_text(left, right):
+    """拼接两段文本，英文之间补一个空格"""
+    if left and right and left[-1].isascii() and right[0].isascii():
+        return f"{left} {right}"
+    return left + right
+
+
+def split_text(text, max_chars=DEFAULT_MAX_CHARS):
+    """
+    把长文本切分为适合单次合成的分段
+    参数:
+        text: 原始文本
+        max_chars: 每个分段的最大字符数
+    返回:
+        分段列表，相邻的短句会合并到同一分段
+    """
+    chunks = []
+    current = ""
+    for sentence in split_sentences(text):
+        for piece in _split_long_sentence(sentence, max_chars):
+            merged = _join_text(current, piece)
+            if current and len(merged) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = merged
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def synthesize_chunks(synthesize, chunks, jobs=DEFAULT_JOBS, on_progress=None):
+    """
+    并发合成各分段
+    参数:
+        synthesize: 合成函数，接收分段文本，返回WAV格式的二进制数据
+        chunks: 分段列表
+        jobs: 并发数
+        on_progress: 每完成一段后的回调 (已完成段数, 总段数)
+    返回:
+        按分段顺序排列的WAV数据列表；任意一段失败时抛出该异常
+    """
+    results = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(chunks) or 1))) as executor:
+        futures = {executor.submit(synthesize, chunk): index for index, chunk in enumerate(chunks)}
+        done = 0
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if on_progress:
+                on_progress(done, len(chunks))
+    return results
+
+
+def _crossfade_join(pcm_chunks, channels, fade_frames):
+    """拼接16位PCM数据，在每个接缝处做线性交叉淡化"""
+    swap = sys.byteorder == "big"
+    output = array("h")
+    for pcm in pcm_chunks:
+        samples = array("h")
+        samples.frombytes(pcm)
+        if swap:
+            samples.byteswap()
+
+        frames = min(fade_frames, len(output) // channels, len(samples) // channels)
+        if frames:
+            overlap = frames * channels
+            base = len(output) - overlap
+            for index in range(overlap):
+                weight = (index // channels + 1) / (frames + 1)
+                output[base + index] = int(output[base + index] * (1 - weight) + samples[index] * weight)
+            output.extend(samples[overlap:])
+        else:
+            output.extend(samples)
+
+    if swap:
+        output.byteswap()
+    return output.tobytes()
+
+
+def join_wav(wav_chunks, crossfade_ms=0):
+    """
+    按采样精确拼接多段WAV音频
+    参数:
+        wav_chunks: WAV二进制数据列表，声道数、采样位宽和采样率必须一致
+        crossfade_ms: 接缝处交叉淡化的时长(毫秒)，0表示直接拼接；仅支持16位PCM
+    返回:
+        拼接后的WAV二进制数据
+    """
+    params = None
+    pcm_chunks = []
+    for data in wav_chunks:
+        with wave.open(io.BytesIO(data), "rb") as reader:
+            chunk_params = (reader.getnchannels(), reader.getsampwidth(), reader.getframerate())
+            if params is None:
+                params = chunk_params
+            elif chunk_params != params:
+                raise ValueError(f"分段音频格式不一致: {chunk_params} != {params}")
+            pcm_chunks.append(reader.readframes(reader.getnframes()))
+
+    if params is None:
+        raise ValueError("没有可拼接的音频")
+
+    channels, sample_width, frame_rate = params
+    fade_frames = int(frame_rate * crossfade_ms / 1000)
+    if fade_frames > 0 and sample_width == 2:
+        pcm = _crossfade_join(pcm_chunks, channels, fade_frames)
+    else:
+        pcm = b"".join(pcm_chunks)
+
+    output = io.BytesIO()
+    with wave.open(output, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(frame_rate)
+        writer.writeframes(pcm)
+    return output.getvalue()
+
+
+def encode_audio(wav_data, output_format):
+    """
+    把WAV数据转换为目标格式
+    参数:
+        wav_data: WAV二进制数据
+        output_format: 目标格式，如 wav、mp3
+    返回:
+        目标格式的二进制数据；非WAV格式需要安装pydub(以及ffmpeg)
+    """
+    if output_format.lower() == "wav":
+        return wav_data
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        raise RuntimeError(f"长文本模式输出{output_format}格式需要安装pydub，或改用wav格式")
+    output = io.BytesIO()
+    AudioSegment.from_wav(io.BytesIO(wav_data)).export(output, format=output_format)
+    return output.getvalue()
+
+
+def synthesize_long_text(synthesize, text, output_format="wav", max_chars=DEFAULT_MAX_CHARS,
+                         jobs=DEFAULT_JOBS, crossfade_ms=0, on_progress=None):
+    """
+    长文本合成：切分、并发合成、拼接
+    参数:
+        synthesize: 合成函数，接收分段文本，返回WAV格式的二进制数据
+        text: 要合成的文本
+        output_format: 输出格式
+        max_chars: 每个分段的最大字符数
+        jobs: 并发数
+        crossfade_ms: 接缝处交叉淡化的时长(毫秒)
+        on_progress: 每完成一段后的回调 (已完成段数, 总段数)
+    返回:
+        (音频二进制数据, 分段数)
+    """
+    chunks = split_text(text, max_chars)
+    if not chunks:
+        raise ValueError("文本为空，无法合成")
+    wav_chunks = synthesize_chunks(synthesize, chunks, jobs=jobs, on_progress=on_progress)
+    return encode_audio(join_wav(wav_chunks, crossfade_ms), output_format), len(chunks)
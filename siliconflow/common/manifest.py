@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 批量处理进度清单
+
+按输入文件的内容哈希记录每个文件已完成的阶段及其产出(转录文本、URI等)，
+批量处理中断后重新运行时可以跳过已完成的工作，从最后完成的阶段继续，
+避免重复转录，更重要的是避免重复上传产生同名的重复音色。
+
+清单以JSONL结果日志的形式追加写入，打开时把历史记录合并为每个文件一行。
+"""
+
+import json
+import os
+import threading
+
+from common.fs import atomic_write_text
+from common.journal import ResultJournal, read_journal
+
+# 按完成顺序排列的阶段
+STAGE_TRANSCRIBED = "transcribed"
+STAGE_UPLOADED = "uploaded"
+STAGE_URI_RESOLVED = "uri_resolved"
+STAGE_SAVED = "saved"
+STAGES = (STAGE_TRANSCRIBED, STAGE_UPLOADED, STAGE_URI_RESOLVED, STAGE_SAVED)
+
+
+class BatchManifest:
+    """批量处理进度清单，可在多个线程中共用"""
+
+    def __init__(self, path):
+        """
+        参数:
+            path: 清单文件路径(.jsonl)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        for record in read_journal(path):
+            digest = record.get("digest")
+            if digest:
+                self._entries.setdefault(digest, {}).update(record)
+
+        # 合并历史记录，避免清单随重复运行无限增长
+        if self._entries:
+            lines = [json.dumps(entry, ensure_ascii=False) for entry in self._entries.values()]
+            atomic_write_text(path, "\n".join(lines) + "\n")
+        self._journal = ResultJournal(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, digest):
+        """
+        获取文件的处理记录
+        参数:
+            digest: 文件内容哈希
+        返回:
+            记录字典的副本，未处理过时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            return dict(entry) if entry else None
+
+    def reached(self, digest, stage):
+        """判断文件是否已完成指定阶段"""
+        entry = self.get(digest)
+        if not entry or entry.get("stage") not in STAGES:
+            return False
+        return STAGES.index(entry["stage"]) >= STAGES.index(stage)
+
+    def record(self, digest, stage, **fields):
+        """
+        记录文件完成了某个阶段
+        参数:
+            digest: 文件内容哈希
+            stage: 完成的阶段，取值见 STAGES
+            fields: 该阶段的产出，如 transcription、uri
+        """
+        if stage not in STAGES:
+            raise ValueError(f"未知的处理阶段: {stage}")
+        record = dict(fields, digest=digest, stage=stage)
+        with self._lock:
+            entry = self._entries.setdefault(digest, {})
+            # 阶段只前进不后退
+            if entry.get("stage") in STAGES and STAGES.index(entry["stage"]) > STAGES.index(stage):
+                record["stage"] = entry["stage"]
+            entry.update(record)
+        self._journal.append(record)
+
+    def close(self):
+        """落盘并关闭清单"""
+        self._journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def reset_manifest(path):
+    """删除清单，下次运行时重新处理所有文件"""
+    if os.path.exists(path):
+        os.remove(path)
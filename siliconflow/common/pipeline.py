@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 多阶段流水线执行器
+
+把逐个文件的处理流程拆成若干阶段(如 预处理 -> 转录 -> 上传 -> 保存)，
+每个阶段有自己的工作线程数，阶段之间用有界队列连接：
+- 第N+1个文件的本地预处理、第N个文件的转录、第N-1个文件的上传可以同时进行
+- 有界队列限制在途的文件数，上游阶段过快时会自动等待下游
+- 某个阶段失败的文件不再进入后续阶段，结果中记录失败的阶段和原因
+- 输入可以是生成器，边产出边处理，不需要事先知道输入总数
+"""
+
+import queue
+import threading
+import time
+
+# 阶段结束标记
+_DONE = object()
+
+
+class Stage:
+    """流水线中的一个阶段"""
+
+    def __init__(self, name, func, workers=1):
+        """
+        参数:
+            name: 阶段名称
+            func: 处理函数，接收上一阶段的输出，返回交给下一阶段的数据
+            workers: 该阶段的工作线程数
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+
+
+class Pipeline:
+    """由多个阶段组成的流水线"""
+
+    def __init__(self, stages, queue_size=None, on_item_done=None):
+        """
+        参数:
+            stages: Stage列表，按执行顺序排列
+            queue_size: 每个阶段输入队列的容量，默认为该阶段工作线程数的2倍
+            on_item_done: 每个输入处理结束(成功或失败)后的回调，参数为该输入的结果字典
+        """
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_item_done = on_item_done
+        self.stats = {}
+
+    def run(self, items):
+        """
+        执行流水线
+        参数:
+            items: 输入的可迭代对象(列表或生成器)
+        返回:
+            按输入顺序排列的结果列表，每项为字典：
+            item(输入)、ok(是否成功)、value(最后一个阶段的输出)、stage(失败的阶段)、error(错误信息)
+        """
+        # 输入按序号记录，生成器产出的输入也可以在结果中找回
+        items_by_index = {}
+        results = {}
+        queues = [
+            queue.Queue(maxsize=self.queue_size or stage.workers * 2)
+            for stage in self.stages
+        ]
+        remaining = [stage.workers for stage in self.stages]
+        lock = threading.Lock()
+        self.stats = {
+            stage.name: {"workers": stage.workers, "items": 0, "errors": 0, "busy": 0.0}
+            for stage in self.stages
+        }
+
+        def finish(index, ok, value=None, stage=None, error=None):
+            result = {"item": items_by_index[index], "ok": ok, "value": value, "stage": stage, "error": error}
+            results[index] = result
+            if self.on_item_done:
+                self.on_item_done(result)
+
+        def worker(position):
+            stage = self.stages[position]
+            inbox = queues[position]
+            outbox = queues[position + 1] if position + 1 < len(self.stages) else None
+            stats = self.stats[stage.name]
+            while True:
+                task = inbox.get()
+                if task is _DONE:
+                    # 本阶段最后一个线程退出时，通知下游阶段的每个线程
+                    with lock:
+                        remaining[position] -= 1
+                        last = remaining[position] == 0
+                    if last and outbox is not None:
+                        for _ in range(self.stages[position + 1].workers):
+                            outbox.put(_DONE)
+                    return
+
+                index, payload = task
+                started = time.perf_counter()
+                try:
+                    value = stage.func(payload)
+                except Exception as e:
+                    with lock:
+                        stats["errors"] += 1
+                        stats["busy"] += time.perf_counter() - started
+                    finish(index, False, stage=stage.name, error=str(e) or type(e).__name__)
+                    continue
+                with lock:
+                    stats["items"] += 1
+                    stats["busy"] += time.perf_counter() - started
+
+                if outbox is None:
+                    finish(index, True, value=value)
+                else:
+                    outbox.put((index, value))
+
+        threads = []
+        for position, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=worker, args=(position,),
+                    name=f"pipeline-{stage.name}-{number}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        # 输入队列有界，放入速度受第一个阶段的处理速度限制
+        count = 0
+        try:
+            for item in items:
+                items_by_index[count] = item
+                queues[0].put((count, item))
+                count += 1
+        finally:
+            # 输入产出过程中出错时也要让工作线程退出
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+        return [results[index] for index in range(count)]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 自适应限流模块
+
+令牌桶限流器，按"加性增、乘性减"(AIMD)的方式自适应调整请求速率：
+- 每次请求成功后缓慢提高速率，逐步逼近账号允许的上限
+- 收到429时速率减半，并在 Retry-After 指定的时间内暂停发放令牌
+
+可通过以下环境变量调整默认配置：
+    SILICONFLOW_RATE_LIMIT  初始速率，每秒请求数 (默认: 10)
+    SILICONFLOW_MAX_RATE    速率上限，每秒请求数 (默认: 50)
+"""
+
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# 默认配置
+DEFAULT_RATE = 10.0
+DEFAULT_MAX_RATE = 50.0
+DEFAULT_MIN_RATE = 0.2
+
+
+def _env_float(name, default):
+    """从环境变量读取浮点数配置，无效时返回默认值"""
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 响应头
+    参数:
+        value: 响应头的值，可以是秒数或HTTP日期
+    返回:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """
+    计算带抖动的指数退避时间(full jitter)
+    参数:
+        attempt: 第几次重试(从0开始)
+        base: 基础等待秒数
+        cap: 最长等待秒数
+    返回:
+        等待秒数
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveRateLimiter:
+    """线程安全的自适应令牌桶限流器"""
+
+    def __init__(self, rate=None, max_rate=None, min_rate=DEFAULT_MIN_RATE, burst=None):
+        """
+        初始化限流器
+        参数:
+            rate: 初始速率(每秒请求数)
+            max_rate: 速率上限
+            min_rate: 速率下限
+            burst: 令牌桶容量，默认与初始速率相同
+        """
+        self.rate = rate or _env_float("SILICONFLOW_RATE_LIMIT", DEFAULT_RATE)
+        self.max_rate = max(self.rate, max_rate or _env_float("SILICONFLOW_MAX_RATE", DEFAULT_MAX_RATE))
+        self.min_rate = min_rate
+        self.burst = burst or max(1.0, self.rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """按当前速率补充令牌"""
+        elapsed = now - self.updated
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """获取一个令牌，必要时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """请求成功：加性提高速率"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                # 每成功一轮(约rate个请求)速率加1
+                self.rate = min(self.max_rate, self.rate + 1.0 / max(self.rate, 1.0))
+                self.burst = max(1.0, self.rate)
+
+    def on_throttle(self, retry_after=None):
+        """
+        收到429：乘性降低速率并暂停发放令牌
+        参数:
+            retry_after: 服务端要求等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.burst = max(1.0, self.rate)
+            self.tokens = min(self.tokens, self.burst)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
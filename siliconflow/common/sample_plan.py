@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 试听样本矩阵规划
+
+根据任务描述文件(JSON，安装PyYAML后也可以用YAML)展开 文本模板 × 音色 × 参数组合 的样本矩阵：
+    {
+        "voices": "TTS/raw_text_files/CN.json",      # 音色列表JSON路径(相对描述文件)、路径列表或 {名称: URI}
+        "include": ["阿*"],                          # 可选，只处理名称匹配这些通配符的音色
+        "output_dir": "TTS/audio_sample/release-3",  # 可选，相对描述文件
+        "model": "FunAudioLLM/CosyVoice2-0.5B",
+        "format": "wav",
+        "templates": {                               # 名称 -> 文本，{audio_name_raw} 替换为音色名称；也可以是文本列表
+            "greeting": "初次见面，请多关照呀！这里是{audio_name_raw}",
+            "en": "英语<|endofprompt|>Lovely to meet you all!"
+        },
+        "variants": {"speed": [0.9, 1.0, 1.1], "gain": [-2, 0], "sample_rate": [44100]}
+    }
+
+每个单元输出到 <output_dir>/<音色>/<模板>_s<语速>_g<增益>_r<采样率>.<格式>。
+合成参数完全相同的单元(如重复的模板文本)只合成一次，其余单元复制结果。
+"""
+
+import fnmatch
+import itertools
+import json
+import os
+import re
+
+from common.journal import load_results
+from common.synthesis_cache import SynthesisCache
+
+DEFAULT_MODEL = "FunAudioLLM/CosyVoice2-0.5B"
+DEFAULT_FORMAT = "wav"
+
+# 未在描述文件中指定的参数取值
+DEFAULT_VARIANTS = {"speed": [1.0], "gain": [-2], "sample_rate": [44100]}
+
+# 文件名中不允许出现的字符(路径分隔符和控制字符)
+_UNSAFE_NAME_CHARS = re.compile(r'[\\/\x00-\x1f]')
+
+
+def safe_path_component(name):
+    """
+    把音色名称、模板名称转换为单个安全的路径组成部分，防止写到输出目录之外
+    参数:
+        name: 名称
+    返回:
+        替换了路径分隔符和控制字符的名称
+    """
+    component = _UNSAFE_NAME_CHARS.sub("_", str(name)).strip()
+    if component in ("", ".", ".."):
+        raise ValueError(f"无效的名称: {name!r}")
+    return component
+
+
+def load_spec(path):
+    """
+    读取任务描述文件
+    参数:
+        path: .json、.yaml 或 .yml 文件路径
+    返回:
+        dict: 任务描述
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("读取YAML任务描述需要安装PyYAML，或改用JSON格式")
+        spec = yaml.safe_load(content)
+    else:
+        spec = json.loads(content)
+    if not isinstance(spec, dict):
+        raise ValueError(f"任务描述格式错误，应为字典: {path}")
+    return spec
+
+
+def load_spec_voices(spec, base_dir="."):
+    """
+    读取任务描述中的音色
+    参数:
+        spec: 任务描述
+        base_dir: 相对路径的起始目录(一般为描述文件所在目录)
+    返回:
+        tuple: ({音色名称: URI}, 信息不完整而跳过的音色名称列表)
+    """
+    source = spec.get("voices")
+    if not source:
+        raise ValueError("任务描述中缺少 voices")
+
+    voices = {}
+    skipped = []
+    if isinstance(source, dict):
+        voices.update(source)
+    else:
+        for path in [source] if isinstance(source, str) else source:
+            # 与 batch_voice_sample 相同，读取 stt_to_tts.py 生成的音色列表(含尚未整理的结果日志)
+            for name, info in load_results(os.path.join(base_dir, path)).items():
+                if info.get("audio_name_raw") and info.get("uri"):
+                    voices[info["audio_name_raw"]] = info["uri"]
+                else:
+                    skipped.append(name)
+
+    patterns = spec.get("include")
+    if patterns:
+        voices = {name: uri for name, uri in voices.items()
+                  if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)}
+    return voices, skipped
+
+
+def make_job(name, uri, text, output_dir, file, model, response_format, sample_rate, speed, gain):
+    """
+    生成一个样本任务
+    参数:
+        name: 音色名称
+        uri: 音色URI
+        text: 合成文本
+        output_dir: 输出目录
+        file: 相对输出目录的文件路径
+        model/response_format/sample_rate/speed/gain: 合成参数
+    返回:
+        dict: name、uri、text、file、output_file、options(传给generate_speech的参数)、params_hash(合成缓存键)
+    """
+    return {
+        "name": name,
+        "uri": uri,
+        "text": text,
+        "file": file,
+        "output_file": os.path.join(output_dir, file),
+        "options": dict(model=model, response_format=response_format, sample_rate=sample_rate,
+                        speed=speed, gain=gain),
+        "params_hash": SynthesisCache.make_key(text, uri, model, speed, gain, sample_rate, response_format),
+    }
+
+
+def expand_spec(spec, voices, output_dir):
+    """
+    展开 模板 × 音色 × 参数组合 的样本矩阵
+    参数:
+        spec: 任务描述
+        voices: {音色名称: URI}
+        output_dir: 输出目录
+    返回:
+        任务列表，每项格式同 make_job 的返回值
+    """
+    templates = spec.get("templates")
+    if isinstance(templates, str):
+        templates = {"t0": templates}
+    elif isinstance(templates, list):
+        templates = {f"t{index}": text for index, text in enumerate(templates)}
+    if not templates:
+        raise ValueError("任务描述中缺少 templates")
+
+    model = spec.get("model", DEFAULT_MODEL)
+    response_format = spec.get("format", DEFAULT_FORMAT)
+    variants = dict(DEFAULT_VARIANTS)
+    for key, values in (spec.get("variants") or {}).items():
+        if key not in DEFAULT_VARIANTS:
+            raise ValueError(f"不支持的参数: {key}，可选: {', '.join(DEFAULT_VARIANTS)}")
+        variants[key] = values if isinstance(values, list) else [values]
+
+    # 描述文件中的数值可能写成字符串，统一类型后再用于文件名和缓存键
+    try:
+        speeds = [float(value) for value in variants["speed"]]
+        gains = [float(value) for value in variants["gain"]]
+        sample_rates = [int(float(value)) for value in variants["sample_rate"]]
+    except (TypeError, ValueError):
+        raise ValueError(f"variants 中的参数必须是数值: {variants}")
+
+    jobs = []
+    for template_name, template in templates.items():
+        template_part = safe_path_component(template_name)
+        for name, uri in voices.items():
+            text = template.replace("{audio_name_raw}", name)
+            for speed, gain, sample_rate in itertools.product(speeds, gains, sample_rates):
+                file = os.path.join(safe_path_component(name),
+                                    f"{template_part}_s{speed:g}_g{gain:g}_r{sample_rate}.{response_format}")
+                jobs.append(make_job(name, uri, text, output_dir, file, model, response_format,
+                                     sample_rate, speed, gain))
+    return jobs
+
+
+def dedupe_jobs(jobs):
+    """
+    按合成参数哈希合并相同的单元
+    参数:
+        jobs: 任务列表
+    返回:
+        tuple: (需要合成的任务列表, {参数哈希: 复用其结果的其他任务列表})
+    """
+    unique = {}
+    duplicates = {}
+    for job in jobs:
+        if job["params_hash"] in unique:
+            duplicates.setdefault(job["params_hash"], []).append(job)
+        else:
+            unique[job["params_hash"]] = job
+    return list(unique.values()), duplicates
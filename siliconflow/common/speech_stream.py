@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 流式语音响应模块
+
+将语音合成接口的流式响应包装为音频数据块的迭代器：
+- 数据块一到达就交给调用方，而不是等整个响应缓冲完
+- 支持边接收边写入文件，长文本在合成结束前即可开始播放
+- 记录首字节时间(TTFB)、总耗时和接收字节数
+- 可先写入同目录的临时文件，接收完整后再原子地替换目标文件
+"""
+
+import time
+
+from common.events import percentile
+from common.fs import atomic_open
+
+# 默认的数据块大小
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+class SpeechStream:
+    """流式语音响应，迭代时逐块产出音频数据"""
+
+    def __init__(self, response, started_at=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        参数:
+            response: 以 stream=True 发出的 requests.Response
+            started_at: 请求发出的时间点(time.perf_counter)，用于计算首字节时间
+            chunk_size: 每次读取的字节数
+        """
+        self.response = response
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.chunk_size = chunk_size
+        self.ttfb = None
+        self.elapsed = None
+        self.bytes_received = 0
+
+    def __iter__(self):
+        try:
+            for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+                if not chunk:
+                    continue
+                if self.ttfb is None:
+                    self.ttfb = time.perf_counter() - self.started_at
+                self.bytes_received += len(chunk)
+                yield chunk
+        finally:
+            self.elapsed = time.perf_counter() - self.started_at
+            self.response.close()
+
+    @property
+    def metrics(self):
+        """
+        传输指标
+        返回:
+            dict: ttfb(秒)、elapsed(秒)、bytes(字节数)、bytes_per_sec(字节/秒)
+        """
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started_at
+        return {
+            "ttfb": self.ttfb,
+            "elapsed": elapsed,
+            "bytes": self.bytes_received,
+            "bytes_per_sec": self.bytes_received / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def save(self, output_path, on_chunk=None, atomic=False):
+        """
+        边接收边写入文件
+        参数:
+            output_path: 输出文件路径
+            on_chunk: 每写入一块后的回调 (已接收字节数, 指标字典)
+            atomic: 为True时先写入同目录的临时文件，接收完整后再替换目标文件，
+                    中断或出错时不会留下半截音频(合成结束前无法边收边播)
+        返回:
+            传输指标字典
+        """
+        if not atomic:
+            with open(output_path, "wb") as f:
+                for chunk in self:
+                    f.write(chunk)
+                    # 及时落盘，便于播放器在合成结束前读取已到达的部分
+                    f.flush()
+                    if on_chunk:
+                        on_chunk(self.bytes_received, self.metrics)
+            return self.metrics
+
+        with atomic_open(output_path) as f:
+            for chunk in self:
+                f.write(chunk)
+                if on_chunk:
+                    on_chunk(self.bytes_received, self.metrics)
+        return self.metrics
+
+
+def summarize_metrics(metrics_list):
+    """
+    汇总多次合成的传输指标
+    参数:
+        metrics_list: 传输指标字典列表(可包含 cached 为True的缓存命中记录)
+    返回:
+        dict: count(请求数)、cached(缓存命中数)、bytes(接收总字节数)、
+              ttfb_p50/ttfb_p95/elapsed_p50/elapsed_p95(秒)、bytes_per_sec(请求期间的平均吞吐)
+    """
+    requested = [m for m in metrics_list if not m.get("cached")]
+    ttfbs = sorted(m["ttfb"] for m in requested if m.get("ttfb") is not None)
+    elapsed = sorted(m["elapsed"] for m in requested)
+    total_bytes = sum(m["bytes"] for m in requested)
+    total_elapsed = sum(elapsed)
+    return {
+        "count": len(requested),
+        "cached": len(metrics_list) - len(requested),
+        "bytes": total_bytes,
+        "ttfb_p50": percentile(ttfbs, 0.50),
+        "ttfb_p95": percentile(ttfbs, 0.95),
+        "elapsed_p50": percentile(elapsed, 0.50),
+        "elapsed_p95": percentile(elapsed, 0.95),
+        "bytes_per_sec": total_bytes / total_elapsed if total_elapsed > 0 else 0.0,
+    }
+
+
+def format_metrics_summary(summary):
+    """
+    把 summarize_metrics 的结果格式化为一行说明
+    返回:
+        str: 没有请求API时返回缓存命中说明
+    """
+    text = f"请求 {summary['count']} 次"
+    if summary["cached"]:
+        text += f"，缓存命中 {summary['cached']} 次"
+    if summary["count"]:
+        if summary["ttfb_p50"] is not None:
+            text += f"，首字节 p50 {summary['ttfb_p50']:.2f} 秒 / p95 {summary['ttfb_p95']:.2f} 秒"
+        text += (f"，单次耗时 p50 {summary['elapsed_p50']:.2f} 秒 / p95 {summary['elapsed_p95']:.2f} 秒"
+                 f"，共接收 {summary['bytes'] / 1024 / 1024:.2f} MB，平均 {summary['bytes_per_sec'] / 1024:.1f} KB/秒")
+    return text
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 语音合成结果缓存
+
+以合成参数 (文本, 语音, 模型, 语速, 增益, 采样率, 格式) 的哈希作为键，
+把合成得到的音频保存在共享缓存存储中。相同参数的请求直接返回缓存的音频，
+不再调用API；缓存容量和LRU淘汰由缓存存储统一管理。
+"""
+
+import json
+import threading
+
+from common.cache_store import get_cache_store
+from common.fs import atomic_write_bytes
+from common.hashing import text_digest
+
+
+class SynthesisCache:
+    """按合成参数寻址的音频缓存，记录命中/未命中次数"""
+
+    namespace = "speech"
+
+    def __init__(self, store=None):
+        """
+        参数:
+            store: 缓存存储(CacheStore)，默认使用进程内共享的存储
+        """
+        self.store = store or get_cache_store()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text, voice, model, speed, gain, sample_rate, response_format):
+        """
+        根据合成参数生成缓存键，数值参数统一类型后再参与哈希
+        返回:
+            缓存键字符串
+        """
+        params = [text, voice, model, float(speed), float(gain), int(sample_rate), response_format.lower()]
+        return text_digest(json.dumps(params, ensure_ascii=False), "sha256")
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_path(self, key):
+        """
+        获取缓存音频的文件路径
+        返回:
+            文件路径，未命中时返回None
+        """
+        path = self.store.get_file(self.namespace, key)
+        self._count(path is not None)
+        return path
+
+    def contains(self, key):
+        """是否已缓存，不计入命中统计"""
+        return self.store.get_file(self.namespace, key) is not None
+
+    def get(self, key):
+        """
+        读取缓存的音频数据
+        返回:
+            二进制音频数据，未命中时返回None
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def restore(self, key, output_path):
+        """
+        命中时把缓存的音频原子地写入输出文件
+        返回:
+            bool: 是否命中
+        """
+        data = self.get(key)
+        if data is None:
+            return False
+        atomic_write_bytes(output_path, data)
+        return True
+
+    def put(self, key, data, response_format="mp3"):
+        """
+        保存合成得到的音频
+        返回:
+            缓存文件路径
+        """
+        return self.store.put_file(self.namespace, key, data, suffix=f".{response_format.lower()}")
+
+    def put_file(self, key, path, response_format="mp3"):
+        """保存已写入磁盘的音频文件(按块复制，不读入内存)"""
+        return self.store.put_path(self.namespace, key, path, suffix=f".{response_format.lower()}")
+
+    def stats(self):
+        """
+        命中统计
+        返回:
+            dict: hits、misses、hit_rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_synthesis_cache():
+    """
+    获取进程内共享的语音合成缓存
+    返回:
+        SynthesisCache
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SynthesisCache()
+    return _cache
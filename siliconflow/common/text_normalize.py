@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 转录文本规范化
+
+转录结果中常带有emoji、音乐符号等，上传自定义语音前需要去掉。这里按Unicode类别判断，
+而不是逐个列举emoji：
+- 删除其他符号(So，绝大部分emoji、♪、♫)、修饰符号(Sk，肤色修饰等)、私用区(Co)、
+  代理项(Cs)和未分配码位(Cn，比当前Python更新的Unicode版本中新增的emoji)
+- 删除emoji组合用的零宽连接符、变体选择符、键帽组合符和标签字符
+- ASCII字符、° ℃ № 等常用单位符号和日文浊音符号保持不变，中日韩、印尼语等文字和标点不受影响
+- 连续空白合并为一个空格并去除首尾空白
+
+每个字符的判断结果缓存在翻译表中，之后同一字符只需一次字典查找，
+整段文本用一次 str.translate 完成过滤。
+
+基准测试：
+    python -m common.text_normalize --benchmark
+"""
+
+import argparse
+import logging
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# 需要删除的Unicode类别
+STRIP_CATEGORIES = frozenset({"So", "Sk", "Co", "Cs", "Cn"})
+
+# 虽然属于上述类别但需要保留的字符
+KEEP_CHARS = frozenset("°℃℉№゛゜")
+
+# emoji组合序列中使用的字符(不属于上述类别)
+_EMOJI_COMPONENTS = (
+    [0x200D, 0x20E3, 0xFEFF]                # 零宽连接符、键帽组合符、BOM
+    + list(range(0xFE00, 0xFE10))           # 变体选择符
+    + list(range(0xE0020, 0xE0080))         # 标签字符(旗帜序列)
+    + list(range(0xE0100, 0xE01F0))         # 补充变体选择符
+)
+
+
+class _TranslationTable(dict):
+    """按需构建的翻译表：首次遇到某个字符时判断是否删除，结果缓存供之后复用"""
+
+    def __missing__(self, code):
+        char = chr(code)
+        if code < 0x80 or char in KEEP_CHARS or unicodedata.category(char) not in STRIP_CATEGORIES:
+            value = code
+        else:
+            value = None
+        self[code] = value
+        return value
+
+
+_table = _TranslationTable((code, None) for code in _EMOJI_COMPONENTS)
+
+
+def normalize_text(text):
+    """
+    去除文本中的emoji和特殊符号，并规范化空白
+    参数:
+        text: 原始文本
+    返回:
+        规范化后的文本；过滤后为空时返回原文本
+    """
+    if not text:
+        return ""
+
+    normalized = " ".join(text.translate(_table).split())
+    if not normalized:
+        logger.warning("过滤后文本为空，使用原文本: %s", text[:30])
+        return text
+
+    logger.debug("过滤前文本长度: %d，过滤后文本长度: %d，过滤后文本: %s",
+                 len(text), len(normalized), normalized[:20])
+    return normalized
+
+
+def normalize_many(texts):
+    """
+    批量规范化文本
+    参数:
+        texts: 文本的可迭代对象
+    返回:
+        规范化后的文本列表，顺序与输入一致
+    """
+    started = time.perf_counter()
+    results = [normalize_text(text) for text in texts]
+    if logger.isEnabledFor(logging.INFO):
+        elapsed = time.perf_counter() - started
+        logger.info("规范化 %d 段文本，耗时 %.2f 毫秒", len(results), elapsed * 1000)
+    return results
+
+
+# 基准测试使用的样例转录文本
+_BENCHMARK_SAMPLES = [
+    "🎼大家好😊，今天天气真不错！我们一起去公园散步吧🎵🎶",
+    "Hello everyone 👋🏽, welcome to the show! 👨‍👩‍👧‍👦 Let's get started 🚀",
+    "こんにちは♪ きこえていますか？初めまして、よろしくお願いします😄",
+    "Selamat pagi 🇮🇩 semuanya, apa kabar hari ini? 🙏",
+    "안녕하세요~ 오늘도 화이팅!! 💪🔥 온도는 25℃ 입니다",
+    "   多余的   空白\t和换行\n也会被合并   ",
+]
+
+
+def benchmark(samples=None, repeat=2000):
+    """
+    规范化速度基准测试
+    参数:
+        samples: 样例文本列表，默认使用内置的多语言样例
+        repeat: 重复次数
+    返回:
+        dict: texts(处理的文本段数)、chars(字符数)、seconds(耗时)、
+              us_per_text(每段微秒数)、chars_per_second(每秒字符数)
+    """
+    samples = samples or _BENCHMARK_SAMPLES
+    texts = samples * repeat
+    chars = sum(len(text) for text in texts)
+    # 预热，排除翻译表首次构建的开销
+    normalize_many(samples)
+
+    started = time.perf_counter()
+    normalize_many(texts)
+    seconds = time.perf_counter() - started
+    return {
+        "texts": len(texts),
+        "chars": chars,
+        "seconds": seconds,
+        "us_per_text": seconds / len(texts) * 1e6,
+        "chars_per_second": chars / seconds if seconds else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="转录文本规范化")
+    parser.add_argument("text", nargs="*", help="要规范化的文本")
+    parser.add_argument("--benchmark", action="store_true", help="运行规范化速度基准测试")
+    parser.add_argument("--repeat", type=int, default=2000, help="基准测试的重复次数 (默认: 2000)")
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="日志级别 (默认: WARNING)")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s %(name)s: %(message)s")
+
+    if args.benchmark:
+        result = benchmark(repeat=args.repeat)
+        print(f"文本段数: {result['texts']}，字符数: {result['chars']}")
+        print(f"总耗时: {result['seconds'] * 1000:.2f} 毫秒")
+        print(f"每段耗时: {result['us_per_text']:.2f} 微秒，吞吐: {result['chars_per_second'] / 1e6:.2f} 百万字符/秒")
+        return
+
+    for text in normalize_many(args.text):
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
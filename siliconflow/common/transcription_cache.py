@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 转录结果缓存
+
+以"音频内容哈希 + 模型名称"作为缓存键，命令行脚本与Web界面共用同一个缓存存储：
+- 临时路径、重命名后的文件，只要内容相同就能命中缓存
+- 对同一路径记录 (文件大小, 修改时间) -> 内容哈希，文件未变化时无需重新计算哈希
+"""
+
+from common.cache_store import get_cache_store
+from common.hashing import bytes_digest
+
+# 默认的转录模型
+DEFAULT_TRANSCRIPTION_MODEL = "FunAudioLLM/SenseVoiceSmall"
+
+
+class TranscriptionCache:
+    """基于内容哈希的转录结果缓存"""
+
+    namespace = "transcription"
+
+    def __init__(self, store=None):
+        """
+        参数:
+            store: 缓存存储(CacheStore)，默认使用进程内共享的存储
+        """
+        self.store = store or get_cache_store()
+
+    def content_digest(self, audio_path):
+        """获取音频文件的内容哈希"""
+        return self.store.content_digest(audio_path)
+
+    def get(self, audio_path, model):
+        """
+        读取缓存的转录结果
+        参数:
+            audio_path: 音频文件路径
+            model: 转录模型名称
+        返回:
+            转录结果字典，未命中时返回None
+        """
+        try:
+            digest = self.content_digest(audio_path)
+        except OSError:
+            return None
+        return self.store.get_value(self.namespace, f"{digest}:{model}")
+
+    def put(self, audio_path, model, result):
+        """
+        保存转录结果
+        参数:
+            audio_path: 音频文件路径
+            model: 转录模型名称
+            result: API返回的转录结果字典
+        """
+        digest = self.content_digest(audio_path)
+        self.store.put_value(self.namespace, f"{digest}:{model}", result)
+
+    def get_bytes(self, audio_data, model):
+        """
+        按音频数据读取缓存的转录结果，与内容相同的文件共用缓存键
+        参数:
+            audio_data: 音频二进制数据
+            model: 转录模型名称
+        返回:
+            转录结果字典，未命中时返回None
+        """
+        return self.store.get_value(self.namespace, f"{bytes_digest(audio_data)}:{model}")
+
+    def put_bytes(self, audio_data, model, result):
+        """
+        按音频数据保存转录结果
+        参数:
+            audio_data: 音频二进制数据
+            model: 转录模型名称
+            result: API返回的转录结果字典
+        """
+        self.store.put_value(self.namespace, f"{bytes_digest(audio_data)}:{model}", result)
+
+    def clear_expired(self, max_age_seconds):
+        """
+        删除超过指定时间的缓存条目
+        返回:
+            删除的条目数
+        """
+        return self.store.clear_expired(max_age_seconds, self.namespace)
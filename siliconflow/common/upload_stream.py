@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 流式语音上传模块
+
+上传自定义语音时，接口要求音频以 data URI(base64) 的形式放在JSON请求体中。
+这里的请求体对象会边读取音频文件边进行base64编码，按块交给HTTP连接发送，
+无论音频多大，内存中只保留一个编码块，不再需要把整个文件及其base64字符串读入内存。
+"""
+
+import base64
+import io
+import json
+import os
+
+# 每次读取的原始字节数，必须是3的倍数，保证分块编码后直接拼接仍是合法的base64
+READ_CHUNK_SIZE = 3 * 16 * 1024
+
+# 默认的语音模型
+DEFAULT_VOICE_MODEL = "FunAudioLLM/CosyVoice2-0.5B"
+
+
+class DataURIJSONBody(io.RawIOBase):
+    """
+    以流的方式生成 {"...": ..., "audio": "data:<mime>;base64,<...>"} 形式的JSON请求体
+
+    请求体长度可以预先计算，因此请求会带上Content-Length而不是分块传输；
+    支持 seek/tell，连接失败或被限流时可以重发。
+    """
+
+    def __init__(self, audio_path, fields=None, mime_type="audio/mpeg", field_name="audio"):
+        """
+        参数:
+            audio_path: 音频文件路径
+            fields: 其他JSON字段，如 customName、text、model
+            mime_type: data URI中的音频MIME类型
+            field_name: 音频数据所在的字段名
+        """
+        super().__init__()
+        self.audio_path = audio_path
+        audio_size = os.path.getsize(audio_path)
+
+        # JSON前缀：其他字段 + 音频字段的开头；base64字符无需JSON转义
+        head = json.dumps(fields or {}, ensure_ascii=False)[:-1]
+        if fields:
+            head += ", "
+        head += f'"{field_name}": "data:{mime_type};base64,'
+        self._prefix = head.encode("utf-8")
+        self._suffix = b'"}'
+        self._length = len(self._prefix) + 4 * ((audio_size + 2) // 3) + len(self._suffix)
+
+        self._chunks = None
+        self._buffer = b""
+        self._position = 0
+        self.seek(0)
+
+    def _generate(self):
+        """依次生成请求体的各个数据块"""
+        yield self._prefix
+        with open(self.audio_path, "rb") as f:
+            while True:
+                block = f.read(READ_CHUNK_SIZE)
+                if not block:
+                    break
+                yield base64.b64encode(block)
+        yield self._suffix
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """重新定位读取位置；向后定位时从头重新生成数据"""
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._length
+        offset = max(0, min(offset, self._length))
+
+        if offset < self._position or self._chunks is None:
+            if self._chunks is not None:
+                self._chunks.close()
+            self._chunks = self._generate()
+            self._buffer = b""
+            self._position = 0
+        if offset > self._position:
+            self.read(offset - self._position)
+        return self._position
+
+    def read(self, size=-1):
+        """读取最多size个字节，size<0时读取剩余全部内容"""
+        if size is None or size < 0:
+            size = self._length - self._position
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def __iter__(self):
+        while True:
+            data = self.read(READ_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+    def close(self):
+        if self._chunks is not None:
+            self._chunks.close()
+        super().close()
+
+
+def post_voice_upload(transport, api_key, audio_path, custom_name, text=None,
+                      model=DEFAULT_VOICE_MODEL, mime_type="audio/mpeg"):
+    """
+    以流式请求体上传自定义语音
+    参数:
+        transport: 共享HTTP传输对象
+        api_key: API密钥
+        audio_path: 音频文件路径
+        custom_name: 自定义语音名称
+        text: 音频中的朗读文本(可选)
+        model: 语音模型
+        mime_type: 音频MIME类型
+    返回:
+        requests.Response
+    """
+    fields = {"customName": custom_name, "model": model}
+    if text:
+        fields["text"] = text
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    body = DataURIJSONBody(audio_path, fields, mime_type=mime_type)
+    try:
+        return transport.post("/uploads/audio/voice", headers=headers, data=body)
+    finally:
+        body.close()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow语音工具集 - 本地音色注册表
+
+在SQLite数据库中保存自定义音色，按名称、URI、音频内容哈希建立索引，查找时不再需要
+请求整个音色列表再逐个比对 customName：
+- 上传成功后立即按响应写入注册表
+- 与远程音色列表按TTL增量同步：只写入新增和有变化的音色，删除远程已不存在的音色
+- 删除音色后同步移除本地记录
+
+数据库位于缓存目录下的 voices.db(见 common.cache_store.get_cache_root)，
+命令行脚本与Web界面共用。
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+from common.cache_store import get_cache_root
+from common.http_client import get_transport
+
+# 默认同步间隔(秒)，超过后下一次需要远程数据的查找会先同步
+DEFAULT_SYNC_TTL = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS voices (
+    uri TEXT PRIMARY KEY,
+    custom_name TEXT,
+    model TEXT,
+    text TEXT,
+    content_digest TEXT,
+    updated REAL NOT NULL,
+    seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_voices_name ON voices(custom_name);
+CREATE INDEX IF NOT EXISTS idx_voices_digest ON voices(content_digest);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 远程列表中的音色：只在字段有变化时更新，内容哈希只能来自本地上传，同步时保留
+_UPSERT_REMOTE = """
+INSERT INTO voices (uri, custom_name, model, text, content_digest, updated, seen)
+VALUES (?, ?, ?, ?, NULL, ?, ?)
+ON CONFLICT (uri) DO UPDATE SET
+    custom_name = excluded.custom_name, model = excluded.model, text = excluded.text,
+    updated = CASE
+        WHEN voices.custom_name IS excluded.custom_name
+         AND voices.model IS excluded.model
+         AND voices.text IS excluded.text THEN voices.updated
+        ELSE excluded.updated END,
+    seen = excluded.seen
+"""
+
+_COLUMNS = ("uri", "custom_name", "model", "text", "content_digest", "updated", "seen")
+
+
+def fetch_remote_voices(api_key):
+    """
+    请求远程自定义音色列表
+    参数:
+        api_key: API密钥
+    返回:
+        dict: 接口返回的音色列表，形如 {"result": [...]}
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    response = get_transport().get("/audio/voice/list", headers=headers)
+    if response.status_code != 200:
+        raise RuntimeError(f"获取音色列表失败: {response.status_code} - {response.text}")
+    return response.json()
+
+
+class VoiceRegistry:
+    """本地音色注册表，可多线程、多进程同时使用"""
+
+    def __init__(self, db_path=None, sync_ttl=DEFAULT_SYNC_TTL):
+        """
+        参数:
+            db_path: 数据库路径，默认为缓存目录下的 voices.db
+            sync_ttl: 与远程列表同步的间隔(秒)
+        """
+        self.db_path = db_path or os.path.join(get_cache_root(), "voices.db")
+        self.sync_ttl = sync_ttl
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """写事务：开始时即获取写锁"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _find(self, column, value):
+        row = self._connect().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM voices WHERE {column} = ? ORDER BY updated DESC LIMIT 1",
+            (value,)
+        ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def find_by_name(self, custom_name):
+        """按自定义名称查找音色，未找到时返回None；同名音色有多个时返回最近更新的"""
+        return self._find("custom_name", custom_name)
+
+    def find_by_uri(self, uri):
+        """按URI查找音色，未找到时返回None"""
+        return self._find("uri", uri)
+
+    def find_by_digest(self, content_digest):
+        """按上传音频的内容哈希查找音色，未找到时返回None"""
+        return self._find("content_digest", content_digest)
+
+    def all(self):
+        """返回全部音色，按名称排序"""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM voices ORDER BY custom_name"
+        ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM voices").fetchone()[0]
+
+    def add(self, uri, custom_name, model=None, text=None, content_digest=None):
+        """
+        写入上传成功的音色
+        参数:
+            uri: 音色URI
+            custom_name: 自定义名称
+            model: 模型名称
+            text: 朗读文本
+            content_digest: 上传音频的内容哈希
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO voices (uri, custom_name, model, text, content_digest, updated, seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (uri) DO UPDATE SET
+                    custom_name = excluded.custom_name,
+                    model = COALESCE(excluded.model, voices.model),
+                    text = COALESCE(excluded.text, voices.text),
+                    content_digest = COALESCE(excluded.content_digest, voices.content_digest),
+                    updated = excluded.updated, seen = excluded.seen
+                """,
+                (uri, custom_name, model, text, content_digest, now, now)
+            )
+
+    def remove(self, uris):
+        """
+        移除已删除的音色
+        参数:
+            uris: URI或URI列表
+        返回:
+            移除的条目数
+        """
+        if isinstance(uris, str):
+            uris = [uris]
+        with self._transaction() as conn:
+            return sum(conn.execute("DELETE FROM voices WHERE uri = ?", (uri,)).rowcount for uri in uris)
+
+    def last_sync(self):
+        """上次同步的时间戳，从未同步时返回None"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return float(row[0]) if row else None
+
+    def is_stale(self):
+        """是否超过同步间隔"""
+        last_sync = self.last_sync()
+        return last_sync is None or time.time() - last_sync > self.sync_ttl
+
+    def sync_from(self, voices_data, started=None):
+        """
+        用已获取的远程音色列表同步注册表
+        参数:
+            voices_data: 接口返回的音色列表，形如 {"result": [...]}
+            started: 请求音色列表之前的时间戳(time.time)，此后写入的音色不会被当作已删除；
+                     为None时使用当前时间
+        返回:
+            dict: added、updated、removed 条目数
+        """
+        voices = voices_data.get("result", []) if isinstance(voices_data, dict) else voices_data
+        if started is None:
+            started = time.time()
+        with self._transaction() as conn:
+            known = {row[0]: row[1] for row in conn.execute("SELECT uri, updated FROM voices")}
+            added = updated = 0
+            for voice in voices:
+                uri = voice.get("uri")
+                if not uri:
+                    continue
+                conn.execute(_UPSERT_REMOTE, (
+                    uri, voice.get("customName"), voice.get("model"), voice.get("text"), started, started
+                ))
+                if uri not in known:
+                    added += 1
+                elif conn.execute("SELECT updated FROM voices WHERE uri = ?", (uri,)).fetchone()[0] != known[uri]:
+                    updated += 1
+            # 本次列表中没有出现的音色已在远程删除(请求列表期间新写入的音色 seen 不早于 started，不会被误删)
+            removed = conn.execute("DELETE FROM voices WHERE seen < ?", (started,)).rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (str(started),)
+            )
+        return {"added": added, "updated": updated, "removed": removed}
+
+    def sync(self, api_key, force=False, since=None):
+        """
+        注册表过期(或force为True)时请求远程音色列表并同步
+        参数:
+            api_key: API密钥
+            force: 是否忽略同步间隔
+            since: 时间戳，上次同步早于该时间时也同步(如批量处理开始的时间，保证每次运行至少同步一次)
+        返回:
+            dict: 同步统计；未到同步时间时返回None
+        """
+        with self._sync_lock:
+            synced_since = since is None or (self.last_sync() or 0) >= since
+            if not force and not self.is_stale() and synced_since:
+                return None
+            # 在请求之前取时间戳，列表请求进行中由其他线程 add 的音色不会被删除
+            started = time.time()
+            return self.sync_from(fetch_remote_voices(api_key), started)
+
+    def resolve_name(self, custom_name, api_key=None):
+        """
+        按名称查找音色URI：先查本地，未找到且提供了API密钥时同步一次后再查
+        参数:
+            custom_name: 自定义名称
+            api_key: API密钥，为None时只查本地
+        返回:
+            音色URI，未找到时返回None
+        """
+        voice = self.find_by_name(custom_name)
+        if voice is None and api_key:
+            self.sync(api_key, force=True)
+            voice = self.find_by_name(custom_name)
+        return voice["uri"] if voice else None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_voice_registry():
+    """
+    获取进程内共享的音色注册表
+    返回:
+        VoiceRegistry
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VoiceRegistry()
+    return _registry
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SiliconFlow API 本地模拟服务
+
+在本地实现流水线用到的五个接口，离线进行压测和回归测试，不消耗真实API额度：
+    POST /v1/audio/transcriptions    语音转文本(multipart)，返回 {"text": ...}
+    POST /v1/audio/speech            语音合成，支持 stream 为 true 的分块传输，返回 wav/pcm/mp3 音频
+    POST /v1/uploads/audio/voice     上传自定义语音(JSON + base64 data URI)，返回 {"result": {"uri": ...}}
+    GET  /v1/audio/voice/list        自定义语音列表，返回 {"result": [...]}
+    POST /v1/audio/voice/deletions   删除自定义语音
+响应格式与本仓库命令行工具和Web界面解析的格式一致；上传的音色保存在内存中，服务重启后清空。
+合成和删除接口接受任何格式正确的音色URI(如 TTS/raw_text_files/CN.json 中已有的音色)，
+只有通过模拟服务删除过的URI才返回音色不存在。
+
+可配置的行为：
+- 每个接口的延迟分布(合成接口为首字节时间)：fixed:秒、uniform:最小,最大、normal:均值,标准差、
+  lognormal:mu,sigma、exp:均值
+- 按比例注入429(带 Retry-After)和500/502/503错误
+- 全局每秒请求数上限，超出时返回429
+- 每个响应的下载带宽上限(KB/秒)
+
+使用方法:
+    python mock_api_server.py --port 8765 --latency speech=lognormal:-1.2,0.4 --error-429 0.05 --bandwidth 256
+    # 另一个终端中，命令行工具和Web界面都通过 SILICONFLOW_API_URL 指向模拟服务
+    SILICONFLOW_API_URL=http://127.0.0.1:8765 python stt_to_tts.py -d <音频目录路径>
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import string
+import struct
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# (请求方法, 路径) -> 接口名称
+ENDPOINTS = {
+    ("POST", "/v1/audio/transcriptions"): "transcribe",
+    ("POST", "/v1/audio/speech"): "speech",
+    ("POST", "/v1/uploads/audio/voice"): "upload",
+    ("GET", "/v1/audio/voice/list"): "voices",
+    ("POST", "/v1/audio/voice/deletions"): "delete",
+}
+
+# 各接口默认的延迟分布(中位数约为 转录0.5秒、合成首字节0.37秒)
+DEFAULT_LATENCY = {
+    "transcribe": "lognormal:-0.7,0.4",
+    "speech": "lognormal:-1.0,0.4",
+    "upload": "uniform:0.3,0.8",
+    "voices": "uniform:0.05,0.15",
+    "delete": "uniform:0.05,0.2",
+}
+
+# 自定义语音名称的格式要求
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# 自定义语音URI的格式：speech:<名称>:<账号>:<随机串>
+_URI_PATTERN = re.compile(r"^speech:[A-Za-z0-9_-]{1,64}:[A-Za-z0-9]+:[A-Za-z0-9]+$")
+
+# 音频格式 -> Content-Type
+_AUDIO_TYPES = {"wav": "audio/wav", "pcm": "audio/pcm", "mp3": "audio/mpeg"}
+
+
+def parse_latency(spec):
+    """
+    解析延迟分布
+    参数:
+        spec: 如 "0.2"、"fixed:0.2"、"uniform:0.1,0.5"、"normal:0.3,0.05"、"lognormal:-1,0.4"、"exp:0.3"
+    返回:
+        采样函数，参数为 random.Random，返回延迟秒数(不小于0)
+    """
+    kind, _, values = spec.partition(":")
+    if not values:
+        kind, values = "fixed", kind
+    try:
+        params = [float(value) for value in values.split(",")]
+    except ValueError:
+        raise ValueError(f"无效的延迟分布参数: {spec}")
+
+    samplers = {
+        ("fixed", 1): lambda rng: params[0],
+        ("uniform", 2): lambda rng: rng.uniform(params[0], params[1]),
+        ("normal", 2): lambda rng: rng.gauss(params[0], params[1]),
+        ("lognormal", 2): lambda rng: rng.lognormvariate(params[0], params[1]),
+        ("exp", 1): lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0,
+    }
+    sampler = samplers.get((kind, len(params)))
+    if sampler is None:
+        raise ValueError(f"无效的延迟分布: {spec}，可选 fixed:秒、uniform:最小,最大、normal:均值,标准差、"
+                         f"lognormal:mu,sigma、exp:均值")
+    return lambda rng: max(0.0, sampler(rng))
+
+
+def _wav_bytes(duration, sample_rate):
+    """生成指定时长的16位单声道WAV(低音量220Hz正弦波)"""
+    period = [int(3000 * math.sin(2 * math.pi * 220 * i / sample_rate)) for i in range(sample_rate)]
+    one_second = struct.pack(f"<{sample_rate}h", *period)
+    frames = int(duration * sample_rate)
+    pcm = (one_second * (frames // sample_rate + 1))[:frames * 2]
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE", b"fmt ", 16, 1, 1,
+        sample_rate, sample_rate * 2, 2, 16, b"data", len(pcm)
+    )
+    return header + pcm
+
+
+def _mp3_bytes(duration):
+    """生成指定时长的静音MP3(MPEG-1 Layer III，128kbps，44.1kHz)"""
+    frame = b"\xff\xfb\x90\x64" + b"\x00" * 413
+    return frame * max(1, int(duration * 44100 / 1152))
+
+
+def synthesize_audio(text, response_format="mp3", sample_rate=32000, speed=1.0):
+    """
+    生成模拟的合成音频，时长随文本长度增加
+    返回:
+        音频二进制数据
+    """
+    duration = min(60.0, 0.5 + 0.15 * len(text)) / max(speed, 0.25)
+    if response_format == "mp3":
+        return _mp3_bytes(duration)
+    wav = _wav_bytes(duration, sample_rate)
+    return wav[44:] if response_format == "pcm" else wav
+
+
+class _RequestRateLimit:
+    """全局每秒请求数上限(令牌桶)"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        # 桶容量至少为1，每秒不足1个请求的上限也能放行
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        返回:
+            None 表示放行；否则为建议的等待秒数
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate
+
+
+class MockAPIServer:
+    """模拟服务，可在命令行运行，也可以在测试代码中于后台线程启动"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, latency=None, error_429=0.0, error_5xx=0.0,
+                 retry_after=1.0, rate_limit=None, bandwidth=None, chunk_size=4096, seed=None, quiet=False):
+        """
+        参数:
+            host/port: 监听地址，port 为0时自动选择空闲端口
+            latency: {接口名称: 延迟分布}，未指定的接口使用 DEFAULT_LATENCY
+            error_429: 注入429的比例(0~1)
+            error_5xx: 注入500/502/503的比例(0~1)
+            retry_after: 429响应的 Retry-After 秒数
+            rate_limit: 全局每秒请求数上限，为None时不限制
+            bandwidth: 每个响应的下载带宽上限(字节/秒)，为None时不限制
+            chunk_size: 音频响应每次写出的字节数
+            seed: 随机数种子，便于复现
+            quiet: 是否关闭逐条请求日志
+        """
+        specs = dict(DEFAULT_LATENCY)
+        specs.update(latency or {})
+        unknown = set(specs) - set(DEFAULT_LATENCY)
+        if unknown:
+            raise ValueError(f"未知的接口: {', '.join(sorted(unknown))}，可选: {', '.join(DEFAULT_LATENCY)}")
+        self.latency = {name: parse_latency(spec) for name, spec in specs.items()}
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.retry_after = retry_after
+        self.rate_limit = _RequestRateLimit(rate_limit) if rate_limit else None
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.quiet = quiet
+
+        self.voices = {}
+        # 通过模拟服务删除过的URI；其余格式正确的URI(如已有音色列表中的音色)都视为存在
+        self.deleted = set()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: defaultdict(int))
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """服务地址，可直接作为 SILICONFLOW_API_URL"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random(self):
+        with self._lock:
+            return self._rng.random()
+
+    def sample_latency(self, endpoint):
+        with self._lock:
+            return self.latency[endpoint](self._rng)
+
+    def random_id(self, length=20):
+        with self._lock:
+            return "".join(self._rng.choice(string.ascii_lowercase) for _ in range(length))
+
+    def choose_error(self):
+        with self._lock:
+            return self._rng.choice((500, 502, 503))
+
+    def record(self, endpoint, status):
+        with self._lock:
+            self._stats[endpoint][status] += 1
+
+    def stats(self):
+        """
+        返回:
+            dict: 接口名称 -> {状态码: 次数}
+        """
+        with self._lock:
+            return {endpoint: dict(statuses) for endpoint, statuses in self._stats.items()}
+
+    def start(self):
+        """在后台线程中启动服务，返回服务地址"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-api-server", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """请求处理：鉴权 -> 限流与错误注入 -> 模拟延迟 -> 接口逻辑"""
+
+    # 保持连接，与真实服务一样可以复用连接池
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        if not self.server.mock.quiet:
+            super().log_message(format, *args)
+
+    def _read_body(self):
+        """读取请求体，支持Content-Length和分块传输"""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def _send_error(self, status, message, headers=None):
+        self._send_json(status, {"code": status, "message": message, "data": None}, headers=headers)
+
+    def _dispatch(self, method):
+        mock = self.server.mock
+        endpoint = ENDPOINTS.get((method, urlparse(self.path).path.rstrip("/")))
+        body = self._read_body()
+        if endpoint is None:
+            self._send_error(404, f"Not Found: {method} {self.path}")
+            return
+
+        status = self._handle(mock, endpoint, body)
+        mock.record(endpoint, status)
+
+    def _handle(self, mock, endpoint, body):
+        """处理一个已识别的接口请求，返回响应状态码"""
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._send_error(401, "Invalid token")
+            return 401
+
+        if mock.rate_limit:
+            wait = mock.rate_limit.acquire()
+            if wait is not None:
+                self._send_error(429, "Request was rejected due to rate limiting",
+                                 headers={"Retry-After": f"{max(wait, mock.retry_after):.2f}"})
+                return 429
+
+        chance = mock.random()
+        if chance < mock.error_429:
+            self._send_error(429, "Request was rejected due to rate limiting",
+                             headers={"Retry-After": f"{mock.retry_after:g}"})
+            return 429
+        if chance < mock.error_429 + mock.error_5xx:
+            status = mock.choose_error()
+            self._send_error(status, "Injected server error")
+            return status
+
+        time.sleep(mock.sample_latency(endpoint))
+
+        try:
+            return getattr(self, f"_{endpoint}")(mock, body)
+        except (ValueError, KeyError) as e:
+            self._send_error(400, f"Invalid request: {e}")
+            return 400
+
+    def _transcribe(self, mock, body):
+        match = re.search(rb'name="file"; filename="([^"]*)"', body)
+        if not match:
+            self._send_error(400, "missing file")
+            return 400
+        file_name = match.group(1).decode("utf-8", "replace")
+        self._send_json(200, {"text": f"这是{file_name}的模拟转录文本。"})
+        return 200
+
+    def _upload(self, mock, body):
+        data = json.loads(body)
+        custom_name = data.get("customName", "")
+        if not _NAME_PATTERN.match(custom_name):
+            self._send_error(400, "customName只能包含字母、数字、下划线和连字符，长度不超过64")
+            return 400
+        if not str(data.get("audio", "")).startswith("data:"):
+            self._send_error(400, "audio必须是base64编码的data URI")
+            return 400
+        uri = f"speech:{custom_name}:mock:{mock.random_id()}"
+        with mock._lock:
+            mock.voices[uri] = {
+                "model": data.get("model", ""),
+                "customName": custom_name,
+                "text": data.get("text", ""),
+                "uri": uri,
+            }
+        self._send_json(200, {"result": {"uri": uri}})
+        return 200
+
+    def _voices(self, mock, body):
+        with mock._lock:
+            voices = list(mock.voices.values())
+        self._send_json(200, {"result": voices})
+        return 200
+
+    def _delete(self, mock, body):
+        uri = json.loads(body)["uri"]
+        with mock._lock:
+            found = mock.voices.pop(uri, None) is not None or (
+                _URI_PATTERN.match(uri) is not None and uri not in mock.deleted
+            )
+            if found:
+                mock.deleted.add(uri)
+        if not found:
+            self._send_error(404, f"voice not found: {uri}")
+            return 404
+        self._send_json(200, {})
+        return 200
+
+    def _speech(self, mock, body):
+        data = json.loads(body)
+        text = data["input"]
+        voice = data["voice"]
+        response_format = data.get("response_format", "mp3").lower()
+        if response_format not in _AUDIO_TYPES:
+            self._send_error(400, f"不支持的音频格式: {response_format}")
+            return 400
+        if voice.startswith("speech:"):
+            with mock._lock:
+                deleted = voice in mock.deleted
+            if deleted or not _URI_PATTERN.match(voice):
+                self._send_error(400, f"voice not found: {voice}")
+                return 400
+
+        audio = synthesize_audio(text, response_format, int(data.get("sample_rate") or 32000),
+                                 float(data.get("speed") or 1.0))
+        streaming = bool(data.get("stream"))
+
+        self.send_response(200)
+        self.send_header("Content-Type", _AUDIO_TYPES[response_format])
+        if streaming:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+
+        # 按带宽上限分块写出
+        started = time.perf_counter()
+        sent = 0
+        for offset in range(0, len(audio), mock.chunk_size):
+            chunk = audio[offset:offset + mock.chunk_size]
+            if streaming:
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+            else:
+                self.wfile.write(chunk)
+            self.wfile.flush()
+            sent += len(chunk)
+            if mock.bandwidth:
+                delay = started + sent / mock.bandwidth - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        if streaming:
+            self.wfile.write(b"0\r\n\r\n")
+        return 200
+
+
+def print_stats(stats):
+    """打印各接口的响应状态码统计"""
+    print("\n======= 请求统计 =======")
+    for endpoint in DEFAULT_LATENCY:
+        statuses = stats.get(endpoint)
+        if statuses:
+            detail = "，".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+            print(f"{endpoint:<12}{sum(statuses.values()):>6} 次 ({detail})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SiliconFlow API 本地模拟服务")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址 (默认: {DEFAULT_HOST})")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"监听端口 (默认: {DEFAULT_PORT})")
+    parser.add_argument("--latency", action="append", metavar="接口=分布",
+                        help=f"接口延迟分布，接口可选 {', '.join(DEFAULT_LATENCY)} 或 all，"
+                             f"如 speech=lognormal:-1.2,0.4；可多次指定")
+    parser.add_argument("--error-429", type=float, default=0.0, help="注入429的比例，0~1 (默认: 0)")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="注入500/502/503的比例，0~1 (默认: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429响应的Retry-After秒数 (默认: 1)")
+    parser.add_argument("--rate-limit", type=float, help="全局每秒请求数上限，超出时返回429")
+    parser.add_argument("--bandwidth", type=float, help="每个响应的下载带宽上限，单位KB/秒")
+    parser.add_argument("--seed", type=int, help="随机数种子")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出逐条请求日志")
+    args = parser.parse_args()
+
+    latency = {}
+    for item in args.latency or []:
+        endpoint, _, spec = item.partition("=")
+        if not spec:
+            parser.error(f"--latency 格式应为 接口=分布: {item}")
+        for name in (DEFAULT_LATENCY if endpoint == "all" else [endpoint]):
+            latency[name] = spec
+
+    try:
+        server = MockAPIServer(
+            args.host, args.port, latency=latency, error_429=args.error_429, error_5xx=args.error_5xx,
+            retry_after=args.retry_after, rate_limit=args.rate_limit,
+            bandwidth=args.bandwidth * 1024 if args.bandwidth else None, seed=args.seed, quiet=args.quiet
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"模拟服务已启动: {server.url}")
+    print(f"使用方法: SILICONFLOW_API_URL={server.url} python stt_to_tts.py -d <音频目录路径>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print_stats(server.stats())
+
+
+if __name__ == "__main__":
+    main()
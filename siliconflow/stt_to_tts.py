@@ -13,9 +13,10 @@
     python stt_to_tts.py <音频文件路径>
     python stt_to_tts.py audios/CN素材/迪丽热巴.wav 
     
-    整个目录批量处理：
+    整个目录批量处理（预处理、转录、上传分阶段流水线并发执行）：
     python stt_to_tts.py -d <音频目录路径>
-    python stt_to_tts.py -d audios/CN素材
+    python stt_to_tts.py -d audios/CN素材 --stt-jobs 8 --upload-jobs 4
+    python stt_to_tts.py -d audios/归档 -r --exclude "草稿*" --include "*.wav"
 """
 
 import os
@@ -24,13 +25,16 @@ import subprocess
 import importlib.util
 import re
 import argparse
-import glob
 from pathlib import Path
 import tempfile
 import time
 import json
 import unicodedata
 import shutil
+import threading
+import logging
+import contextlib
+from datetime import datetime
 
 # 导入拼音转换库
 try:
@@ -40,6 +44,28 @@ except ImportError:
     subprocess.run([sys.executable, "-m", "pip", "install", "pypinyin"])
     from pypinyin import lazy_pinyin, Style
 
+# 确保可以导入siliconflow目录下的公共模块
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common.audio_probe import probe_duration, read_wav_head
+from common.cache_store import get_cache_store
+from common.events import EventLog
+from common.file_scan import iter_files, AUDIO_EXTENSIONS
+from common.journal import ResultJournal, compact_journal, journal_path_for, load_results
+from common.manifest import (BatchManifest, reset_manifest, STAGE_TRANSCRIBED, STAGE_UPLOADED,
+                             STAGE_URI_RESOLVED, STAGE_SAVED)
+from common.pipeline import Pipeline, Stage
+from common.text_normalize import normalize_text
+from common.voice_registry import get_voice_registry
+
+logger = logging.getLogger(__name__)
+
+# 目录批量处理时各阶段默认的工作线程数
+DEFAULT_STAGE_JOBS = {
+    "prepare": 2,
+    "transcribe": 4,
+    "upload": 2,
+}
+
 
 def load_module_from_path(module_name, file_path):
     """
@@ -58,101 +84,38 @@ def load_module_from_path(module_name, file_path):
     return module
 
 
+# 已加载的工具模块，批量处理时每个模块只加载一次
+_loaded_modules = {}
+_modules_lock = threading.Lock()
+
+
+def get_tool_module(module_name, relative_path):
+    """
+    加载siliconflow目录下的工具脚本作为模块，并缓存加载结果
+    
+    参数:
+        module_name (str): 模块名称
+        relative_path (str): 相对于siliconflow目录的脚本路径
+        
+    返回:
+        module: 加载的模块对象
+    """
+    with _modules_lock:
+        if module_name not in _loaded_modules:
+            project_root = os.path.dirname(os.path.abspath(__file__))
+            _loaded_modules[module_name] = load_module_from_path(
+                module_name, os.path.join(project_root, relative_path)
+            )
+        return _loaded_modules[module_name]
+
+
 def filter_text(text):
     """
     过滤文本，只保留各种语言的文字、标点符号等有用信息，去除emoji和特殊字符
     支持中文、日文、韩文、印尼文等各种语言的文字和标点符号，同时保留英文单词间的空格
+    规则见 common.text_normalize，过滤后为空时返回原文本
     """
-    if not text:
-        return ""
-    
-    # 步骤1: 先直接移除常见特殊符号（采用直接替换而非正则）
-    filtered_text = text
-    
-    # 直接替换音乐符号
-    filtered_text = filtered_text.replace("🎼", "")  # 音乐符号
-    filtered_text = filtered_text.replace("🎵", "")
-    filtered_text = filtered_text.replace("🎶", "")
-    filtered_text = filtered_text.replace("♫", "")
-    filtered_text = filtered_text.replace("♪", "")
-    
-    # 简单处理几个常见表情符号（使用直接替换而非复杂正则，避免正则过滤中文）
-    filtered_text = filtered_text.replace("😊", "")
-    filtered_text = filtered_text.replace("😄", "")
-    filtered_text = filtered_text.replace("😃", "")
-    filtered_text = filtered_text.replace("😀", "")
-    filtered_text = filtered_text.replace("😁", "")
-    filtered_text = filtered_text.replace("😆", "")
-    filtered_text = filtered_text.replace("😅", "")
-    filtered_text = filtered_text.replace("🤣", "")
-    filtered_text = filtered_text.replace("😂", "")
-    filtered_text = filtered_text.replace("🙂", "")
-    filtered_text = filtered_text.replace("🙃", "")
-    filtered_text = filtered_text.replace("😉", "")
-    filtered_text = filtered_text.replace("😌", "")
-    filtered_text = filtered_text.replace("😍", "")
-    filtered_text = filtered_text.replace("😘", "")
-    filtered_text = filtered_text.replace("😗", "")
-    filtered_text = filtered_text.replace("😙", "")
-    filtered_text = filtered_text.replace("😚", "")
-    filtered_text = filtered_text.replace("😋", "")
-    filtered_text = filtered_text.replace("😛", "")
-    filtered_text = filtered_text.replace("😝", "")
-    filtered_text = filtered_text.replace("😜", "")
-    filtered_text = filtered_text.replace("🤪", "")
-    filtered_text = filtered_text.replace("🤨", "")
-    filtered_text = filtered_text.replace("🧐", "")
-    filtered_text = filtered_text.replace("🤓", "")
-    filtered_text = filtered_text.replace("😎", "")
-    filtered_text = filtered_text.replace("🤩", "")
-    filtered_text = filtered_text.replace("😏", "")
-    filtered_text = filtered_text.replace("😒", "")
-    filtered_text = filtered_text.replace("😞", "")
-    filtered_text = filtered_text.replace("😔", "")  # 常见的忧伤表情
-    filtered_text = filtered_text.replace("😟", "")
-    filtered_text = filtered_text.replace("😕", "")
-    filtered_text = filtered_text.replace("🙁", "")
-    filtered_text = filtered_text.replace("😮", "")  # 惊讶表情
-    filtered_text = filtered_text.replace("😯", "")
-    filtered_text = filtered_text.replace("😲", "")
-    filtered_text = filtered_text.replace("😳", "")
-    filtered_text = filtered_text.replace("🥺", "")
-    filtered_text = filtered_text.replace("😦", "")
-    filtered_text = filtered_text.replace("😧", "")
-    filtered_text = filtered_text.replace("😨", "")
-    filtered_text = filtered_text.replace("😰", "")
-    filtered_text = filtered_text.replace("😱", "")
-    filtered_text = filtered_text.replace("😖", "")
-    filtered_text = filtered_text.replace("😣", "")
-    filtered_text = filtered_text.replace("😞", "")
-    filtered_text = filtered_text.replace("😓", "")
-    filtered_text = filtered_text.replace("😩", "")
-    filtered_text = filtered_text.replace("😫", "")
-    filtered_text = filtered_text.replace("😤", "")
-    filtered_text = filtered_text.replace("😡", "")  # 生气表情
-    filtered_text = filtered_text.replace("😠", "")
-    filtered_text = filtered_text.replace("🤬", "")
-    
-    # 步骤2: 规范化空白字符（不完全移除）
-    # 将多个连续空白字符替换为一个空格，保留单词间的分隔
-    filtered_text = re.sub(r'\s+', ' ', filtered_text)
-    # 去除首尾空格
-    filtered_text = filtered_text.strip()
-    
-    # 步骤3: 输出过滤过程中的调试信息
-    print(f"过滤前文本长度: {len(text)}")
-    print(f"过滤后文本长度: {len(filtered_text)}")
-    
-    # 检查过滤后的文本是否为空
-    if filtered_text:
-        # 显示前20个字符作为预览
-        preview = filtered_text[:20] + "..." if len(filtered_text) > 20 else filtered_text
-        print(f"过滤后文本: {preview}")
-        return filtered_text
-    else:
-        # 如果过滤后为空，则返回原文本
-        print(f"过滤失败，使用原文本: {text[:30]}...")
-        return text
+    return normalize_text(text)
 
 
 def save_to_cn_list(audio_name_raw, audio_name, text, uri):
@@ -196,7 +159,14 @@ def save_to_cn_list(audio_name_raw, audio_name, text, uri):
 
 
 def get_audio_duration(file_path):
-    """获取音频文件的时长（秒）"""
+    """获取音频文件的时长（秒），WAV/FLAC直接解析文件头，其他格式使用ffprobe"""
+    try:
+        duration = probe_duration(file_path)
+        if duration is not None:
+            return duration
+    except OSError as e:
+        print(f"警告: 无法读取音频文件头: {str(e)}")
+    
     try:
         # 使用ffprobe获取音频时长
         cmd = [
@@ -229,28 +199,97 @@ def trim_audio(input_file, output_file, duration=10.0):
         print(f"警告: 音频截取失败: {str(e)}")
         return False
 
-def process_audio_file(audio_file_path, is_batch=False, batch_dir_name=None):
-    """处理单个音频文件的完整流程"""
+def record_stage(manifest, context, stage, **fields):
+    """在进度清单中记录文件完成的阶段，未使用清单时不做任何事"""
+    if manifest is not None and context.get("digest"):
+        manifest.record(context["digest"], stage, **fields)
+
+
+def track_stage(events, context, stage, **fields):
+    """计时一个处理阶段并记录事件；未使用事件记录器时返回一个不做记录的空字段字典"""
+    if events is None:
+        return contextlib.nullcontext({})
+    return events.stage(context["audio_file_path"], stage, **fields)
+
+
+def result_name(audio_file_path, root=None):
+    """
+    批量结果中音频的名称：相对扫描根目录的路径(不带扩展名，以 / 分隔)
+    
+    递归处理时不同子目录下的同名文件(如 a/x.wav 与 b/x.wav)得到不同的名称；
+    不提供 root 或文件直接位于根目录时即为文件名
+    """
+    if root:
+        relative_path = os.path.relpath(audio_file_path, root)
+    else:
+        relative_path = os.path.basename(audio_file_path)
+    return os.path.splitext(relative_path)[0].replace(os.sep, "/")
+
+
+class VoiceNames:
+    """批量处理中分配互不重复的自定义语音名称，可在多个线程中共用"""
+    
+    def __init__(self):
+        self._used = set()
+        self._lock = threading.Lock()
+    
+    def claim(self, name, max_length=64):
+        """
+        占用一个名称，已被占用时追加 _2、_3 等后缀
+        
+        参数:
+            name (str): 期望的名称
+            max_length (int): 名称最大长度
+            
+        返回:
+            str: 实际分配的名称
+        """
+        with self._lock:
+            candidate = name
+            index = 2
+            while candidate in self._used:
+                suffix = f"_{index}"
+                candidate = name[:max_length - len(suffix)] + suffix
+                index += 1
+            self._used.add(candidate)
+            return candidate
+    
+    def reserve(self, name):
+        """占用已经上传过的名称(不追加后缀)，之后的文件不再使用该名称"""
+        with self._lock:
+            self._used.add(name)
+
+
+def prepare_audio(audio_file_path, manifest=None, events=None, root=None, names=None):
+    """
+    预处理阶段：生成自定义语音名称，音频超过10秒时截取前10秒
+    
+    参数:
+        audio_file_path (str): 音频文件路径
+        manifest (BatchManifest, 可选): 进度清单，提供时恢复该文件已完成阶段的结果
+        events (EventLog, 可选): 事件记录器，记录 probe、trim 阶段的耗时
+        root (str, 可选): 批量处理的扫描根目录，结果名称取相对该目录的路径
+        names (VoiceNames, 可选): 批量处理中已分配的语音名称，重名时追加序号
+        
+    返回:
+        dict: 处理上下文，后续阶段会在其中补充转录文本、URI等信息
+    """
     # 检查音频文件是否存在
     if not os.path.isfile(audio_file_path):
-        print(f"错误: 文件 '{audio_file_path}' 不存在")
-        return False
-    
-    # 获取项目根目录
-    project_root = os.path.dirname(os.path.abspath(__file__))
+        raise FileNotFoundError(f"文件 '{audio_file_path}' 不存在")
     
-    # 获取音频文件名(不带扩展名)
-    audio_name_raw = os.path.splitext(os.path.basename(audio_file_path))[0]
+    # 获取音频名称(不带扩展名；递归处理时包含子目录，如 a/x)
+    audio_name_raw = result_name(audio_file_path, root)
     audio_extension = os.path.splitext(audio_file_path)[1]
     
     # 检测是否含有中文字符
     has_chinese = bool(re.search(r'[\u4e00-\u9fff]', audio_name_raw))
     
     if has_chinese:
-        # 将中文转换为拼音，使用下划线连接
-        pinyin_list = lazy_pinyin(audio_name_raw, style=Style.NORMAL)
+        # 将中文转换为拼音，使用下划线连接(子目录分隔符同样替换为下划线)
+        pinyin_list = lazy_pinyin(audio_name_raw.replace("/", "_"), style=Style.NORMAL)
         audio_name = '_'.join(pinyin_list)
-        print(f"注意: 检测到中文名称 '{audio_name_raw}'，已转换为拼音: '{audio_name}'")
+        logger.info("检测到中文名称 '%s'，已转换为拼音: '%s'", audio_name_raw, audio_name)
     else:
         # 如果没有中文，保留原始名称但进行字符过滤
         audio_name = re.sub(r'[^a-zA-Z0-9_-]', '_', audio_name_raw)
@@ -258,195 +297,455 @@ def process_audio_file(audio_file_path, is_batch=False, batch_dir_name=None):
     # 确保名称不超过64个字符
     audio_name = audio_name[:64]
     
-    print(f"\n======= 处理音频文件 =======")
-    print(f"文件路径: {audio_file_path}")
-    print(f"原始音频名称: {audio_name_raw}")
-    print(f"处理后的名称: {audio_name}")
+    logger.info("处理音频文件: %s (原始名称: %s，处理后的名称: %s)", audio_file_path, audio_name_raw, audio_name)
+    
+    context = {
+        "audio_file_path": audio_file_path,
+        "audio_name_raw": audio_name_raw,
+        "audio_name": audio_name,
+        "has_chinese": has_chinese,
+        "audio_to_process": audio_file_path,
+        "temp_audio": None,
+        "audio_bytes": None,
+        "transcription": None,
+        "filtered_transcription": None,
+        "uri": None,
+        "digest": None
+    }
+    
+    # 按内容哈希恢复上次运行已完成的阶段
+    uploaded = False
+    if manifest is not None:
+        context["digest"] = get_cache_store().content_digest(audio_file_path)
+        entry = manifest.get(context["digest"])
+        if entry:
+            for field in ("transcription", "filtered_transcription", "uri"):
+                context[field] = entry.get(field)
+            if entry.get("audio_name") and manifest.reached(context["digest"], STAGE_UPLOADED):
+                # 已按旧名称上传过，沿用旧名称查找URI
+                context["audio_name"] = entry["audio_name"]
+                uploaded = True
+            logger.info("%s: 从进度清单恢复，已完成阶段 %s", audio_name_raw, entry["stage"])
+    
+    # 同一批次中不同文件的语音名称不能重复(如 a/x_y 与 a_x/y)，重名时追加序号
+    if names is not None and uploaded:
+        names.reserve(context["audio_name"])
+    elif names is not None:
+        audio_name = names.claim(context["audio_name"])
+        if audio_name != context["audio_name"]:
+            logger.info("%s: 语音名称 '%s' 已被占用，改用 '%s'", audio_name_raw, context["audio_name"], audio_name)
+            context["audio_name"] = audio_name
+    
+    if context["filtered_transcription"]:
+        # 已有转录结果，无需截取音频
+        return context
     
     # 在STT前截取音频（如果需要）
-    audio_to_process = audio_file_path
-    temp_audio = None
     try:
         # 获取音频时长
-        duration = get_audio_duration(audio_file_path)
+        with track_stage(events, context, "probe") as info:
+            duration = get_audio_duration(audio_file_path)
+            info["audio_seconds"] = duration
+        
         if duration is not None and duration > 10.0:
-            print(f"\n【预处理：截取音频】")
-            print(f"原始音频时长: {duration:.2f}秒，将截取前10秒进行处理")
-            
-            # 创建临时文件用于存储截取后的音频
-            temp_audio = os.path.join(tempfile.gettempdir(), f"trimmed_{int(time.time())}{audio_extension}")
+            logger.info("%s: 原始音频时长 %.2f秒，截取前10秒进行处理", audio_name_raw, duration)
             
-            # 截取音频前10秒
-            if trim_audio(audio_file_path, temp_audio):
-                audio_to_process = temp_audio
-                print(f"音频截取成功，使用截取后的音频进行后续处理")
-            else:
-                print(f"音频截取失败，将使用原始音频")
+            with track_stage(events, context, "trim") as info:
+                # WAV直接在内存中切取PCM数据，截取结果以字节形式交给转录阶段
+                audio_bytes = read_wav_head(audio_file_path, 10.0)
+                if audio_bytes is not None:
+                    context["audio_bytes"] = audio_bytes
+                    info.update(method="memory", bytes=len(audio_bytes))
+                else:
+                    # 压缩格式回退到ffmpeg，创建临时文件用于存储截取后的音频（文件名唯一，并发处理时不会互相覆盖）
+                    info["method"] = "ffmpeg"
+                    fd, temp_audio = tempfile.mkstemp(prefix="trimmed_", suffix=audio_extension)
+                    os.close(fd)
+                    
+                    # 截取音频前10秒
+                    if trim_audio(audio_file_path, temp_audio):
+                        context["audio_to_process"] = temp_audio
+                        context["temp_audio"] = temp_audio
+                        info["bytes"] = os.path.getsize(temp_audio)
+                    else:
+                        os.remove(temp_audio)
+                        raise RuntimeError("ffmpeg截取失败")
+            logger.info("%s: 音频截取成功，使用截取后的音频进行后续处理", audio_name_raw)
     except Exception as e:
-        print(f"音频截取过程中发生错误: {str(e)}，将使用原始音频")
+        logger.warning("%s: 音频截取过程中发生错误: %s，将使用原始音频", audio_name_raw, e)
+    
+    return context
+
+
+def remove_temp_audio(context):
+    """清理临时截取的音频文件和内存中的截取数据"""
+    context["audio_bytes"] = None
+    temp_audio = context.get("temp_audio")
+    if temp_audio and os.path.exists(temp_audio):
+        try:
+            os.remove(temp_audio)
+        except Exception as e:
+            logger.warning("无法删除临时音频文件 %s: %s", temp_audio, e)
+    context["temp_audio"] = None
+
+
+def transcribe_step(context, manifest=None, events=None):
+    """
+    转录阶段：语音转文本，并过滤emoji等无用字符
     
-    # 第一步：语音转文本 (STT)
-    print(f"\n【第一步：语音转文本】")
+    参数:
+        context (dict): prepare_audio 返回的处理上下文
+        manifest (BatchManifest, 可选): 进度清单，转录成功后记录结果
+        events (EventLog, 可选): 事件记录器，记录 stt、filter 阶段的耗时
+        
+    返回:
+        dict: 补充了 transcription、filtered_transcription 的处理上下文
+    """
+    name = context["audio_name_raw"]
+    if context["filtered_transcription"]:
+        logger.info("%s: 跳过转录，进度清单中已有转录结果: %s", name, context["filtered_transcription"])
+        return context
     
     # 导入STT模块
-    stt_path = os.path.join(project_root, "STT", "audio_transcription.py")
-    stt_module = load_module_from_path("audio_transcription", stt_path)
+    stt_module = get_tool_module("audio_transcription", os.path.join("STT", "audio_transcription.py"))
     
     # 执行语音转文本
-    print(f"正在处理音频文件: {os.path.basename(audio_file_path)}")
-    print(f"正在将音频转换为文本...")
-    result = stt_module.transcribe_audio(audio_to_process)
-    
-    if not result:
-        print("错误: 语音转文本失败")
-        return False
+    logger.info("%s: 正在将音频转换为文本", name)
+    try:
+        with track_stage(events, context, "stt") as info:
+            if context["audio_bytes"] is not None:
+                info["bytes"] = len(context["audio_bytes"])
+                result = stt_module.transcribe_audio_bytes(
+                    context["audio_bytes"], os.path.basename(context["audio_file_path"]), verbose=False
+                )
+            else:
+                info["bytes"] = os.path.getsize(context["audio_to_process"])
+                result = stt_module.transcribe_audio(context["audio_to_process"], verbose=False)
+            
+            if not result:
+                raise RuntimeError("语音转文本失败")
+    finally:
+        # 截取后的音频只用于转录
+        remove_temp_audio(context)
     
     # 获取转录文本
     transcription = result.get('text', '')
     
     if not transcription:
-        print("错误: 未能获取到有效的转录文本")
-        return False
+        raise RuntimeError("未能获取到有效的转录文本")
     
     # 过滤文本，去除emoji等无用字符
-    filtered_transcription = filter_text(transcription)
-    print(f"转录成功!")
-    print(f"原始文本: {transcription}")
-    print(f"过滤后文本: {filtered_transcription}")
-    
-    # 第二步：使用转录文本创建自定义语音 (TTS)
-    print(f"\n【第二步：上传自定义语音】")
-    
-    # 创建一个临时脚本来运行voice_upload.py
-    with tempfile.NamedTemporaryFile(suffix='.sh', mode='w+', delete=False) as tmp:
-        tmp_path = tmp.name
-        tmp.write(f"""#!/bin/bash
-cd "{project_root}"
-python TTS/voice_upload.py "{audio_file_path}" "{audio_name}" "{filtered_transcription}"
-""")
-    
-    # 设置执行权限
-    os.chmod(tmp_path, 0o755)
-    
-    # 执行临时脚本
-    print(f"正在上传自定义语音...")
-    uri = None
+    with track_stage(events, context, "filter", chars=len(transcription)):
+        filtered_transcription = filter_text(transcription)
+    logger.info("%s: 转录成功，原始文本: %s，过滤后文本: %s", name, transcription, filtered_transcription)
+    
+    context["transcription"] = transcription
+    context["filtered_transcription"] = filtered_transcription
+    record_stage(manifest, context, STAGE_TRANSCRIBED,
+                 path=context["audio_file_path"],
+                 audio_name_raw=context["audio_name_raw"],
+                 audio_name=context["audio_name"],
+                 transcription=transcription,
+                 filtered_transcription=filtered_transcription)
+    return context
+
+
+# 本次运行开始的时间：复用已有的音色URI前，注册表须在此之后与远程音色列表同步过
+RUN_STARTED = time.time()
+
+
+def voice_exists(uri):
+    """
+    确认音色仍存在于远程：本次运行内注册表至少与远程音色列表同步一次(之后只查本地)，
+    已在远程删除的音色在同步时从注册表移除
+
+    参数:
+        uri (str): 音色URI
+
+    返回:
+        bool: 音色是否存在；无法获取音色列表时返回True，沿用已有URI，避免重复上传
+    """
+    registry = get_voice_registry()
+    fetch_module = get_tool_module("voice_fetch", os.path.join("TTS", "voice_fetch.py"))
     try:
-        # 执行脚本并获取输出
-        result = subprocess.run([tmp_path], check=True, capture_output=True, text=True)
-        output = result.stdout
-        
-        # 尝试从输出中提取URI
-        uri_match = re.search(r'speech:[\w-]+:[\w]+:[\w]+', output)
-        if uri_match:
-            uri = uri_match.group(0)
+        registry.sync(fetch_module.load_api_key(), since=RUN_STARTED)
+    except Exception as e:
+        logger.warning("同步音色列表失败，沿用已有音色URI: %s", e)
+        return True
+    return registry.find_by_uri(uri) is not None
+
+
+def upload_step(context, manifest=None, events=None):
+    """
+    上传阶段：使用转录文本创建自定义语音，并获取音色URI
+    
+    参数:
+        context (dict): transcribe_step 返回的处理上下文
+        manifest (BatchManifest, 可选): 进度清单，已上传过的文件不会重复上传
+        events (EventLog, 可选): 事件记录器，记录 registry_lookup、upload、registry、uri_lookup 阶段的耗时
         
-        print(f"语音上传成功! 自定义语音名称: {audio_name}")
+    返回:
+        dict: 补充了 uri 的处理上下文(未能获取URI时为None)
+    """
+    name = context["audio_name_raw"]
+    audio_name = context["audio_name"]
+    
+    # 进度清单中的URI已在远程删除时需要重新上传
+    deleted_remotely = False
+    if context["uri"]:
+        with track_stage(events, context, "registry_lookup"):
+            exists = voice_exists(context["uri"])
+        if exists:
+            logger.info("%s: 跳过上传，进度清单中已有音色URI: %s", name, context["uri"])
+            return context
+        logger.info("%s: 进度清单中的音色已在远程删除，重新上传: %s", name, context["uri"])
+        context["uri"] = None
+        deleted_remotely = True
+    
+    # 本地音色注册表中已有相同音频、相同名称、且远程仍存在的音色时直接复用
+    with track_stage(events, context, "registry_lookup"):
+        if not context["digest"]:
+            context["digest"] = get_cache_store().content_digest(context["audio_file_path"])
+        registered = get_voice_registry().find_by_digest(context["digest"])
+        if registered and registered["custom_name"] == audio_name and not voice_exists(registered["uri"]):
+            registered = None
+    
+    if registered and registered["custom_name"] == audio_name:
+        uri = registered["uri"]
+        logger.info("%s: 跳过上传，音色注册表中已有该音频上传的音色: %s", name, uri)
+    elif not deleted_remotely and manifest is not None and manifest.reached(context["digest"], STAGE_UPLOADED):
+        # 上次运行已上传成功但未拿到URI，只需重新查找，避免创建重复音色
+        logger.info("%s: 跳过上传，语音已上传过，自定义语音名称: %s", name, audio_name)
+        uri = None
+    else:
+        # 在当前进程中直接调用上传函数，不再启动新的解释器
+        upload_module = get_tool_module("voice_upload", os.path.join("TTS", "voice_upload.py"))
         
-        # 如果没有找到URI，尝试从voices.json中获取
-        if not uri:
-            # 先刷新音色列表
-            print("未在输出中找到URI，尝试从voices.json获取...")
-            fetch_path = os.path.join(project_root, "TTS", "voice_fetch.py")
-            subprocess.run(["python", fetch_path], check=True)
-            
-            # 读取voices.json
-            voices_json_path = os.path.join(project_root, "voices.json")
-            if os.path.exists(voices_json_path):
-                with open(voices_json_path, "r", encoding="utf-8") as f:
-                    voices_data = json.load(f)
-                    if "result" in voices_data:
-                        for voice in voices_data["result"]:
-                            if voice.get("customName") == audio_name:
-                                uri = voice.get("uri")
-                                break
+        logger.info("%s: 正在上传自定义语音 %s", name, audio_name)
+        with track_stage(events, context, "upload"):
+            # 注册表在下面单独写入，以便分别统计耗时
+            upload_result = upload_module.upload_voice(
+                context["audio_file_path"], audio_name, context["filtered_transcription"], register=False,
+                verbose=False
+            )
+            # 上传请求成功但响应中没有URI时，继续按名称查找
+            if upload_result["status_code"] != 200:
+                raise RuntimeError(f"语音上传失败: {upload_result['error']}")
         
-        # 根据处理模式选择保存方法
+        uri = upload_result["uri"]
+        logger.info("%s: 语音上传成功，自定义语音名称: %s", name, audio_name)
+        record_stage(manifest, context, STAGE_UPLOADED, audio_name=audio_name)
         if uri:
-            if is_batch and batch_dir_name:
+            with track_stage(events, context, "registry"):
+                get_voice_registry().add(uri, upload_result["custom_name"],
+                                         text=context["filtered_transcription"],
+                                         content_digest=context["digest"])
+    
+    # 如果响应中没有URI，先查本地音色注册表，未找到时同步音色列表后再查
+    if not uri:
+        logger.info("%s: 未在上传响应中找到URI，尝试从音色列表获取", name)
+        fetch_module = get_tool_module("voice_fetch", os.path.join("TTS", "voice_fetch.py"))
+        try:
+            with track_stage(events, context, "uri_lookup"):
+                uri = fetch_module.find_voice_uri(audio_name)
+        except Exception as e:
+            logger.warning("%s: 获取音色列表失败: %s", name, e)
+    
+    if uri:
+        record_stage(manifest, context, STAGE_URI_RESOLVED, uri=uri)
+    context["uri"] = uri
+    return context
+
+
+def save_step(context, batch_dir_name=None, manifest=None, events=None):
+    """
+    保存阶段：保存音色信息并输出处理结果
+    
+    参数:
+        context (dict): upload_step 返回的处理上下文
+        batch_dir_name (str, 可选): 批量处理的目录名，提供时保存到以目录名命名的统一JSON文件
+        manifest (BatchManifest, 可选): 进度清单，保存后把文件标记为已完成
+        events (EventLog, 可选): 事件记录器，记录 save 阶段的耗时
+        
+    返回:
+        dict: 处理上下文
+    """
+    uri = context["uri"]
+    
+    # 根据处理模式选择保存方法
+    if uri:
+        with track_stage(events, context, "save"):
+            if batch_dir_name:
                 # 批量处理模式，保存到以目录名命名的统一JSON文件
-                save_to_batch_json(batch_dir_name, audio_name_raw, audio_name, filtered_transcription, uri)
+                save_to_batch_json(batch_dir_name, context["audio_name_raw"], context["audio_name"],
+                                   context["filtered_transcription"], uri)
+                record_stage(manifest, context, STAGE_SAVED)
             else:
                 # 单文件处理模式，保存到单独的JSON文件
-                save_to_cn_list(audio_name_raw, audio_name, filtered_transcription, uri)
-        else:
-            print("警告: 未能获取到音色URI，无法保存音色信息")
-            
-    except subprocess.CalledProcessError as e:
-        print(f"错误: 语音上传失败 (错误码: {e.returncode})")
-        return False
-    finally:
-        # 删除临时脚本和临时音频文件
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-        
-        # 清理临时截取的音频文件
-        if temp_audio and os.path.exists(temp_audio):
-            try:
-                os.remove(temp_audio)
-            except Exception as e:
-                print(f"警告: 无法删除临时音频文件: {str(e)}")
+                save_to_cn_list(context["audio_name_raw"], context["audio_name"],
+                                context["filtered_transcription"], uri)
+    else:
+        logger.warning("%s: 未能获取到音色URI，无法保存音色信息", context["audio_name_raw"])
+    
+    if batch_dir_name:
+        # 批量处理时各文件的结果由流水线汇总输出，这里只记录日志
+        logger.info("%s: 处理完成，自定义语音名称: %s，音色URI: %s",
+                    context["audio_name_raw"], context["audio_name"], uri)
+        return context
     
     print(f"\n======= 处理完成 =======")
-    print(f"原始音频: {audio_file_path}")
-    print(f"转录文本: {filtered_transcription}")
-    print(f"自定义语音名称: {audio_name}")
-    if has_chinese:
-        print(f"原始中文名称: {audio_name_raw}")
+    print(f"原始音频: {context['audio_file_path']}")
+    print(f"转录文本: {context['filtered_transcription']}")
+    print(f"自定义语音名称: {context['audio_name']}")
+    if context["has_chinese"]:
+        print(f"原始中文名称: {context['audio_name_raw']}")
     if uri:
         print(f"音色URI: {uri}")
     print(f"处理成功!")
+    return context
+
+
+def process_audio_file(audio_file_path, is_batch=False, batch_dir_name=None, events_path=None):
+    """处理单个音频文件的完整流程，提供 events_path 时把各阶段耗时事件写入该文件"""
+    context = None
+    events = EventLog(events_path) if events_path else None
+    try:
+        context = prepare_audio(audio_file_path, events=events)
+        transcribe_step(context, events=events)
+        upload_step(context, events=events)
+        save_step(context, batch_dir_name if is_batch else None, events=events)
+    except Exception as e:
+        print(f"错误: {str(e)}")
+        return False
+    finally:
+        if context:
+            remove_temp_audio(context)
+        if events:
+            events.close()
+            print_stage_summary(events)
     return True
 
 
+def print_stage_summary(events, files=None, wall_time=None):
+    """
+    打印各阶段耗时的 p50/p95/p99 以及整体吞吐
+    
+    参数:
+        events (EventLog): 事件记录器
+        files (int, 可选): 处理的文件数
+        wall_time (float, 可选): 总耗时(秒)
+    """
+    summary = events.summary()
+    if not summary:
+        return
+    print(f"\n======= 阶段耗时 =======")
+    print(f"{'阶段':<16}{'次数':>6}{'失败':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'累计(s)':>10}")
+    for stage, stats in summary.items():
+        print(f"{stage:<16}{stats['count']:>6}{stats['errors']:>6}"
+              f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}"
+              f"{stats['total']:>10.2f}")
+    if files and wall_time:
+        print(f"吞吐: {files / wall_time:.2f} 文件/秒")
+    if events.path:
+        print(f"事件明细: {events.path}")
+
+
+def batch_json_path(directory_name):
+    """批量处理结果文件路径：TTS/raw_text_files/<目录名>.json"""
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(project_root, "TTS", "raw_text_files", f"{directory_name}.json")
+
+
+def batch_events_path(directory_name):
+    """本次批量处理的事件文件路径：TTS/raw_text_files/events/<目录名>_<时间>.jsonl"""
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(project_root, "TTS", "raw_text_files", "events", f"{directory_name}_{timestamp}.jsonl")
+
+
+def batch_manifest_path(directory_name):
+    """批量处理进度清单路径：TTS/raw_text_files/manifests/<目录名>.jsonl"""
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(project_root, "TTS", "raw_text_files", "manifests", f"{directory_name}.jsonl")
+
+
+# 各目录正在写入的结果日志，保存阶段按目录名复用
+_batch_journals = {}
+_batch_journals_lock = threading.Lock()
+
+
+def get_batch_journal(directory_name):
+    """获取(必要时打开)目录对应的结果日志 <目录名>.jsonl"""
+    with _batch_journals_lock:
+        journal = _batch_journals.get(directory_name)
+        if journal is None:
+            journal = ResultJournal(journal_path_for(batch_json_path(directory_name)))
+            _batch_journals[directory_name] = journal
+        return journal
+
+
+def compact_batch_json(directory_name):
+    """
+    关闭目录的结果日志，并把日志合并进 <目录名>.json
+    
+    参数:
+        directory_name: 原始目录名称
+        
+    返回:
+        dict: 合并后的全部结果
+    """
+    with _batch_journals_lock:
+        journal = _batch_journals.pop(directory_name, None)
+    if journal:
+        journal.close()
+    return compact_journal(batch_json_path(directory_name))
+
+
 def save_to_batch_json(directory_name, audio_name_raw, audio_name, text, uri):
     """
-    将转录文本和音色信息保存到以目录名命名的JSON文件中
+    将转录文本和音色信息追加到以目录名命名的结果日志中
+    
+    每个文件只追加一行，不再重写整个JSON；批量处理结束时由 compact_batch_json
+    合并为 <目录名>.json。处理过程中可以用 common.journal.load_results 读取最新结果。
     
     参数:
         directory_name: 原始目录名称
-        audio_name_raw: 原始音频名称
+        audio_name_raw: 原始音频名称(递归处理时为相对目录的路径，如 a/x)，同时作为结果的键
         audio_name: 处理后的音频名称
         text: 转录文本
         uri: 音色URI
     """
-    # 获取项目根目录
-    project_root = os.path.dirname(os.path.abspath(__file__))
-    
-    # 确定要保存的JSON文件路径
-    json_file_path = os.path.join(project_root, "TTS", "raw_text_files", f"{directory_name}.json")
-    
-    # 确保目录存在
-    os.makedirs(os.path.dirname(json_file_path), exist_ok=True)
-    
-    # 读取现有数据（如果文件存在）
-    data = {}
-    if os.path.exists(json_file_path):
-        try:
-            with open(json_file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            print(f"警告: {json_file_path} 格式错误，将创建新文件")
-    
-    # 添加或更新数据
-    data[audio_name_raw] = {
+    journal = get_batch_journal(directory_name)
+    journal.append({
         "audio_name_raw": audio_name_raw,
         "audio_name": audio_name,
         "text": text,
         "uri": uri
-    }
-    
-    # 写入文件
-    with open(json_file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    })
     
-    print(f"音色信息已更新到批量处理文件: {json_file_path}")
+    logger.info("%s: 音色信息已追加到批量处理日志 %s", audio_name_raw, journal.path)
     return True
 
-def process_directory(directory_path, audio_extensions=None):
-    """批量处理目录中的所有音频文件"""
+def process_directory(directory_path, audio_extensions=None, jobs=None, resume=True,
+                      recursive=False, include=None, exclude=None, events_path=None):
+    """
+    批量处理目录中的所有音频文件
+    
+    参数:
+        directory_path (str): 音频目录路径
+        audio_extensions (list, 可选): 要处理的音频扩展名(不区分大小写)，默认为 AUDIO_EXTENSIONS
+        jobs (dict, 可选): 各阶段的工作线程数，如 {"transcribe": 8}，未指定的阶段使用 DEFAULT_STAGE_JOBS
+        resume (bool): 是否根据进度清单跳过上次运行已完成的工作；为False时清空清单重新处理
+        recursive (bool): 是否递归处理子目录
+        include (list, 可选): 文件名或相对路径需要匹配的通配符
+        exclude (list, 可选): 要跳过的文件或目录的通配符
+        events_path (str, 可选): 分阶段耗时事件文件，默认为 TTS/raw_text_files/events/<目录名>_<时间>.jsonl
+        
+    返回:
+        bool: 是否至少有一个文件处理成功
+    """
     if audio_extensions is None:
-        audio_extensions = ['.wav', '.mp3', '.flac', '.m4a', '.ogg']
+        audio_extensions = list(AUDIO_EXTENSIONS)
     
     # 检查目录是否存在
     if not os.path.isdir(directory_path):
@@ -458,49 +757,106 @@ def process_directory(directory_path, audio_extensions=None):
     print(f"\n======= 开始批量处理目录 =======")
     print(f"目录路径: {directory_path}")
     print(f"目录名称: {directory_name}")
+    if recursive:
+        print("递归处理子目录")
+    
+    # 进度清单按内容哈希记录每个文件完成的阶段，中断后重新运行时从最后完成的阶段继续
+    manifest_path = batch_manifest_path(directory_name)
+    if not resume:
+        reset_manifest(manifest_path)
+    manifest = BatchManifest(manifest_path)
+    existing = load_results(batch_json_path(directory_name)) if len(manifest) else {}
+    
+    # 每个文件每个阶段的耗时、流量、HTTP状态写入JSONL事件文件
+    events = EventLog(events_path or batch_events_path(directory_name))
+    
+    # 边遍历目录边产出待处理的文件，找到第一个文件时流水线就开始工作
+    counts = {"found": 0, "skipped": 0}
+    # 递归处理时不同子目录下的同名文件使用不同的语音名称
+    names = VoiceNames()
+    
+    def discover():
+        store = get_cache_store()
+        for audio_file in iter_files(directory_path, audio_extensions, include=include,
+                                     exclude=exclude, recursive=recursive):
+            counts["found"] += 1
+            if len(manifest):
+                # 跳过已全部完成的文件；结果文件中缺失的记录直接从清单补回，无需任何请求
+                digest = store.content_digest(audio_file)
+                entry = manifest.get(digest) if manifest.reached(digest, STAGE_SAVED) else None
+                # 已完成文件的音色在远程被删除时重新处理，由上传阶段重新上传
+                if entry and entry.get("uri") and not voice_exists(entry["uri"]):
+                    logger.info("音色已在远程删除，重新处理: %s", audio_file)
+                    entry = None
+                if entry:
+                    audio_name_raw = result_name(audio_file, directory_path)
+                    if entry.get("audio_name"):
+                        names.reserve(entry["audio_name"])
+                    if audio_name_raw not in existing:
+                        save_to_batch_json(directory_name, audio_name_raw, entry.get("audio_name"),
+                                           entry.get("filtered_transcription"), entry.get("uri"))
+                    counts["skipped"] += 1
+                    continue
+            yield audio_file
+    
+    stage_jobs = dict(DEFAULT_STAGE_JOBS)
+    stage_jobs.update(jobs or {})
+    print(f"各阶段工作线程数: 预处理 {stage_jobs['prepare']}，转录 {stage_jobs['transcribe']}，上传 {stage_jobs['upload']}")
+    
+    # 处理进度
+    finished = []
+    
+    def on_item_done(result):
+        finished.append(result)
+        name = os.path.relpath(result["item"], directory_path)
+        progress = f"[已完成 {len(finished)}，已发现 {counts['found']}]"
+        if result["ok"]:
+            print(f"\n{progress} 完成: {name}")
+        else:
+            print(f"\n{progress} 失败: {name} (阶段: {result['stage']}，原因: {result['error']})")
+    
+    # 预处理(本地ffmpeg) -> 转录 -> 上传 -> 保存，各阶段之间用有界队列连接，
+    # 不同文件的本地处理和网络请求可以同时进行；保存阶段单线程，保证结果日志按完成顺序追加
+    pipeline = Pipeline([
+        Stage("prepare", lambda path: prepare_audio(path, manifest, events, directory_path, names), workers=stage_jobs["prepare"]),
+        Stage("transcribe", lambda context: transcribe_step(context, manifest, events), workers=stage_jobs["transcribe"]),
+        Stage("upload", lambda context: upload_step(context, manifest, events), workers=stage_jobs["upload"]),
+        Stage("save", lambda context: save_step(context, directory_name, manifest, events), workers=1),
+    ], on_item_done=on_item_done)
+    
+    started = time.perf_counter()
+    try:
+        results = pipeline.run(discover())
+    finally:
+        # 中断时也把已追加的结果合并进JSON；未合并的日志会在下次运行结束时一并合并
+        compact_batch_json(directory_name)
+        manifest.close()
+        events.close()
+    wall_time = time.perf_counter() - started
     
-    # 获取目录中的所有音频文件
-    audio_files = []
-    for ext in audio_extensions:
-        pattern = os.path.join(directory_path, f"*{ext}")
-        audio_files.extend(glob.glob(pattern))
-    
-    # 将文件路径按字母排序
-    audio_files.sort()
-    
-    if not audio_files:
+    if not counts["found"]:
         print(f"警告: 目录中没有找到音频文件 (支持的格式: {', '.join(audio_extensions)})")
         return False
     
-    print(f"找到 {len(audio_files)} 个音频文件需要处理")
-    
-    # 保存批量处理的结果集
-    batch_results = {}
-    
     # 处理统计
-    success_count = 0
-    failed_count = 0
-    
-    # 逐个处理音频文件
-    for index, audio_file in enumerate(audio_files):
-        print(f"\n[{index+1}/{len(audio_files)}] 处理文件: {os.path.basename(audio_file)}")
-        # 给process_audio_file函数传递额外的参数，表明这是批量处理
-        success = process_audio_file(audio_file, is_batch=True, batch_dir_name=directory_name)
-        
-        if success:
-            success_count += 1
-        else:
-            failed_count += 1
-        
-        # 在批处理中添加短暂延迟，避免API请求过于频繁
-        if index < len(audio_files) - 1:
-            time.sleep(1)
+    success_count = sum(1 for r in results if r["ok"]) + counts["skipped"]
+    failed = [r for r in results if not r["ok"]]
     
     # 打印总结
     print(f"\n======= 批量处理完成 =======")
-    print(f"总文件数: {len(audio_files)}")
+    print(f"总文件数: {counts['found']}")
     print(f"成功处理: {success_count}")
-    print(f"处理失败: {failed_count}")
+    if counts["skipped"]:
+        print(f"其中跳过(上次已完成): {counts['skipped']}")
+    print(f"处理失败: {len(failed)}")
+    print(f"总耗时: {wall_time:.2f}秒")
+    for name, stats in pipeline.stats.items():
+        print(f"阶段 {name}: 线程 {stats['workers']}，完成 {stats['items']}，失败 {stats['errors']}，累计耗时 {stats['busy']:.2f}秒")
+    if failed:
+        print("失败的文件:")
+        for r in failed:
+            print(f"- {r['item']} ({r['stage']}): {r['error']}")
+    print_stage_summary(events, len(results), wall_time)
     print(f"所有转录结果已保存至: TTS/raw_text_files/{directory_name}.json")
     
     return success_count > 0
@@ -516,18 +872,47 @@ def main():
     group.add_argument('file', nargs='?', help='要处理的音频文件路径')
     group.add_argument('-d', '--directory', help='要批量处理的音频文件目录')
     
+    # 目录模式下各阶段的工作线程数
+    parser.add_argument('--prepare-jobs', type=int, default=DEFAULT_STAGE_JOBS["prepare"],
+                        help=f'预处理(时长检测、截取)线程数 (默认: {DEFAULT_STAGE_JOBS["prepare"]})')
+    parser.add_argument('--stt-jobs', type=int, default=DEFAULT_STAGE_JOBS["transcribe"],
+                        help=f'语音转文本线程数 (默认: {DEFAULT_STAGE_JOBS["transcribe"]})')
+    parser.add_argument('--upload-jobs', type=int, default=DEFAULT_STAGE_JOBS["upload"],
+                        help=f'语音上传线程数 (默认: {DEFAULT_STAGE_JOBS["upload"]})')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='目录模式下递归处理子目录')
+    parser.add_argument('--include', action='append', metavar='PATTERN',
+                        help='只处理文件名或相对路径匹配该通配符的文件，可多次指定')
+    parser.add_argument('--exclude', action='append', metavar='PATTERN',
+                        help='跳过文件名或相对路径匹配该通配符的文件和目录，可多次指定')
+    parser.add_argument('--events', metavar='PATH',
+                        help='分阶段耗时事件(JSONL)的保存路径；目录模式默认保存到 TTS/raw_text_files/events/')
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='日志级别，INFO时输出每个文件各阶段的进度，DEBUG时输出文本过滤等细节 '
+                             '(默认: 单文件 INFO，目录 WARNING)')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='忽略进度清单，重新处理目录中的所有文件(已上传的音色会被重复上传)')
+    
     # 解析命令行参数
     args = parser.parse_args()
+    # 目录模式下各阶段并发执行，默认只在标准输出打印每个文件的完成情况和最终汇总
+    log_level = args.log_level or ("WARNING" if args.directory else "INFO")
+    logging.basicConfig(level=log_level, format="%(levelname)s %(name)s: %(message)s")
     
     # 根据参数执行相应的处理流程
     if args.directory:
         # 批量处理目录
-        success = process_directory(args.directory)
+        success = process_directory(args.directory, jobs={
+            "prepare": args.prepare_jobs,
+            "transcribe": args.stt_jobs,
+            "upload": args.upload_jobs
+        }, resume=not args.no_resume, recursive=args.recursive,
+            include=args.include, exclude=args.exclude, events_path=args.events)
         if not success:
             sys.exit(1)
     else:
         # 处理单个文件
-        success = process_audio_file(args.file)
+        success = process_audio_file(args.file, events_path=args.events)
         if not success:
             sys.exit(1)
     
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.audio_probe 的单元测试：WAV/FLAC文件头解析和WAV截取
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import io
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+import wave
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.audio_probe import probe_duration, read_wav_head
+
+
+def make_wav(seconds, sample_rate=16000, channels=1, sample_width=2):
+    """生成指定时长的静音WAV数据"""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(b"\x01" * int(sample_rate * seconds) * channels * sample_width)
+    return output.getvalue()
+
+
+def insert_chunk(wav_data, chunk_id, payload):
+    """在fmt块之后、data块之前插入一个额外的分块(如LIST)"""
+    data_offset = wav_data.index(b"data")
+    chunk = chunk_id + struct.pack("<I", len(payload)) + payload + (b"\x00" if len(payload) & 1 else b"")
+    body = wav_data[8:data_offset] + chunk + wav_data[data_offset:]
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def make_flac_header(sample_rate, total_samples, channels=2, bits_per_sample=16):
+    """生成只包含STREAMINFO元数据块的FLAC文件头"""
+    packed = (sample_rate << 44) | ((channels - 1) << 41) | ((bits_per_sample - 1) << 36) | total_samples
+    streaminfo = b"\x00" * 10 + packed.to_bytes(8, "big") + b"\x00" * 16
+    # 最后一个元数据块，类型0(STREAMINFO)，长度34
+    return b"fLaC" + bytes([0x80]) + (34).to_bytes(3, "big") + streaminfo
+
+
+class AudioProbeTest(unittest.TestCase):
+    """文件头解析"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_wav_duration(self):
+        path = self.write("a.wav", make_wav(2.5, sample_rate=22050, channels=2))
+        self.assertAlmostEqual(probe_duration(path), 2.5, places=3)
+
+    def test_wav_duration_skips_extra_chunks(self):
+        data = insert_chunk(make_wav(1.0), b"LIST", b"INFOISFT\x05\x00\x00\x00test\x00")
+        path = self.write("list.wav", data)
+        self.assertAlmostEqual(probe_duration(path), 1.0, places=3)
+
+    def test_streaming_wav_uses_file_size(self):
+        # 边录边写的文件data块大小为0，按实际文件大小计算
+        data = bytearray(make_wav(1.5))
+        offset = data.index(b"data") + 4
+        data[offset:offset + 4] = struct.pack("<I", 0)
+        path = self.write("stream.wav", bytes(data))
+        self.assertAlmostEqual(probe_duration(path), 1.5, places=3)
+
+    def test_flac_duration(self):
+        path = self.write("a.flac", make_flac_header(44100, 44100 * 3))
+        self.assertAlmostEqual(probe_duration(path), 3.0)
+
+    def test_flac_with_id3_tag(self):
+        # ID3v2标签大小为syncsafe整数，这里是20字节的标签内容
+        tag = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + b"\x00" * 20
+        path = self.write("tagged.flac", tag + make_flac_header(48000, 24000))
+        self.assertAlmostEqual(probe_duration(path), 0.5)
+
+    def test_unknown_format_returns_none(self):
+        self.assertIsNone(probe_duration(self.write("a.mp3", b"ID3\x03\x00" + b"\x00" * 100)))
+        self.assertIsNone(probe_duration(self.write("b.bin", b"not audio")))
+        self.assertIsNone(probe_duration(self.write("c.wav", b"RIFF\x00\x00\x00\x00WAVE")))
+
+
+class ReadWavHeadTest(unittest.TestCase):
+    """WAV截取"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def read_params(self, data):
+        with wave.open(io.BytesIO(data), "rb") as reader:
+            return reader.getnchannels(), reader.getsampwidth(), reader.getframerate(), reader.getnframes()
+
+    def test_trims_to_requested_seconds(self):
+        path = self.write("long.wav", make_wav(3.0, sample_rate=16000))
+        head = read_wav_head(path, 1.0)
+        self.assertEqual(self.read_params(head), (1, 2, 16000, 16000))
+
+    def test_trim_is_frame_aligned(self):
+        # 双声道16位每帧4字节，截取长度不能切断帧
+        path = self.write("stereo.wav", make_wav(1.0, sample_rate=8000, channels=2))
+        head = read_wav_head(path, 0.0013)
+        channels, sample_width, _, frames = self.read_params(head)
+        self.assertEqual(frames, 10)
+        data_size = struct.unpack("<I", head[head.index(b"data") + 4:][:4])[0]
+        self.assertEqual(data_size % (channels * sample_width), 0)
+
+    def test_shorter_audio_is_kept_whole(self):
+        path = self.write("short.wav", make_wav(0.5))
+        head = read_wav_head(path, 10.0)
+        self.assertEqual(self.read_params(head)[3], 8000)
+
+    def test_extra_chunks_are_dropped(self):
+        data = insert_chunk(make_wav(2.0), b"LIST", b"INFO")
+        head = read_wav_head(self.write("list.wav", data), 1.0)
+        self.assertNotIn(b"LIST", head)
+        self.assertEqual(self.read_params(head)[3], 16000)
+
+    def test_non_wav_returns_none(self):
+        self.assertIsNone(read_wav_head(self.write("a.flac", make_flac_header(44100, 44100)), 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
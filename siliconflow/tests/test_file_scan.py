@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.file_scan 的单元测试：输入文件的过滤、遍历顺序和符号链接循环
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.file_scan import iter_files
+
+
+class IterFilesTest(unittest.TestCase):
+    """输入文件发现"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in ("b.wav", "a.WAV", "c.mp3", "notes.txt", ".hidden.wav", "._mac.wav",
+                     "sub/x.wav", "sub/草稿/y.wav", "sub/deep/z.flac", ".git/w.wav", "草稿1.wav"):
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(b"")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def scan(self, **kwargs):
+        return [os.path.relpath(path, self.root).replace(os.sep, "/") for path in iter_files(self.root, **kwargs)]
+
+    def test_top_level_only_by_default(self):
+        self.assertEqual(self.scan(), ["a.WAV", "b.wav", "c.mp3", "草稿1.wav"])
+
+    def test_recursive_order_is_stable(self):
+        # 先产出目录内的文件，再按名称顺序进入子目录
+        self.assertEqual(self.scan(recursive=True),
+                         ["a.WAV", "b.wav", "c.mp3", "草稿1.wav", "sub/x.wav", "sub/deep/z.flac", "sub/草稿/y.wav"])
+
+    def test_extensions_are_case_insensitive(self):
+        self.assertEqual(self.scan(extensions=[".WAV"]), ["a.WAV", "b.wav", "草稿1.wav"])
+        self.assertIn("notes.txt", self.scan(extensions=None))
+
+    def test_hidden_files_and_directories(self):
+        self.assertNotIn(".git/w.wav", self.scan(recursive=True))
+        hidden = self.scan(recursive=True, include_hidden=True)
+        self.assertIn(".hidden.wav", hidden)
+        self.assertIn("._mac.wav", hidden)
+        self.assertIn(".git/w.wav", hidden)
+
+    def test_include_matches_name_or_relative_path(self):
+        self.assertEqual(self.scan(recursive=True, include=["*.flac", "sub/x.*"]),
+                         ["sub/x.wav", "sub/deep/z.flac"])
+
+    def test_exclude_prunes_directories(self):
+        self.assertEqual(self.scan(recursive=True, exclude=["草稿*", "deep"]),
+                         ["a.WAV", "b.wav", "c.mp3", "sub/x.wav"])
+        self.assertEqual(self.scan(recursive=True, exclude=["sub/*"]), ["a.WAV", "b.wav", "c.mp3", "草稿1.wav"])
+
+    def test_missing_root_yields_nothing(self):
+        self.assertEqual(list(iter_files(os.path.join(self.root, "missing"))), [])
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "需要支持符号链接")
+    def test_symlink_loop_is_visited_once(self):
+        try:
+            os.symlink(self.root, os.path.join(self.root, "sub", "loop"))
+        except OSError as e:
+            self.skipTest(f"无法创建符号链接: {e}")
+        files = self.scan(recursive=True)
+        self.assertEqual(len(files), len(set(os.path.realpath(os.path.join(self.root, f)) for f in files)))
+        self.assertEqual(files.count("b.wav"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
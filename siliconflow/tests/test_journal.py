@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.journal 的单元测试：结果日志的追加、读取与合并
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.journal import ResultJournal, compact_journal, journal_path_for, load_results, read_journal
+
+
+class JournalTest(unittest.TestCase):
+    """追加写入的结果日志"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.temp_dir, "CN.json")
+        self.journal_path = journal_path_for(self.json_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write_json(self, data):
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def append(self, *records):
+        with ResultJournal(self.journal_path, fsync_every=1) as journal:
+            for record in records:
+                journal.append(record)
+
+    def test_journal_path(self):
+        self.assertEqual(journal_path_for("/a/CN.json"), "/a/CN.jsonl")
+
+    def test_records_are_readable_before_close(self):
+        journal = ResultJournal(self.journal_path)
+        try:
+            journal.append({"audio_name_raw": "甲", "uri": "u1"})
+            self.assertEqual(read_journal(self.journal_path), [{"audio_name_raw": "甲", "uri": "u1"}])
+        finally:
+            journal.close()
+
+    def test_truncated_last_line_is_skipped(self):
+        self.append({"audio_name_raw": "甲", "uri": "u1"})
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"audio_name_raw": "乙", "ur')
+        self.assertEqual([r["audio_name_raw"] for r in read_journal(self.journal_path)], ["甲"])
+
+    def test_missing_journal_reads_empty(self):
+        self.assertEqual(read_journal(self.journal_path), [])
+        self.assertEqual(load_results(self.json_path), {})
+
+    def test_load_results_merges_newer_records(self):
+        self.write_json({"甲": {"audio_name_raw": "甲", "uri": "old"}, "乙": {"audio_name_raw": "乙", "uri": "u2"}})
+        self.append({"audio_name_raw": "甲", "uri": "new"}, {"audio_name_raw": "丙", "uri": "u3"})
+        results = load_results(self.json_path)
+        self.assertEqual({name: info["uri"] for name, info in results.items()},
+                         {"甲": "new", "乙": "u2", "丙": "u3"})
+        # 直接传入日志路径时结果相同
+        self.assertEqual(load_results(self.journal_path), results)
+
+    def test_load_results_with_custom_key(self):
+        self.append({"file": "a.wav", "ok": True}, {"file": "a.wav", "ok": False}, {"no_key": 1})
+        self.assertEqual(load_results(self.json_path, key="file"), {"a.wav": {"file": "a.wav", "ok": False}})
+
+    def test_compact_writes_json_and_removes_journal(self):
+        self.write_json({"甲": {"audio_name_raw": "甲", "uri": "u1"}})
+        self.append({"audio_name_raw": "乙", "uri": "u2"})
+        merged = compact_journal(self.json_path)
+        self.assertFalse(os.path.exists(self.journal_path))
+        with open(self.json_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), merged)
+        self.assertEqual(sorted(merged), ["乙", "甲"])
+
+    def test_compact_without_journal_keeps_json(self):
+        self.write_json({"甲": {"audio_name_raw": "甲", "uri": "u1"}})
+        mtime = os.path.getmtime(self.json_path)
+        self.assertEqual(compact_journal(self.json_path), {"甲": {"audio_name_raw": "甲", "uri": "u1"}})
+        self.assertEqual(os.path.getmtime(self.json_path), mtime)
+
+
+if __name__ == "__main__":
+    unittest.main()
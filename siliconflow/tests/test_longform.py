@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.longform 的单元测试：断句、分段和WAV拼接(含交叉淡化)
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import io
+import os
+import sys
+import unittest
+import wave
+from array import array
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.longform import join_wav, split_sentences, split_text, synthesize_long_text
+
+
+def make_wav(samples, sample_rate=8000, channels=1):
+    """由16位采样值列表生成WAV数据"""
+    pcm = array("h", samples)
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    output = io.BytesIO()
+    with wave.open(output, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm.tobytes())
+    return output.getvalue()
+
+
+def read_samples(data):
+    """读取WAV数据中的16位采样值"""
+    with wave.open(io.BytesIO(data), "rb") as reader:
+        pcm = array("h")
+        pcm.frombytes(reader.readframes(reader.getnframes()))
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    return list(pcm)
+
+
+class SplitTest(unittest.TestCase):
+    """断句与分段"""
+
+    def test_split_chinese_and_english_sentences(self):
+        text = "你好。今天天气不错！Hello world. Pi is 3.14 today."
+        self.assertEqual(split_sentences(text),
+                         ["你好。", "今天天气不错！", "Hello world.", "Pi is 3.14 today."])
+
+    def test_closing_quotes_stay_with_sentence(self):
+        text = "他说：“走吧。”然后离开了……真的吗？！"
+        self.assertEqual(split_sentences(text), ["他说：“走吧。”", "然后离开了……", "真的吗？！"])
+
+    def test_newline_ends_sentence(self):
+        self.assertEqual(split_sentences("第一行\n\n第二行"), ["第一行", "第二行"])
+
+    def test_short_sentences_are_merged(self):
+        self.assertEqual(split_text("一。二。三。", max_chars=4), ["一。二。", "三。"])
+
+    def test_english_chunks_are_joined_with_space(self):
+        self.assertEqual(split_text("Hi there. How are you?", max_chars=100), ["Hi there. How are you?"])
+
+    def test_long_sentence_is_cut_at_soft_breaks(self):
+        sentence = "，".join(["春眠不觉晓"] * 6) + "。"
+        chunks = split_text(sentence, max_chars=12)
+        self.assertTrue(all(len(chunk) <= 12 for chunk in chunks))
+        self.assertEqual("".join(chunks), sentence)
+        self.assertTrue(all(chunk.endswith(("，", "。")) for chunk in chunks))
+
+    def test_long_sentence_without_breaks_is_hard_cut(self):
+        chunks = split_text("一" * 25, max_chars=10)
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+
+
+class JoinWavTest(unittest.TestCase):
+    """WAV拼接"""
+
+    def test_join_without_crossfade_concatenates_samples(self):
+        joined = join_wav([make_wav([1, 2, 3]), make_wav([4, 5])])
+        self.assertEqual(read_samples(joined), [1, 2, 3, 4, 5])
+
+    def test_crossfade_overlaps_seams(self):
+        # 8000Hz下1毫秒为8帧，接缝处8帧重叠，总长度减少8帧
+        left = make_wav([1000] * 40)
+        right = make_wav([-1000] * 40)
+        samples = read_samples(join_wav([left, right], crossfade_ms=1))
+        self.assertEqual(len(samples), 72)
+        self.assertEqual(samples[:32], [1000] * 32)
+        self.assertEqual(samples[40:], [-1000] * 32)
+        seam = samples[32:40]
+        # 淡化区间从前一段平滑过渡到后一段
+        self.assertTrue(all(a > b for a, b in zip(seam, seam[1:])))
+        self.assertTrue(all(-1000 < value < 1000 for value in seam))
+
+    def test_crossfade_with_stereo_keeps_channels_aligned(self):
+        left = make_wav([100, -100] * 20, channels=2)
+        right = make_wav([300, -300] * 20, channels=2)
+        samples = read_samples(join_wav([left, right], crossfade_ms=1))
+        self.assertEqual(len(samples), (20 + 20 - 8) * 2)
+        self.assertTrue(all(value > 0 for value in samples[0::2]))
+        self.assertTrue(all(value < 0 for value in samples[1::2]))
+
+    def test_mismatched_formats_are_rejected(self):
+        with self.assertRaises(ValueError):
+            join_wav([make_wav([0] * 10, sample_rate=8000), make_wav([0] * 10, sample_rate=16000)])
+
+    def test_empty_input_is_rejected(self):
+        with self.assertRaises(ValueError):
+            join_wav([])
+
+    def test_synthesize_long_text_keeps_chunk_order(self):
+        # 每个分段合成为采样值等于分段长度的音频，拼接结果应与分段顺序一致
+        text = "一。二二。三三三。"
+        result, chunk_count = synthesize_long_text(lambda chunk: make_wav([len(chunk)] * 2), text,
+                                                   max_chars=4, jobs=3)
+        self.assertEqual(chunk_count, 3)
+        self.assertEqual(read_samples(result), [2, 2, 3, 3, 4, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.manifest 的单元测试：批量处理进度清单的阶段推进与恢复
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.journal import read_journal
+from common.manifest import (BatchManifest, reset_manifest, STAGE_SAVED, STAGE_TRANSCRIBED,
+                             STAGE_UPLOADED, STAGE_URI_RESOLVED)
+
+
+class BatchManifestTest(unittest.TestCase):
+    """进度清单"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "manifests", "CN.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_stages_advance_in_order(self):
+        with BatchManifest(self.path) as manifest:
+            self.assertFalse(manifest.reached("d1", STAGE_TRANSCRIBED))
+            manifest.record("d1", STAGE_TRANSCRIBED, transcription="你好")
+            self.assertTrue(manifest.reached("d1", STAGE_TRANSCRIBED))
+            self.assertFalse(manifest.reached("d1", STAGE_UPLOADED))
+
+            manifest.record("d1", STAGE_UPLOADED, audio_name="ni_hao")
+            manifest.record("d1", STAGE_URI_RESOLVED, uri="speech:1")
+            self.assertTrue(manifest.reached("d1", STAGE_URI_RESOLVED))
+            self.assertFalse(manifest.reached("d1", STAGE_SAVED))
+
+            # 各阶段的产出累积在同一条记录中
+            entry = manifest.get("d1")
+            self.assertEqual((entry["transcription"], entry["audio_name"], entry["uri"]),
+                             ("你好", "ni_hao", "speech:1"))
+
+    def test_stage_never_moves_backwards(self):
+        with BatchManifest(self.path) as manifest:
+            manifest.record("d1", STAGE_SAVED, uri="speech:1")
+            manifest.record("d1", STAGE_TRANSCRIBED, transcription="重新转录")
+            entry = manifest.get("d1")
+            self.assertEqual(entry["stage"], STAGE_SAVED)
+            self.assertEqual(entry["transcription"], "重新转录")
+
+    def test_unknown_stage_is_rejected(self):
+        with BatchManifest(self.path) as manifest:
+            with self.assertRaises(ValueError):
+                manifest.record("d1", "finished")
+            self.assertEqual(len(manifest), 0)
+
+    def test_get_returns_copy(self):
+        with BatchManifest(self.path) as manifest:
+            manifest.record("d1", STAGE_TRANSCRIBED)
+            manifest.get("d1")["stage"] = STAGE_SAVED
+            self.assertFalse(manifest.reached("d1", STAGE_SAVED))
+
+    def test_reopen_restores_and_compacts_history(self):
+        with BatchManifest(self.path) as manifest:
+            manifest.record("d1", STAGE_TRANSCRIBED, transcription="甲")
+            manifest.record("d1", STAGE_UPLOADED)
+            manifest.record("d2", STAGE_TRANSCRIBED, transcription="乙")
+        self.assertEqual(len(read_journal(self.path)), 3)
+
+        with BatchManifest(self.path) as manifest:
+            self.assertEqual(len(manifest), 2)
+            self.assertTrue(manifest.reached("d1", STAGE_UPLOADED))
+            self.assertEqual(manifest.get("d1")["transcription"], "甲")
+            self.assertEqual(manifest.get("d2")["stage"], STAGE_TRANSCRIBED)
+        # 重新打开时每个文件合并为一行
+        self.assertEqual(sorted(r["digest"] for r in read_journal(self.path)), ["d1", "d2"])
+
+    def test_reset_manifest(self):
+        with BatchManifest(self.path) as manifest:
+            manifest.record("d1", STAGE_SAVED)
+        reset_manifest(self.path)
+        reset_manifest(self.path)
+        with BatchManifest(self.path) as manifest:
+            self.assertEqual(len(manifest), 0)
+            self.assertIsNone(manifest.get("d1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地模拟API服务的回归测试：通过共享HTTP传输层和命令行工具的函数访问 MockAPIServer
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+sys.path.insert(0, os.path.join(SILICONFLOW_DIR, "TTS"))
+
+from mock_api_server import MockAPIServer
+
+# 与 TTS/raw_text_files/CN.json 中格式相同、但并非通过模拟服务上传的音色
+EXISTING_URI = "speech:2B:ag5cthth2f:tkvkepcxdroqgwablkop"
+
+# 关闭模拟延迟，测试不必等待
+NO_LATENCY = {name: "fixed:0" for name in ("transcribe", "speech", "upload", "voices", "delete")}
+
+HAS_DEPENDENCIES = all(importlib.util.find_spec(name) for name in ("requests", "dotenv"))
+
+
+@unittest.skipUnless(HAS_DEPENDENCIES, "需要安装 requests 和 python-dotenv")
+class MockServerTransportTest(unittest.TestCase):
+    """命令行工具通过 SILICONFLOW_API_URL 访问模拟服务"""
+
+    def setUp(self):
+        self.server = MockAPIServer(port=0, latency=NO_LATENCY, quiet=True, seed=0)
+        self.server.start()
+        self.temp_dir = tempfile.mkdtemp()
+        self.env = {
+            "SILICONFLOW_API_URL": self.server.url,
+            "SILICONFLOW_API_KEY": "test-key",
+            "SILICONFLOW_CACHE_DIR": os.path.join(self.temp_dir, ".cache"),
+        }
+        self.saved_env = {key: os.environ.get(key) for key in self.env}
+        os.environ.update(self.env)
+
+    def tearDown(self):
+        self.server.stop()
+        for key, value in self.saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def test_generate_speech_with_existing_voice(self):
+        from voice_create import generate_speech
+
+        output_file = os.path.join(self.temp_dir, "sample.wav")
+        metrics = generate_speech("初次见面，请多关照呀！", EXISTING_URI, output_file,
+                                  response_format="wav", sample_rate=16000, use_cache=False)
+        self.assertTrue(metrics)
+        self.assertFalse(metrics["cached"])
+        with open(output_file, "rb") as f:
+            self.assertEqual(f.read(4), b"RIFF")
+        self.assertEqual(self.server.stats()["speech"], {200: 1})
+
+    def test_deleted_voice_is_rejected(self):
+        from common.bulk_ops import delete_voices
+        from common.http_client import HTTPTransport
+        from common.voice_registry import VoiceRegistry
+
+        transport = HTTPTransport()
+        registry = VoiceRegistry(os.path.join(self.temp_dir, "voices.db"))
+        results = delete_voices([EXISTING_URI], "test-key", retries=0, registry=registry, transport=transport)
+        self.assertEqual([(r["ok"], r["status_code"]) for r in results], [(True, 200)])
+
+        response = transport.post("/audio/speech", headers={"Authorization": "Bearer test-key"},
+                                  json={"model": "m", "input": "你好", "voice": EXISTING_URI})
+        self.assertEqual(response.status_code, 400)
+
+    def test_voice_delete_cli_removes_voice_from_list(self):
+        from common.http_client import HTTPTransport
+
+        transport = HTTPTransport()
+        headers = {"Authorization": "Bearer test-key"}
+        response = transport.post("/uploads/audio/voice", headers=headers, json={
+            "model": "FunAudioLLM/CosyVoice2-0.5B", "customName": "to_delete",
+            "audio": "data:audio/wav;base64,UklGRg==", "text": "测试",
+        })
+        uri = response.json()["result"]["uri"]
+
+        completed = subprocess.run(
+            [sys.executable, os.path.join(SILICONFLOW_DIR, "TTS", "voice_delete.py")],
+            input=uri + "\n", capture_output=True, text=True, env=dict(os.environ), timeout=60
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertIn("音色删除成功", completed.stdout)
+
+        voices = transport.get("/audio/voice/list", headers=headers).json()["result"]
+        self.assertNotIn(uri, [voice["uri"] for voice in voices])
+
+    def test_transport_retries_injected_429(self):
+        from common.http_client import HTTPTransport
+        from common.rate_limit import AdaptiveRateLimiter
+
+        self.server.error_429 = 1.0
+        self.server.retry_after = 0
+        transport = HTTPTransport(throttle_retries=2, limiter=AdaptiveRateLimiter(rate=100))
+        response = transport.get("/audio/voice/list", headers={"Authorization": "Bearer test-key"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.retries, 2)
+        self.assertEqual(self.server.stats()["voices"], {429: 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
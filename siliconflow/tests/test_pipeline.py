@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.pipeline 的单元测试：多阶段流水线的结果顺序与错误传递
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.pipeline import Pipeline, Stage
+
+
+class PipelineTest(unittest.TestCase):
+    """流水线执行器"""
+
+    def test_results_follow_input_order(self):
+        # 越靠前的输入处理越慢，完成顺序与输入顺序相反
+        def slow(value):
+            time.sleep((5 - value) * 0.01)
+            return value
+
+        pipeline = Pipeline([
+            Stage("slow", slow, workers=5),
+            Stage("double", lambda value: value * 2, workers=2),
+        ])
+        results = pipeline.run(range(5))
+        self.assertEqual([r["item"] for r in results], [0, 1, 2, 3, 4])
+        self.assertEqual([r["value"] for r in results], [0, 2, 4, 6, 8])
+        self.assertTrue(all(r["ok"] for r in results))
+
+    def test_stages_run_in_order_for_each_item(self):
+        pipeline = Pipeline([
+            Stage("a", lambda trace: trace + ["a"], workers=2),
+            Stage("b", lambda trace: trace + ["b"], workers=3),
+            Stage("c", lambda trace: trace + ["c"]),
+        ])
+        results = pipeline.run([[], [], []])
+        self.assertEqual([r["value"] for r in results], [["a", "b", "c"]] * 3)
+
+    def test_failed_item_skips_later_stages(self):
+        reached = []
+        lock = threading.Lock()
+
+        def check(value):
+            if value == 2:
+                raise RuntimeError("坏文件")
+            return value
+
+        def record(value):
+            with lock:
+                reached.append(value)
+            return value
+
+        pipeline = Pipeline([Stage("check", check, workers=2), Stage("record", record)])
+        results = pipeline.run([1, 2, 3])
+        self.assertEqual(sorted(reached), [1, 3])
+        failed = results[1]
+        self.assertEqual((failed["item"], failed["ok"], failed["stage"], failed["error"]),
+                         (2, False, "check", "坏文件"))
+        self.assertIsNone(failed["value"])
+        self.assertEqual(pipeline.stats["check"]["errors"], 1)
+        self.assertEqual(pipeline.stats["record"]["items"], 2)
+
+    def test_error_without_message_uses_exception_type(self):
+        def fail(value):
+            raise KeyError()
+
+        results = Pipeline([Stage("fail", fail)]).run([1])
+        self.assertEqual(results[0]["error"], "KeyError")
+
+    def test_generator_input_and_item_callback(self):
+        done = []
+
+        def items():
+            for index in range(4):
+                yield f"file{index}"
+
+        pipeline = Pipeline([Stage("upper", str.upper, workers=2)], on_item_done=done.append)
+        results = pipeline.run(items())
+        self.assertEqual([r["value"] for r in results], ["FILE0", "FILE1", "FILE2", "FILE3"])
+        self.assertEqual(sorted(r["item"] for r in done), ["file0", "file1", "file2", "file3"])
+
+    def test_input_error_stops_workers(self):
+        def items():
+            yield 1
+            raise ValueError("扫描目录失败")
+
+        pipeline = Pipeline([Stage("identity", lambda value: value, workers=2)])
+        with self.assertRaises(ValueError):
+            pipeline.run(items())
+
+    def test_empty_input(self):
+        self.assertEqual(Pipeline([Stage("identity", lambda value: value)]).run([]), [])
+
+    def test_pipeline_requires_stages(self):
+        with self.assertRaises(ValueError):
+            Pipeline([])
+
+
+if __name__ == "__main__":
+    unittest.main()
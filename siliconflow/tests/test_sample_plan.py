@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.sample_plan 的单元测试：试听样本矩阵的展开与去重
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.sample_plan import (DEFAULT_MODEL, dedupe_jobs, expand_spec, load_spec, load_spec_voices,
+                                safe_path_component)
+
+VOICES = {"阿狸": "speech:a", "小明": "speech:b"}
+
+
+class ExpandSpecTest(unittest.TestCase):
+    """样本矩阵展开"""
+
+    def test_expands_templates_voices_and_variants(self):
+        spec = {
+            "templates": {"greeting": "这里是{audio_name_raw}", "en": "Hello"},
+            "variants": {"speed": [0.9, 1.0], "gain": [-2, 0]},
+        }
+        jobs = expand_spec(spec, VOICES, "out")
+        self.assertEqual(len(jobs), 2 * 2 * 2 * 2)
+
+        job = jobs[0]
+        self.assertEqual((job["name"], job["uri"], job["text"]), ("阿狸", "speech:a", "这里是阿狸"))
+        self.assertEqual(job["file"], os.path.join("阿狸", "greeting_s0.9_g-2_r44100.wav"))
+        self.assertEqual(job["output_file"], os.path.join("out", job["file"]))
+        self.assertEqual(job["options"], dict(model=DEFAULT_MODEL, response_format="wav", sample_rate=44100,
+                                              speed=0.9, gain=-2.0))
+        self.assertEqual(len({j["output_file"] for j in jobs}), len(jobs))
+
+    def test_template_list_and_string(self):
+        jobs = expand_spec({"templates": ["一", "二"]}, {"甲": "u"}, "out")
+        self.assertEqual([j["file"] for j in jobs],
+                         [os.path.join("甲", "t0_s1_g-2_r44100.wav"), os.path.join("甲", "t1_s1_g-2_r44100.wav")])
+        jobs = expand_spec({"templates": "只有一句", "format": "mp3"}, {"甲": "u"}, "out")
+        self.assertEqual([j["file"] for j in jobs], [os.path.join("甲", "t0_s1_g-2_r44100.mp3")])
+
+    def test_string_variants_are_converted(self):
+        spec = {"templates": ["一"], "variants": {"speed": "1.10", "sample_rate": ["24000.0"]}}
+        job = expand_spec(spec, {"甲": "u"}, "out")[0]
+        self.assertEqual((job["options"]["speed"], job["options"]["sample_rate"]), (1.1, 24000))
+        # 数值相同但写法不同的参数得到相同的缓存键
+        same = expand_spec({"templates": ["一"], "variants": {"speed": 1.1, "sample_rate": 24000}},
+                           {"甲": "u"}, "out")[0]
+        self.assertEqual(job["params_hash"], same["params_hash"])
+
+    def test_invalid_specs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            expand_spec({}, VOICES, "out")
+        with self.assertRaises(ValueError):
+            expand_spec({"templates": ["一"], "variants": {"pitch": [1]}}, VOICES, "out")
+        with self.assertRaises(ValueError):
+            expand_spec({"templates": ["一"], "variants": {"speed": ["fast"]}}, VOICES, "out")
+
+    def test_names_cannot_escape_output_dir(self):
+        self.assertEqual(safe_path_component("a/b\\c"), "a_b_c")
+        with self.assertRaises(ValueError):
+            safe_path_component("..")
+        job = expand_spec({"templates": {"../x": "一"}}, {"a/x": "u"}, "out")[0]
+        self.assertEqual(job["file"], os.path.join("a_x", ".._x_s1_g-2_r44100.wav"))
+
+    def test_dedupe_identical_cells(self):
+        jobs = expand_spec({"templates": {"a": "同一句", "b": "同一句", "c": "另一句"}}, {"甲": "u"}, "out")
+        unique, duplicates = dedupe_jobs(jobs)
+        self.assertEqual([j["file"].split(os.sep)[-1][0] for j in unique], ["a", "c"])
+        self.assertEqual([j["file"] for j in duplicates[unique[0]["params_hash"]]], [jobs[1]["file"]])
+
+
+class LoadSpecTest(unittest.TestCase):
+    """任务描述与音色读取"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write_json(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    def test_voices_from_result_file_with_include(self):
+        self.write_json("CN.json", {
+            "阿狸": {"audio_name_raw": "阿狸", "uri": "speech:a"},
+            "阿珂": {"audio_name_raw": "阿珂", "uri": "speech:b"},
+            "小明": {"audio_name_raw": "小明", "uri": "speech:c"},
+            "坏记录": {"audio_name_raw": "坏记录"},
+        })
+        voices, skipped = load_spec_voices({"voices": "CN.json", "include": ["阿*"]}, self.temp_dir)
+        self.assertEqual(voices, {"阿狸": "speech:a", "阿珂": "speech:b"})
+        self.assertEqual(skipped, ["坏记录"])
+
+    def test_inline_voices(self):
+        voices, skipped = load_spec_voices({"voices": dict(VOICES)})
+        self.assertEqual((voices, skipped), (VOICES, []))
+        with self.assertRaises(ValueError):
+            load_spec_voices({})
+
+    def test_load_spec_requires_dict(self):
+        path = self.write_json("spec.json", {"templates": ["一"]})
+        self.assertEqual(load_spec(path), {"templates": ["一"]})
+        with self.assertRaises(ValueError):
+            load_spec(self.write_json("list.json", ["一"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+common.text_normalize 的单元测试：转录文本中emoji和特殊符号的过滤
+
+运行方法(在siliconflow目录下):
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+SILICONFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SILICONFLOW_DIR)
+
+from common.text_normalize import normalize_many, normalize_text
+
+
+class NormalizeTextTest(unittest.TestCase):
+    """文本规范化"""
+
+    def test_removes_emoji_and_music_symbols(self):
+        self.assertEqual(normalize_text("🎼大家好😊，今天天气真不错！🎵🎶"), "大家好，今天天气真不错！")
+
+    def test_removes_emoji_sequences(self):
+        # 肤色修饰、零宽连接符组成的家庭emoji、旗帜和键帽序列
+        text = "Hi 👋🏽 family 👨‍👩‍👧‍👦 flag 🏴󠁧󠁢󠁳󠁣󠁴󠁿 key 1️⃣ ❤️ done"
+        self.assertEqual(normalize_text(text), "Hi family flag key 1 done")
+
+    def test_keeps_text_and_punctuation_in_other_scripts(self):
+        for text in ("こんにちは、元気ですか？", "안녕하세요!", "Selamat pagi, apa kabar?",
+                     "「引号」《书名》——破折号……"):
+            self.assertEqual(normalize_text(text), text)
+
+    def test_keeps_units_and_ascii(self):
+        text = "气温 25℃，湿度 60%，角度 90°，编号 №3，a+b=c ~ @#$"
+        self.assertEqual(normalize_text(text), text)
+
+    def test_collapses_whitespace(self):
+        self.assertEqual(normalize_text("  你好 \n\t世界  😀 "), "你好 世界")
+
+    def test_empty_result_falls_back_to_original(self):
+        with self.assertLogs("common.text_normalize", "WARNING"):
+            self.assertEqual(normalize_text("😀🎉"), "😀🎉")
+        self.assertEqual(normalize_text(""), "")
+        self.assertEqual(normalize_text(None), "")
+
+    def test_normalize_many_keeps_order(self):
+        self.assertEqual(normalize_many(["甲😀", "乙", "🎵丙"]), ["甲", "乙", "丙"])
+
+
+if __name__ == "__main__":
+    unittest.main()